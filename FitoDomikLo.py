@@ -1,24 +1,34 @@
 import sys
-import serial
 import time
 import threading
 import os
-import cv2
-import numpy as np
-import requests
-import json
 from datetime import datetime
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
     QTabWidget, QFrame, QComboBox, QSpinBox, QMessageBox, QDialog, QFormLayout, QTimeEdit,
-    QFileDialog, QRadioButton, QTextEdit, QGroupBox, QDoubleSpinBox, QLineEdit
+    QFileDialog, QRadioButton, QTextEdit, QPlainTextEdit, QGroupBox, QDoubleSpinBox, QLineEdit, QTableWidget,
+    QTableWidgetItem, QHeaderView, QAbstractItemView, QInputDialog
 )
-from PyQt6.QtCore import Qt, QTimer, QThread, pyqtSignal
+from PyQt6.QtCore import Qt, QTimer, QThread, QObject, pyqtSignal
 from PyQt6.QtGui import QFont, QColor, QPixmap, QImage, QTextOption, QIcon
-import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
-import numpy as np
+import matplotlib.dates as mdates
+from timeseries import RingBuffer, minmax_downsample
+from command_channel import CommandError
+from controller_commands import send_time, send_config
+from serial_mux import SerialMux
+from port_discovery import discover, list_candidate_ports
+from sensor_store import SensorStore
+from photo_scheduler import PhotoScheduler, TEST_MODE, ONCE_A_DAY, TWICE_A_DAY, RULES_MODE, parse_rules
+from camera_service import CameraService
+from capture_queue import CaptureQueue
+from event_log import EventLog, EVENTS_FILE
+from app_settings import Settings, CONFIG_FILE
+from metrics import METRICS, MetricsServer
+from photo_writer import PhotoWriter, DEFAULT_QUALITY
+from analysis_catalog import AnalysisCatalog, CATALOG_FILE
+from serial_parser import reading_to_dict, SensorReading, SensorFault, DeviceState, ControllerTime
 def get_resource_path(relative_path):
     """Получает абсолютный путь к ресурсу, работает для разработки и PyInstaller"""
     try:
@@ -26,228 +36,222 @@ def get_resource_path(relative_path):
     except Exception:
         base_path = os.path.abspath(".")
     return os.path.join(base_path, relative_path)
-CONFIG_FILE = os.path.join(os.path.expanduser("~"), "fitodomik_config.json")
 ICON_FILE = get_resource_path("67fb70c98d5b2.ico")
 LOCAL_PATH = os.path.join(os.path.expanduser("~"), "FitoDomik_photos")
-CAMERA_INDEX = 0
+READINGS_DB_FILE = os.path.join(os.path.expanduser("~"), "fitodomik_readings.db")
+LOG_DIR = os.path.join(os.path.expanduser("~"), "FitoDomik_logs")
+# Вкладка "Журнал" обновляется пачкой раз в LOG_REFRESH_MS и держит не больше LOG_LINES строк
+LOG_REFRESH_MS = 250
+LOG_LINES = 5000
+LOG_LEVEL_FILTERS = (("Все уровни", "DEBUG"), ("Информация и выше", "INFO"),
+                     ("Предупреждения и ошибки", "WARNING"), ("Только ошибки", "ERROR"))
 SAVE_LOCAL = True
+# Опрос цикла событий: таймер каждые LAG_PROBE_MS, задержка его срабатывания сверх интервала - подвисание интерфейса
+LAG_PROBE_MS = 100
+DIAGNOSTICS_REFRESH_MS = 1000
+RECONNECT_MS = 10000
+READ_TO_EMIT = METRICS.histogram("fitodomik_serial_read_to_emit_seconds", "От чтения байт из порта до сигнала Qt")
+READ_TO_GUI = METRICS.histogram("fitodomik_serial_read_to_gui_seconds", "От чтения байт из порта до обработки в окне")
+GRAPH_RENDER = {kind: METRICS.histogram("fitodomik_graph_render_seconds", "Перерисовка графика показаний", kind=kind)
+                for kind in ("full", "blit")}
+EVENT_LOOP_LAG = METRICS.histogram("fitodomik_gui_event_loop_lag_seconds", "Задержка цикла событий окна")
+GRAPH_WINDOWS = (("1 час", 3600), ("24 часа", 86400), ("7 дней", 7 * 86400))
+DEVICE_LABELS = {
+    'lamp': ('Лампа', 'ВКЛ', 'ВЫКЛ'),
+    'curtains': ('Шторы', 'ОТКРЫТЫ', 'ЗАКРЫТЫ'),
+    'pump': ('Насос', 'ВКЛ', 'ВЫКЛ'),
+    'fan': ('Вентилятор', 'ВКЛ', 'ВЫКЛ')
+}
 if SAVE_LOCAL and not os.path.exists(LOCAL_PATH):
     os.makedirs(LOCAL_PATH)
-class ArduinoReader(QThread):
-    data_received = pyqtSignal(dict)
-    def __init__(self, serial_port):
+class ArduinoReader(QObject):
+    """Переводит строки SerialMux в сигналы Qt: показания с номером и меткой времени, остальные записи прошивки и статистику.
+    Первым аргументом каждого сигнала идет имя контроллера (порт)."""
+    data_received = pyqtSignal(str, dict)
+    message_received = pyqtSignal(str, object)
+    stats_signal = pyqtSignal(str, dict)
+    port_lost = pyqtSignal(str, str)
+    def __init__(self, serial_mux):
         super().__init__()
+        self.serial_mux = serial_mux
+        self.name = serial_mux.name
+        self.seq = 0
+        serial_mux.subscribe(self.handle_line)
+        serial_mux.subscribe_stats(self.handle_stats)
+        serial_mux.subscribe_lost(self.handle_lost)
+    def handle_line(self, line, record, received_at):
+        if record is None:
+            return
+        if type(record) is SensorReading:
+            data = reading_to_dict(record)
+            self.seq += 1
+            data['seq'] = self.seq
+            data['received_at'] = received_at
+            READ_TO_EMIT.observe(time.monotonic() - received_at)
+            self.data_received.emit(self.name, data)
+        else:
+            READ_TO_EMIT.observe(time.monotonic() - received_at)
+            self.message_received.emit(self.name, record)
+    def handle_stats(self, stats):
+        self.stats_signal.emit(self.name, stats)
+    def handle_lost(self, error):
+        self.port_lost.emit(self.name, str(error))
+    def stop(self):
+        self.serial_mux.unsubscribe(self.handle_line)
+        self.serial_mux.unsubscribe_stats(self.handle_stats)
+class ControllerSession:
+    """Один подключенный контроллер: порт, его поток, читатель и последние значения.
+    Графиков у сессии нет: интерфейс рисует только выбранный контроллер, остальное лежит в базе показаний."""
+    def __init__(self, name, serial_port, serial_mux, reader):
+        self.name = name
         self.serial_port = serial_port
-        self.running = True
+        self.serial_mux = serial_mux
+        self.reader = reader
+        self.last_temp = None
+        self.last_hum = None
+        self.last_soil = None
+        self.device_states = {}
+        self.dht_fault = False
+        self.controller_time = None
+        self.stats = None
+    def close(self):
+        self.reader.stop()
+        self.serial_mux.close()
+        if self.serial_port.is_open:
+            self.serial_port.close()
+class PortDiscoveryThread(QThread):
+    """Параллельно опрашивает порты и сообщает о каждом ответившем контроллере, не блокируя интерфейс"""
+    progress_signal = pyqtSignal(str)
+    port_found = pyqtSignal(object)
+    finished_signal = pyqtSignal(int)
+    def __init__(self, ports=None, skip=()):
+        super().__init__()
+        self.ports = ports
+        self.skip = set(skip)
+        self.found = 0
     def run(self):
-        buffer = ""
-        while self.running:
-            try:
-                if self.serial_port.in_waiting:
-                    line = self.serial_port.readline().decode('utf-8', errors='replace').strip()
-                    data = {}
-                    if "Humidity" in line and "Temperature" in line:
-                        try:
-                            parts = line.split("Temperature:")
-                            humidity_part = parts[0].strip()
-                            temperature_part = parts[1].strip()
-                            hum_value = humidity_part.split(":")[1].replace("%", "").strip()
-                            data['humidity'] = float(hum_value)
-                            temp_value = temperature_part.replace("°C", "").strip()
-                            data['temperature'] = float(temp_value)
-                        except Exception as e:
-                            print(f"DEBUG: Ошибка при разборе строки с температурой и влажностью: {e}, строка: {line}")
-                    elif "Temperature" in line and "Humidity" not in line:
-                        try:
-                            temp_str = line.split(":")[1].replace("C", "").replace("°", "").strip()
-                            data['temperature'] = float(temp_str)
-                        except Exception as e:
-                            print(f"DEBUG: Ошибка при разборе температуры: {e}, строка: {line}")
-                    elif "Humidity" in line and "Soil" not in line and "Temperature" not in line:
-                        try:
-                            hum_str = line.split(":")[1].replace("%", "").strip()
-                            data['humidity'] = float(hum_str)
-                        except Exception as e:
-                            print(f"DEBUG: Ошибка при разборе влажности: {e}, строка: {line}")
-                    elif "Soil moisture" in line:
-                        try:
-                            soil_str = line.split(":")[1].replace("%", "").strip()
-                            data['soil'] = float(soil_str)
-                        except Exception as e:
-                            print(f"DEBUG: Ошибка при разборе влажности почвы: {e}, строка: {line}")
-                    if data:
-                        self.data_received.emit(data)
-                self.msleep(200)
-            except Exception as e:
-                self.msleep(500)
-    def stop(self):
-        self.running = False
-        self.wait()
-class PlantPhotoThread(QThread):
-    photo_taken_signal = pyqtSignal(np.ndarray, np.ndarray, dict)  
+        started = time.monotonic()
+        try:
+            ports = self.ports if self.ports is not None else list_candidate_ports()
+        except Exception as e:
+            self.progress_signal.emit(f"❌ Не удалось получить список портов: {e}")
+            ports = []
+        ports = [p for p in ports if p not in self.skip]
+        if ports:
+            self.progress_signal.emit(f"🔍 Опрос портов: {', '.join(ports)}")
+            discover(ports, on_result=self.handle_result)
+        else:
+            self.progress_signal.emit("⚠️ Последовательные порты не найдены")
+        self.progress_signal.emit(f"Поиск завершен за {time.monotonic() - started:.1f} с, найдено контроллеров: {self.found}")
+        self.finished_signal.emit(self.found)
+    def handle_result(self, result):
+        if result.serial_port is None:
+            self.progress_signal.emit(f"— {result.device}: {result.error}")
+            return
+        self.found += 1
+        self.progress_signal.emit(f"✅ {result.device}: контроллер ответил за {result.elapsed:.1f} с")
+        self.port_found.emit(result)
+def display_images(cv2, frame, contours, size):
+    """Кадр BGR, уменьшенный до size с сохранением пропорций, в RGB: (исходный, с контурами растения).
+    Преобразование цвета одно на кадр и уже на уменьшенном изображении, контуры рисуются в его масштабе."""
+    height, width = frame.shape[:2]
+    scale = min(size[0] / width, size[1] / height)
+    target = (max(int(width * scale), 1), max(int(height * scale), 1))
+    rgb = cv2.cvtColor(cv2.resize(frame, target, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2RGB)
+    overlay = rgb.copy()
+    if contours:
+        cv2.drawContours(overlay, [(contour * scale).astype('int32') for contour in contours], -1, (0, 255, 0), 2)
+    return rgb, overlay
+def take_plant_photo(camera_index, camera, writer, log, fast=True, tolerance=2.0, scene_threshold=0.25,
+                     display_size=(640, 480)):
+    """Снимок и анализ в потоке очереди снимков. Возвращает (исходный, с контурами, анализ), где изображения -
+    готовые к показу RGB-кадры размера display_size; полноразмерные кадры в интерфейс не уходят."""
+    import cv2
+    from plant_analysis import PlantAnalyzer
+    result = PlantAnalyzer(camera_index, log, None, camera, fast, tolerance, writer, scene_threshold).run()
+    if result is None:
+        return None
+    original, overlay = display_images(cv2, result[0], result[1], display_size)
+    return original, overlay, result[2]
+class CameraPreviewThread(QThread):
+    """Живой просмотр камеры.
+
+    Кадры берутся у CameraService не чаще fps раз в секунду, уменьшаются до размера окна просмотра
+    и отдаются интерфейсу по правилу "побеждает последний": пока интерфейс не забрал кадр, новый
+    просто заменяет старый, и очередь сигналов не растет. Контуры растения считаются в отдельном
+    потоке не чаще analysis_rate раз в секунду и рисуются поверх каждого кадра.
+    """
+    frame_ready = pyqtSignal()
     log_signal = pyqtSignal(str)
-    def __init__(self, camera_index=0):
+    def __init__(self, camera, camera_index=0, analysis_rate=1.0, fast=True, tolerance=2.0, fps=15):
         super().__init__()
+        self.camera = camera
         self.camera_index = camera_index
-        self.original_image = None
-        self.detection_image = None
-        self.color_percentages = {}
-        self.detected_diseases = []
-        self.detected_pests = []
+        self.analysis_rate = analysis_rate
+        self.fast = fast
+        self.tolerance = tolerance
+        self.fps = fps
+        self.display_size = (640, 480)
+        self.lock = threading.Lock()
+        self.latest = None
+        self.notified = False
+        self.analysis_frame = None
+        self.contours = []
+        self.running = False
+        self.analysis_wakeup = threading.Event()
     def run(self):
-        try:
-            self.log_signal.emit("📸 Делаем фото с камеры...")
-            frame = self.take_photo()
+        import cv2
+        self.running = True
+        analysis = threading.Thread(target=self.analyze_loop, name="PreviewAnalysis", daemon=True)
+        analysis.start()
+        seq = self.camera.frame_seq
+        while self.running:
+            started = time.monotonic()
+            seq, frame = self.camera.next_frame(seq, 1.0)
             if frame is None:
-                self.log_signal.emit("❌ Не удалось получить изображение с камеры")
-                return
-            self.original_image = frame.copy()
-            height, width = frame.shape[:2]
-            self.log_signal.emit("🔍 Анализируем изображение растения...")
-            self.detect_plant(height, width)
-            analysis = self.analyze_health()
-            report_text = f"АНАЛИЗ СОСТОЯНИЯ РАСТЕНИЯ\nДата анализа: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\nСОСТОЯНИЕ: {analysis['состояние']}\n\nРАСПРЕДЕЛЕНИЕ ЦВЕТОВ:\n{analysis['распределение цветов']}\n\nДЕТАЛИ АНАЛИЗА:\n{analysis['детали']}\n\nРЕКОМЕНДАЦИИ:\n{analysis['рекомендации']}\n"
-            if SAVE_LOCAL:
-                self.save_photo_locally(report_text)
-                self.log_signal.emit("✅ Фото сохранено локально")
-            self.photo_taken_signal.emit(self.original_image, self.detection_image, analysis)
-        except Exception as e:
-            self.log_signal.emit(f"❌ Ошибка при выполнении фотографирования: {str(e)}")
-    def take_photo(self):
-        """Сделать фото с камеры"""
-        try:
-            cap = cv2.VideoCapture(self.camera_index)
-            if not cap.isOpened():
-                self.log_signal.emit("❌ Ошибка подключения камеры")
-                return None
-            ret, frame = cap.read()
-            cap.release()
-            if not ret:
-                self.log_signal.emit("❌ Ошибка получения изображения с камеры")
-                return None
-            return frame
-        except Exception as e:
-            self.log_signal.emit(f"❌ Ошибка при фотографировании: {str(e)}")
-            return None
-    def detect_plant(self, height, width):
-        """Обнаружение растения на изображении"""
-        LEAF_COLORS = {
-            "healthy_green": {"lower": np.array([35, 30, 30]), "upper": np.array([85, 255, 255]), "name": "здоровый зеленый"},
-            "yellow": {"lower": np.array([20, 30, 30]), "upper": np.array([35, 255, 255]), "name": "желтый"},
-            "brown": {"lower": np.array([10, 30, 10]), "upper": np.array([20, 255, 255]), "name": "коричневый"},
-            "light_green": {"lower": np.array([35, 30, 30]), "upper": np.array([85, 100, 255]), "name": "светло-зеленый"}
-        }
-        try:
-            self.height = height
-            self.width = width
-            hsv = cv2.cvtColor(self.original_image, cv2.COLOR_BGR2HSV)
-            self.detection_image = self.original_image.copy()
-            total_mask = np.zeros((self.height, self.width), dtype=np.uint8)
-            for color_name, color_range in LEAF_COLORS.items():
-                mask = cv2.inRange(hsv, color_range["lower"], color_range["upper"])
-                kernel = np.ones((3,3), np.uint8)
-                mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
-                mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
-                total_mask = cv2.bitwise_or(total_mask, mask)
-            contours, _ = cv2.findContours(total_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            filtered_contours = []
-            for contour in contours:
-                if cv2.contourArea(contour) > 100:
-                    filtered_contours.append(contour)
-            cv2.drawContours(self.detection_image, filtered_contours, -1, (0, 255, 0), 2)
-            self.plant_mask = np.zeros_like(total_mask)
-            cv2.drawContours(self.plant_mask, filtered_contours, -1, 255, -1)
-            plant_pixels = np.count_nonzero(self.plant_mask)
-            if plant_pixels > 0:
-                for color_name, color_range in LEAF_COLORS.items():
-                    mask = cv2.inRange(hsv, color_range["lower"], color_range["upper"])
-                    color_pixels = cv2.countNonZero(cv2.bitwise_and(mask, self.plant_mask))
-                    self.color_percentages[color_name] = (color_pixels / plant_pixels) * 100
-        except Exception as e:
-            self.log_signal.emit(f"❌ Ошибка при обнаружении растения: {str(e)}")
-    def analyze_health(self):
-        """Анализ здоровья растения"""
-        DISEASES_DB = {
-            "yellow_leaves": {"name": "Хлороз", "description": "Пожелтение листьев", "causes": ["Недостаток железа", "Переувлажнение", "Недостаток азота"], "solutions": ["Добавить железосодержащие удобрения", "Уменьшить полив", "Внести азотные удобрения"]},
-            "brown_spots": {"name": "Грибковое заболевание", "description": "Коричневые пятна на листьях", "causes": ["Грибковая инфекция", "Избыточная влажность", "Плохая вентиляция"], "solutions": ["Обработать фунгицидами", "Улучшить вентиляцию", "Удалить пораженные листья"]}
-        }
-        PESTS_DB = {
-            "aphids": {"name": "Тля", "description": "Мелкие насекомые на листьях и стеблях", "damage": "Высасывают сок из растения, вызывают деформацию листьев", "solutions": ["Обработать инсектицидами", "Использовать мыльный раствор", "Привлечь естественных хищников"]},
-            "thrips": {"name": "Трипсы", "description": "Мелкие удлиненные насекомые", "damage": "Повреждают листья и цветы, переносят вирусы", "solutions": ["Обработать инсектицидами", "Использовать синие липкие ловушки", "Удалять сорняки"]}
-        }
-        try:
-            self.detected_diseases = []
-            self.detected_pests = []
-            if self.color_percentages.get("yellow", 0) > 10:
-                self.detected_diseases.append(DISEASES_DB["yellow_leaves"])
-            if self.color_percentages.get("brown", 0) > 5:
-                self.detected_diseases.append(DISEASES_DB["brown_spots"])
-            if self.color_percentages.get("brown", 0) > 5:
-                if self.color_percentages.get("yellow", 0) > 15:
-                    self.detected_pests.append(PESTS_DB["aphids"])
-                elif self.color_percentages.get("brown", 0) > 10:
-                    self.detected_pests.append(PESTS_DB["thrips"])
-            status = "нормальное"
-            details = []
-            recommendations = []
-            if self.color_percentages.get("yellow", 0) > 10:
-                status = "требует внимания"
-                details.append("Обнаружено значительное пожелтение листьев")
-                recommendations.append("Проверьте режим полива")
-                recommendations.append("Проверьте уровень освещенности")
-            if self.color_percentages.get("brown", 0) > 5:
-                status = "требует внимания"
-                details.append("Обнаружены коричневые участки на листьях")
-                recommendations.append("Проверьте на наличие заболеваний")
-                recommendations.append("Удалите поврежденные листья")
-            for disease in self.detected_diseases:
-                details.append(f"{disease['name']}: {disease['description']}")
-                recommendations.extend(disease['solutions'])
-            for pest in self.detected_pests:
-                details.append(f"{pest['name']}: {pest['description']}")
-                recommendations.extend(pest['solutions'])
-            if not details:
-                recommendations.append("Поддерживайте текущий режим ухода")
-            LEAF_COLORS = {
-                "healthy_green": {"name": "здоровый зеленый"},
-                "yellow": {"name": "желтый"},
-                "brown": {"name": "коричневый"},
-                "light_green": {"name": "светло-зеленый"}
-            }
-            return {
-                "состояние": status,
-                "распределение цветов": "; ".join([f"{LEAF_COLORS[k]['name']}: {v:.1f}%" for k, v in self.color_percentages.items() if v > 1]),
-                "детали": "; ".join(details) if details else "отклонений не выявлено",
-                "рекомендации": "; ".join(recommendations)
-            }
-        except Exception as e:
-            self.log_signal.emit(f"❌ Ошибка при анализе здоровья растения: {str(e)}")
-            return {
-                "состояние": "ошибка анализа",
-                "распределение цветов": "",
-                "детали": f"Ошибка при анализе: {str(e)}",
-                "рекомендации": "Попробуйте повторить анализ"
-            }
-    def save_photo_locally(self, text="Анализ состояния растений"):
-        """Сохранить фото локально"""
-        if self.original_image is None or self.detection_image is None:
-            self.log_signal.emit("❌ Нет изображений для сохранения")
-            return False
-        try:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            orig_filename = os.path.join(LOCAL_PATH, f"greenhouse_photo_{timestamp}.jpg")
-            analysis_filename = os.path.join(LOCAL_PATH, f"greenhouse_analysis_{timestamp}.jpg")
-            report_filename = os.path.join(LOCAL_PATH, f"greenhouse_report_{timestamp}.txt")
-            cv2.imwrite(orig_filename, self.original_image)
-            cv2.imwrite(analysis_filename, self.detection_image)
-            with open(report_filename, 'w', encoding='utf-8') as f:
-                f.write(text)
-            return True
-        except Exception as e:
-            self.log_signal.emit(f"❌ Ошибка при сохранении файлов: {str(e)}")
-            return False
+                continue
+            with self.lock:
+                self.analysis_frame = frame
+            self.publish(cv2, frame)
+            delay = 1.0 / self.fps - (time.monotonic() - started)
+            if delay > 0:
+                time.sleep(delay)
+        analysis.join()
+    def publish(self, cv2, frame):
+        with self.lock:
+            contours = self.contours
+        rgb, overlay = display_images(cv2, frame, contours, self.display_size)
+        with self.lock:
+            self.latest = (rgb, overlay)
+            notify = not self.notified
+            self.notified = True
+        if notify:
+            self.frame_ready.emit()
+    def take_frame(self):
+        """Вызывается интерфейсом: последний готовый кадр (исходный, с контурами) в RGB или None"""
+        with self.lock:
+            latest, self.latest = self.latest, None
+            self.notified = False
+        return latest
+    def analyze_loop(self):
+        from plant_analysis import PlantAnalyzer
+        while self.running:
+            started = time.monotonic()
+            with self.lock:
+                frame, self.analysis_frame = self.analysis_frame, None
+            if frame is not None:
+                analyzer = PlantAnalyzer(self.camera_index, self.log_signal.emit, fast=self.fast, tolerance=self.tolerance)
+                analyzer.original_image = frame
+                analyzer.detect_plant(*frame.shape[:2])
+                with self.lock:
+                    self.contours = analyzer.plant_contours
+            self.analysis_wakeup.wait(max(1.0 / self.analysis_rate - (time.monotonic() - started), 0.05))
+    def stop(self):
+        self.running = False
+        self.analysis_wakeup.set()
 class GraphWidget(QWidget):
-    def __init__(self, title, color, label="", y_min=None, y_max=None, parent=None):
+    def __init__(self, title, color, label="", y_min=None, y_max=None, parent=None, max_fps=2,
+                 capacity=200000, window_seconds=3600):
         super().__init__(parent)
         self.figure = Figure(figsize=(6, 5), dpi=100)
         self.canvas = FigureCanvas(self.figure)
@@ -260,7 +264,8 @@ class GraphWidget(QWidget):
         self.ax.spines['right'].set_color('#555555')
         self.ax.spines['left'].set_color('#555555')
         self.ax.set_title(title, color='#ffffff', fontsize=14, fontweight='bold', pad=15)
-        self.ax.tick_params(axis='x', colors='#aaaaaa', labelsize=9)
+        self.ax.xaxis_date()
+        self.ax.tick_params(axis='x', colors='#aaaaaa', labelsize=9, labelrotation=45)
         self.ax.tick_params(axis='y', colors='#aaaaaa', labelsize=9)
         self.line_color = color
         self.label = label
@@ -270,40 +275,98 @@ class GraphWidget(QWidget):
             self.ax.set_ylim(y_min, y_max)
         if label:
             self.ax.set_ylabel(label, color='#aaaaaa', fontsize=10)
+        self.line, = self.ax.plot([], [], color=color, linewidth=2, marker='o', markersize=4,
+                                  markerfacecolor=color, animated=True)
+        self.background = None
+        self.limits_changed = True
+        self.pending = False
+        self.canvas.mpl_connect('draw_event', self.on_draw)
+        self.redraw_timer = QTimer(self)
+        self.redraw_timer.setSingleShot(True)
+        self.redraw_timer.setInterval(int(1000 / max_fps))
+        self.redraw_timer.timeout.connect(self.render)
         layout = QVBoxLayout()
         layout.addWidget(self.canvas)
         layout.setContentsMargins(0, 0, 0, 0)
         self.setLayout(layout)
-        self.data = []
-        self.times = []
-        self.max_points = 60
-    def update_data(self, value):
-        current_time = datetime.now()
-        self.data.append(value)
-        self.times.append(current_time)
-        if len(self.data) > self.max_points:
-            self.data.pop(0)
-            self.times.pop(0)
-        self.ax.clear()
-        self.ax.plot(self.times, self.data, color=self.line_color, linewidth=2, 
-                    marker='o', markersize=4, markerfacecolor=self.line_color)
-        self.ax.set_facecolor('#2c2c2c')
-        self.ax.grid(True, color='#444444', linestyle='--', linewidth=0.5)
-        self.ax.spines['bottom'].set_color('#555555')
-        self.ax.spines['top'].set_color('#555555') 
-        self.ax.spines['right'].set_color('#555555')
-        self.ax.spines['left'].set_color('#555555')
-        if self.label:
-            self.ax.set_title(self.ax.get_title(), color='#ffffff', fontsize=14, fontweight='bold', pad=15)
-            self.ax.set_ylabel(self.label, color='#aaaaaa', fontsize=10)
-        if self.y_min is not None and self.y_max is not None:
-            self.ax.set_ylim(self.y_min, self.y_max)
-        self.ax.tick_params(axis='x', colors='#aaaaaa', labelsize=9)
-        self.ax.tick_params(axis='y', colors='#aaaaaa', labelsize=9)
-        self.figure.autofmt_xdate(rotation=45)
-        self.figure.tight_layout(pad=3.0)
-        self.canvas.draw()
+        self.buffer = RingBuffer(capacity)
+        self.window_seconds = window_seconds
+    def update_data(self, value, ts=None):
+        """Добавляет точку; перерисовка откладывается и выполняется не чаще max_fps раз в секунду"""
+        self.buffer.append(time.time() if ts is None else ts, value)
+        self.schedule_render()
+    def load_history(self, times, values):
+        """Заполняет буфер сохраненной историей (время в секундах Unix)"""
+        self.buffer.extend(times, values)
+        self.limits_changed = True
+        self.schedule_render()
+    def clear(self):
+        """Убирает все точки, например при переключении на другой контроллер"""
+        self.buffer.clear()
+        self.line.set_data([], [])
+        self.limits_changed = True
+        self.canvas.draw_idle()
+    def set_window(self, seconds):
+        self.window_seconds = seconds
+        self.limits_changed = True
+        self.schedule_render()
+    def schedule_render(self):
+        if not self.redraw_timer.isActive():
+            self.redraw_timer.start()
+    def render(self):
+        """Рисует окно истории, прореженное до ширины холста: blit линии или полная перерисовка при смене осей"""
+        if not len(self.buffer):
+            return
+        if not self.isVisible():
+            self.pending = True
+            return
+        self.pending = False
+        started = time.perf_counter()
+        now = time.time()
+        times, values = self.buffer.since(now - self.window_seconds)
+        times, values = minmax_downsample(times, values, max(self.canvas.width() // 2, 1))
+        offset = mdates.date2num(datetime.fromtimestamp(now)) - now / 86400.0
+        self.line.set_data(times / 86400.0 + offset, values)
+        self.line.set_marker('o' if len(times) <= 120 else '')
+        self.update_limits(now / 86400.0 + offset, values)
+        if self.limits_changed or self.background is None:
+            self.limits_changed = False
+            self.figure.tight_layout(pad=3.0)
+            self.canvas.draw()
+            GRAPH_RENDER["full"].observe(time.perf_counter() - started)
+            return
+        self.canvas.restore_region(self.background)
+        self.ax.draw_artist(self.line)
+        self.canvas.blit(self.ax.bbox)
+        GRAPH_RENDER["blit"].observe(time.perf_counter() - started)
+    def update_limits(self, now, values):
+        """Сдвигает ось времени скачком на 5% окна, чтобы полная перерисовка была редкой"""
+        window = self.window_seconds / 86400.0
+        left, right = self.ax.get_xlim()
+        if now > right or abs((right - left) - window * 1.05) > 1e-9:
+            self.ax.set_xlim(now - window, now + window * 0.05)
+            self.limits_changed = True
+        if (self.y_min is None or self.y_max is None) and len(values):
+            low, high = self.ax.get_ylim()
+            data_min, data_max = values.min(), values.max()
+            if data_min < low or data_max > high:
+                pad = max((data_max - data_min) * 0.1, 1.0)
+                self.ax.set_ylim(data_min - pad, data_max + pad)
+                self.limits_changed = True
+    def on_draw(self, event):
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.ax.draw_artist(self.line)
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.pending:
+            self.redraw_timer.start()
 class MainWindow(QMainWindow):
+    config_push_finished = pyqtSignal(bool, str)
+    time_sync_finished = pyqtSignal(bool, str)
+    log_signal = pyqtSignal(str)
+    growth_signal = pyqtSignal(object)
+    scheduled_photo_signal = pyqtSignal()
+    photo_taken_signal = pyqtSignal(object, object, dict)
     def __init__(self):
         super().__init__()
         self.setWindowTitle('ФитоДомик')
@@ -330,20 +393,44 @@ class MainWindow(QMainWindow):
             QDialog { background-color: #181818; }
             QFormLayout { color: #fff; }
         """)
-        self.serial_port = None
-        self.arduino_thread = None
-        self.photo_thread = None
-        self.last_temp = 0
-        self.last_hum = 0
-        self.last_soil = 0
-        self.camera_index = CAMERA_INDEX
-        self.photo_mode = "Раз в день"
-        self.photo_time1 = "13:00"
-        self.photo_time2 = "16:00"
-        self.photo_thread_active = False
-        self.next_photo_time = 0
+        self.events = EventLog(os.path.join(LOG_DIR, EVENTS_FILE), capacity=LOG_LINES)
+        self.log_seq = 0
+        self.settings = Settings(CONFIG_FILE, log=self.events.logger("настройки"))
+        self.settings.load()
+        self.controllers = {}
+        self.current_device = None
+        self.pending_wizards = []
+        self.wizard_open = False
+        self.discovery_thread = None
+        self.discovery_quiet = False
+        self.lost_ports = set()
+        self.config_push_finished.connect(self.handle_config_push_finished)
+        self.time_sync_finished.connect(self.handle_time_sync_finished)
+        self.sensor_store = SensorStore(READINGS_DB_FILE, log=self.events.logger("база показаний"))
+        try:
+            self.sensor_store.start()
+        except Exception as e:
+            self.log(f"❌ Ошибка открытия базы показаний: {e}", component="база показаний")
+            self.sensor_store = None
+        self.preview_thread = None
+        self.photo_scheduler = None
+        self.metrics_server = None
         self.setup_ui()
-        self.load_settings()
+        self.log_signal.connect(self.log)
+        self.camera_service = CameraService(self.settings.camera_index, log=self.events.logger("камера"))
+        self.analysis_catalog = AnalysisCatalog(os.path.join(LOCAL_PATH, CATALOG_FILE))
+        self.photo_writer = PhotoWriter(LOCAL_PATH, self.settings.photo_codec, self.settings.photo_quality,
+                                        log=self.events.logger("запись фото"),
+                                        catalog=self.analysis_catalog, on_cataloged=self.growth_signal.emit)
+        self.growth_signal.connect(self.update_growth_label)
+        self.scheduled_photo_signal.connect(self.take_scheduled_photo)
+        self.photo_taken_signal.connect(self.handle_photo_taken)
+        self.capture_queue = CaptureQueue(self.run_capture, log=self.events.logger("снимки"),
+                                          device=lambda camera_index: self.camera_service)
+        self.settings.subscribe(self.apply_settings)
+        self.register_gauges()
+        self.start_metrics_server()
+        self.load_growth_trend()
         QTimer.singleShot(1000, self.auto_connect_arduino)
     def setup_ui(self):
         tabs = QTabWidget()
@@ -351,6 +438,13 @@ class MainWindow(QMainWindow):
         monitor_tab = QWidget()
         monitor_layout = QVBoxLayout(monitor_tab)
         monitor_layout.setSpacing(15)
+        controller_layout = QHBoxLayout()
+        controller_layout.addWidget(QLabel("Контроллер:"))
+        self.controller_combo = QComboBox()
+        self.controller_combo.currentTextChanged.connect(self.select_controller)
+        controller_layout.addWidget(self.controller_combo)
+        controller_layout.addStretch(1)
+        monitor_layout.addLayout(controller_layout)
         cards = QHBoxLayout()
         self.temp_card = self.create_card('🌡️ Температура', '-- °C', '#ff5555')
         self.hum_card = self.create_card('💧 Влажность', '-- %', '#5555ff')
@@ -359,6 +453,30 @@ class MainWindow(QMainWindow):
         cards.addWidget(self.hum_card)
         cards.addWidget(self.soil_card)
         monitor_layout.addLayout(cards)
+        self.controllers_table = QTableWidget(0, 5)
+        self.controllers_table.setHorizontalHeaderLabels(['Контроллер', 'Температура', 'Влажность', 'Почва', 'Устройства'])
+        self.controllers_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.controllers_table.horizontalHeader().setStretchLastSection(True)
+        self.controllers_table.verticalHeader().setVisible(False)
+        self.controllers_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.controllers_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.controllers_table.setMaximumHeight(160)
+        self.controllers_table.setStyleSheet("QTableWidget { background-color: #232323; color: #fff; border: 1px solid #444; border-radius: 8px; font-size: 14px; } QHeaderView::section { background-color: #2c2c2c; color: #aaa; border: none; padding: 4px; }")
+        self.controllers_table.cellClicked.connect(self.handle_controller_row_clicked)
+        self.controllers_table.setVisible(False)
+        monitor_layout.addWidget(self.controllers_table)
+        self.devices_label = QLabel("Устройства: нет данных")
+        self.devices_label.setStyleSheet("font-size: 14px; color: #ccc;")
+        window_layout = QHBoxLayout()
+        window_layout.addWidget(self.devices_label)
+        window_layout.addStretch(1)
+        window_layout.addWidget(QLabel("Период графиков:"))
+        self.graph_window_combo = QComboBox()
+        for title, seconds in GRAPH_WINDOWS:
+            self.graph_window_combo.addItem(title, seconds)
+        self.graph_window_combo.currentIndexChanged.connect(self.change_graph_window)
+        window_layout.addWidget(self.graph_window_combo)
+        monitor_layout.addLayout(window_layout)
         temp_container = QGroupBox("Температура")
         temp_container.setStyleSheet("""
             QGroupBox {
@@ -460,6 +578,10 @@ class MainWindow(QMainWindow):
         self.analysis_text.setStyleSheet("font-size: 14px; background-color: #232323; color: white; border: 1px solid #444; border-radius: 8px;")
         self.analysis_text.setWordWrapMode(QTextOption.WrapMode.WordWrap)
         analysis_layout.addWidget(self.analysis_text)
+        self.growth_label = QLabel("Рост: нет снимков")
+        self.growth_label.setWordWrap(True)
+        self.growth_label.setStyleSheet("font-size: 14px; color: #aaa;")
+        analysis_layout.addWidget(self.growth_label)
         analysis_group.setLayout(analysis_layout)
         plant_layout.addWidget(analysis_group)
         photo_layout = QHBoxLayout()
@@ -481,8 +603,28 @@ class MainWindow(QMainWindow):
             }
         """)
         self.take_photo_btn.setMinimumHeight(50)
-        self.take_photo_btn.clicked.connect(self.analyze_plant)
+        self.take_photo_btn.clicked.connect(lambda: self.analyze_plant())
         photo_layout.addWidget(self.take_photo_btn)
+        self.preview_btn = QPushButton("ЖИВОЙ ПРОСМОТР")
+        self.preview_btn.setStyleSheet("""
+            QPushButton {
+                font-size: 16px;
+                font-weight: bold;
+                border-radius: 10px;
+                padding: 15px;
+                background-color: #1976D2;
+                color: white;
+            }
+            QPushButton:hover {
+                background-color: #1565C0;
+            }
+            QPushButton:pressed {
+                background-color: #0D47A1;
+            }
+        """)
+        self.preview_btn.setMinimumHeight(50)
+        self.preview_btn.clicked.connect(self.toggle_preview)
+        photo_layout.addWidget(self.preview_btn)
         plant_layout.addLayout(photo_layout)
         tabs.addTab(plant_tab, "Анализ растений")
         settings_tab = QWidget()
@@ -494,16 +636,70 @@ class MainWindow(QMainWindow):
         system_log_group = QGroupBox("Журнал")
         system_log_group.setStyleSheet("QGroupBox { font-size: 18px; font-weight: bold; }")
         system_log_layout = QVBoxLayout()
-        self.system_log_text = QTextEdit()
+        self.reader_stats_label = QLabel("Порт: нет данных")
+        self.reader_stats_label.setStyleSheet("font-size: 13px; color: #aaa;")
+        system_log_layout.addWidget(self.reader_stats_label)
+        log_filter_layout = QHBoxLayout()
+        self.log_level_combo = QComboBox()
+        self.log_level_combo.addItems([name for name, _ in LOG_LEVEL_FILTERS])
+        self.log_level_combo.setCurrentIndex(1)
+        self.log_level_combo.currentIndexChanged.connect(self.refilter_log)
+        log_filter_layout.addWidget(self.log_level_combo)
+        self.log_component_combo = QComboBox()
+        self.log_component_combo.addItem("Все компоненты")
+        self.log_component_combo.currentIndexChanged.connect(self.refilter_log)
+        log_filter_layout.addWidget(self.log_component_combo)
+        log_filter_layout.addStretch()
+        system_log_layout.addLayout(log_filter_layout)
+        self.system_log_text = QPlainTextEdit()
         self.system_log_text.setReadOnly(True)
+        self.system_log_text.setMaximumBlockCount(LOG_LINES)
         self.system_log_text.setStyleSheet("font-size: 14px; background-color: #232323; color: white; border: 1px solid #444; border-radius: 8px;")
         system_log_layout.addWidget(self.system_log_text)
         system_log_group.setLayout(system_log_layout)
         system_layout.addWidget(system_log_group)
         tabs.addTab(system_tab, "Журнал")
+        diagnostics_tab = QWidget()
+        diagnostics_layout = QVBoxLayout(diagnostics_tab)
+        metrics_layout = QHBoxLayout()
+        metrics_layout.addWidget(QLabel("Порт метрик Prometheus:"))
+        self.metrics_port_spin = QSpinBox()
+        self.metrics_port_spin.setRange(0, 65535)
+        self.metrics_port_spin.setSpecialValueText("выключен")
+        self.metrics_port_spin.setValue(self.settings.metrics_port)
+        self.metrics_port_spin.setKeyboardTracking(False)
+        self.metrics_port_spin.valueChanged.connect(lambda value: self.settings.set('metrics_port', value))
+        metrics_layout.addWidget(self.metrics_port_spin)
+        self.metrics_url_label = QLabel("")
+        self.metrics_url_label.setStyleSheet("font-size: 13px; color: #aaa;")
+        self.metrics_url_label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        metrics_layout.addWidget(self.metrics_url_label)
+        metrics_layout.addStretch(1)
+        diagnostics_layout.addLayout(metrics_layout)
+        self.diagnostics_table = QTableWidget(0, 6)
+        self.diagnostics_table.setHorizontalHeaderLabels(['Метрика', 'Число', 'Среднее', 'p50', 'p95', 'Максимум'])
+        self.diagnostics_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.diagnostics_table.horizontalHeader().setStretchLastSection(True)
+        self.diagnostics_table.verticalHeader().setVisible(False)
+        self.diagnostics_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.diagnostics_table.setStyleSheet("QTableWidget { background-color: #232323; color: #fff; border: 1px solid #444; border-radius: 8px; font-size: 14px; } QHeaderView::section { background-color: #2c2c2c; color: #aaa; border: none; padding: 4px; }")
+        diagnostics_layout.addWidget(self.diagnostics_table)
+        tabs.addTab(diagnostics_tab, "Диагностика")
         self.update_timer = QTimer()
         self.update_timer.timeout.connect(self.update_cards)
         self.update_timer.start(1000)
+        self.log_timer = QTimer()
+        self.log_timer.timeout.connect(self.flush_log)
+        self.log_timer.start(LOG_REFRESH_MS)
+        self.lag_probe_at = time.monotonic()
+        self.lag_timer = QTimer()
+        self.lag_timer.timeout.connect(self.probe_event_loop)
+        self.lag_timer.start(LAG_PROBE_MS)
+        self.diagnostics_timer = QTimer()
+        self.diagnostics_timer.timeout.connect(self.update_diagnostics)
+        self.diagnostics_timer.start(DIAGNOSTICS_REFRESH_MS)
+        self.reconnect_timer = QTimer()
+        self.reconnect_timer.timeout.connect(self.reconnect_lost_ports)
         self.load_photo_settings()
     def create_card(self, title, value, color):
         card = QFrame()
@@ -527,69 +723,317 @@ class MainWindow(QMainWindow):
         card.value_label = value_label
         return card
     def connect_arduino(self):
-        port = self.port_combo.currentText()
-        baud = 9600
-        interval_minutes = self.baud_spin.value()
+        """Подключается к выбранному порту; опрос идет в фоне, интерфейс не замирает"""
+        port = self.port_combo.currentText().strip()
+        if not port:
+            self.find_arduino()
+            return
+        self.start_port_discovery([port])
+    def find_arduino(self):
+        """Ищет еще не подключенные контроллеры на всех последовательных портах системы"""
+        self.start_port_discovery(None)
+    def start_port_discovery(self, ports, quiet=False):
+        """quiet - повторное подключение пропавшего контроллера: неудача пишется только в журнал"""
+        if self.discovery_thread is not None and self.discovery_thread.isRunning():
+            if not quiet:
+                self.log("⏳ Поиск контроллера уже выполняется")
+            return
+        self.discovery_quiet = quiet
+        if ports is not None:
+            for port in ports:
+                self.close_serial(port)
+        self.connect_btn.setEnabled(False)
+        self.find_btn.setEnabled(False)
+        self.discovery_thread = PortDiscoveryThread(ports, skip=self.controllers)
+        self.discovery_thread.progress_signal.connect(self.log)
+        self.discovery_thread.port_found.connect(self.handle_port_found)
+        self.discovery_thread.finished_signal.connect(self.handle_discovery_finished)
+        self.discovery_thread.start()
+    def handle_port_found(self, result):
+        if result.device in self.controllers:
+            result.serial_port.close()
+            self.log(f"ℹ️ {result.device}: контроллер уже подключен", component=result.device)
+            return
         try:
-            if self.serial_port and self.serial_port.is_open:
-                self.serial_port.close()
-            print(f"DEBUG: Соединение с Arduino на порту {port} со скоростью {baud}")
-            self.serial_port = serial.Serial(port, baud, timeout=1)
-            time.sleep(2)
-            self.serial_port.reset_input_buffer()
-            self.serial_port.write(b"PING\n")
-            time.sleep(0.5)
-            while self.serial_port.in_waiting:
-                response = self.serial_port.readline().decode('utf-8', errors='replace').strip()
-            self.arduino_thread = ArduinoReader(self.serial_port)
-            self.arduino_thread.data_received.connect(self.handle_arduino_data)
-            self.arduino_thread.start()
-            self.sync_time()
-            self.settings_interval_minutes = interval_minutes
-            self.show_message(f'✅ Подключено к {port}', True)
-            QTimer.singleShot(500, self.start_system_after_connect)
+            self.attach_serial(result.device, result.serial_port, result.initial_data)
         except Exception as e:
-            self.show_message(f'❌ Не удалось подключиться: {e}', False)
+            result.serial_port.close()
+            self.show_message(f'❌ Не удалось подключиться к {result.device}: {e}', False)
+    def handle_discovery_finished(self, found):
+        self.connect_btn.setEnabled(True)
+        self.find_btn.setEnabled(True)
+        if found or self.discovery_quiet:
+            return
+        if self.controllers:
+            self.log("Новых контроллеров не найдено")
+        else:
+            self.show_message('❌ Не удалось подключиться: контроллер не ответил ни на одном порту', False)
+    def attach_serial(self, port, serial_port, initial_data=b""):
+        """Запускает поток порта и читателя для уже открытого и ответившего контроллера"""
+        self.log(f"Соединение с Arduino на порту {port}", "DEBUG", port)
+        serial_mux = SerialMux(serial_port, port, initial_data, log=self.events.logger(port))
+        reader = ArduinoReader(serial_mux)
+        session = ControllerSession(port, serial_port, serial_mux, reader)
+        self.controllers[port] = session
+        if self.sensor_store is not None:
+            self.restore_last_readings(session)
+            serial_mux.subscribe(self.sensor_store.subscriber(port))
+        reader.data_received.connect(self.handle_arduino_data)
+        reader.message_received.connect(self.handle_controller_message)
+        reader.stats_signal.connect(self.handle_reader_stats)
+        reader.port_lost.connect(self.handle_port_lost)
+        self.lost_ports.discard(port)
+        serial_mux.start()
+        self.controller_combo.addItem(port)
+        if self.current_device is None:
+            self.controller_combo.setCurrentText(port)
+        self.sync_controller_time(session)
+        self.settings.set('port', port)
+        self.notify(f'✅ Подключено к {port}', True)
+        QTimer.singleShot(500, self.start_system_after_connect)
+        self.configure_controller(port)
+    def configure_controller(self, device):
+        """Отправляет контроллеру его сохраненный профиль; для нового контроллера открывает мастер настройки"""
+        profile = self.settings.controllers.get(device)
+        if profile is None:
+            self.queue_setup_wizard(device)
+            return
+        self.log(f"⚙️ {device}: отправка сохраненного профиля...", component=device)
+        channel = self.controllers[device].serial_mux.channel
+        threading.Thread(target=self.push_config, args=(device, channel, profile), daemon=True).start()
+    def refresh_ports(self):
+        """Перечитывает список последовательных портов, сохраняя выбранный"""
+        current = self.port_combo.currentText()
+        try:
+            ports = list_candidate_ports()
+        except Exception as e:
+            self.log(f"❌ Не удалось получить список портов: {e}")
+            ports = []
+        self.port_combo.clear()
+        self.port_combo.addItems(ports)
+        if current:
+            if self.port_combo.findText(current) < 0:
+                self.port_combo.addItem(current)
+            self.port_combo.setCurrentText(current)
     def start_system_after_connect(self):
         """Запуск системы автоматически после подключения к Arduino"""
-        if hasattr(self, 'photo_thread_active') and self.photo_thread_active:
+        if self.photo_scheduler is not None:
             return
         self.log("\n=== АВТОМАТИЧЕСКИЙ ЗАПУСК СИСТЕМЫ ===")
-        self.calculate_next_photo_time()
-        self.photo_thread_active = True
-        self.photo_thread_runner = threading.Thread(target=self.photo_thread_function, daemon=True)
-        self.photo_thread_runner.start()
+        self.start_photo_scheduler()
+        self.camera_service.start()
         self.log("✅ Система фотографирования активирована")
-        QTimer.singleShot(500, self.run_setup_wizard)
         self.log("✅ Система успешно запущена!")
-    def handle_arduino_data(self, data):
+    def restore_last_readings(self, session):
+        """Показывает последние сохраненные значения контроллера до прихода новых"""
+        try:
+            latest = self.sensor_store.latest(session.name)
+        except Exception as e:
+            self.log(f"❌ Ошибка чтения базы показаний: {e}", component="база показаний")
+            return
+        session.last_temp = latest.get('temperature', session.last_temp)
+        session.last_hum = latest.get('humidity', session.last_hum)
+        session.last_soil = latest.get('soil', session.last_soil)
+    def load_graph_history(self, device):
+        """Заполняет графики историей выбранного контроллера из базы показаний"""
+        for graph in (self.temp_graph, self.hum_graph, self.soil_graph):
+            graph.clear()
+        if self.sensor_store is None or device is None:
+            return
+        try:
+            start = time.time() - GRAPH_WINDOWS[-1][1]
+            for metric, graph in (('temperature', self.temp_graph), ('humidity', self.hum_graph), ('soil', self.soil_graph)):
+                rows = self.sensor_store.query(device, metric, start)
+                if rows:
+                    times, values = zip(*rows)
+                    graph.load_history(times, values)
+        except Exception as e:
+            self.log(f"❌ Ошибка чтения базы показаний: {e}", component="база показаний")
+    def select_controller(self, device):
+        """Переключает карточки, состояние устройств и графики на другой контроллер"""
+        device = device or None
+        if device == self.current_device:
+            return
+        self.current_device = device
+        self.load_graph_history(device)
+        self.update_devices_label()
+        self.update_cards()
+    def handle_controller_row_clicked(self, row, column):
+        item = self.controllers_table.item(row, 0)
+        if item is not None:
+            self.controller_combo.setCurrentText(item.text())
+    def current_controller(self):
+        return self.controllers.get(self.current_device)
+    def change_graph_window(self):
+        seconds = self.graph_window_combo.currentData()
+        for graph in (self.temp_graph, self.hum_graph, self.soil_graph):
+            graph.set_window(seconds)
+    def handle_arduino_data(self, device, data):
+        READ_TO_GUI.observe(time.monotonic() - data['received_at'])
+        session = self.controllers.get(device)
+        if session is None:
+            return
+        if session.dht_fault and 'temperature' in data:
+            session.dht_fault = False
+            self.log(f"✅ {device}: датчик DHT снова отвечает", component=device)
+            if device == self.current_device:
+                self.update_devices_label()
+        current = device == self.current_device
         if 'temperature' in data:
-            self.last_temp = data['temperature']
-            self.temp_graph.update_data(self.last_temp)
+            session.last_temp = data['temperature']
+            if current:
+                self.temp_graph.update_data(session.last_temp)
         if 'humidity' in data:
-            self.last_hum = data['humidity']
-            self.hum_graph.update_data(self.last_hum)
+            session.last_hum = data['humidity']
+            if current:
+                self.hum_graph.update_data(session.last_hum)
         if 'soil' in data:
-            self.last_soil = data['soil']
-            self.soil_graph.update_data(self.last_soil)
+            session.last_soil = data['soil']
+            if current:
+                self.soil_graph.update_data(session.last_soil)
+    def handle_controller_message(self, device, record):
+        """Обрабатывает состояния устройств, ошибки датчиков и время контроллера"""
+        session = self.controllers.get(device)
+        if session is None:
+            return
+        if type(record) is DeviceState:
+            if session.device_states.get(record.device) == record.on:
+                return
+            session.device_states[record.device] = record.on
+            if record.reason:
+                title, on_text, off_text = DEVICE_LABELS[record.device]
+                self.log(f"ℹ️ {device}: {title}: {on_text if record.on else off_text} ({record.reason})", component=device)
+        elif type(record) is SensorFault:
+            if session.dht_fault:
+                return
+            session.dht_fault = True
+            self.log(f"⚠️ {device}: не удалось прочитать датчик DHT", component=device)
+        elif type(record) is ControllerTime:
+            session.controller_time = record.time
+        else:
+            return
+        if device == self.current_device:
+            self.update_devices_label()
+    def describe_devices(self, session):
+        parts = []
+        for key, (title, on_text, off_text) in DEVICE_LABELS.items():
+            if key in session.device_states:
+                parts.append(f"{title}: {on_text if session.device_states[key] else off_text}")
+        if session.dht_fault:
+            parts.append("⚠️ DHT не отвечает")
+        return parts
+    def update_devices_label(self):
+        session = self.current_controller()
+        parts = [] if session is None else self.describe_devices(session)
+        if session is not None and session.controller_time is not None:
+            parts.append(f"Время контроллера: {session.controller_time.strftime('%H:%M:%S')}")
+        self.devices_label.setText(" | ".join(parts) if parts else "Устройства: нет данных")
+    def handle_reader_stats(self, device, stats):
+        session = self.controllers.get(device)
+        if session is not None:
+            session.stats = stats
+    def update_reader_stats_label(self):
+        stats = [s.stats for s in self.controllers.values() if s.stats is not None]
+        if not stats:
+            self.reader_stats_label.setText("Порт: нет данных")
+            return
+        self.reader_stats_label.setText(
+            f"Контроллеров: {len(self.controllers)}, "
+            f"порты: {sum(s['bytes_per_sec'] for s in stats):.0f} Б/с, {sum(s['lines_per_sec'] for s in stats):.1f} строк/с, "
+            f"показаний: {sum(s['readings'] for s in stats)}, ошибок разбора: {sum(s['parse_errors'] for s in stats)}"
+        )
     def update_cards(self):
-        self.temp_card.value_label.setText(f"{self.last_temp:.1f} °C")
-        self.hum_card.value_label.setText(f"{self.last_hum:.1f} %")
-        self.soil_card.value_label.setText(f"{self.last_soil:.1f} %")
+        """Раз в секунду обновляет карточки выбранного контроллера, сводную таблицу и статистику портов"""
+        session = self.current_controller()
+        for card, value, unit in (
+            (self.temp_card, None if session is None else session.last_temp, '°C'),
+            (self.hum_card, None if session is None else session.last_hum, '%'),
+            (self.soil_card, None if session is None else session.last_soil, '%')
+        ):
+            card.value_label.setText(f"{value:.1f} {unit}" if value is not None else f"-- {unit}")
+        self.update_controllers_table()
+        self.update_reader_stats_label()
+    def update_controllers_table(self):
+        self.controllers_table.setVisible(len(self.controllers) > 1)
+        if len(self.controllers) <= 1:
+            return
+        self.controllers_table.setRowCount(len(self.controllers))
+        for row, session in enumerate(self.controllers.values()):
+            cells = (
+                session.name,
+                '--' if session.last_temp is None else f"{session.last_temp:.1f} °C",
+                '--' if session.last_hum is None else f"{session.last_hum:.1f} %",
+                '--' if session.last_soil is None else f"{session.last_soil:.1f} %",
+                " | ".join(self.describe_devices(session))
+            )
+            for column, text in enumerate(cells):
+                item = self.controllers_table.item(row, column)
+                if item is None:
+                    self.controllers_table.setItem(row, column, QTableWidgetItem(text))
+                elif item.text() != text:
+                    item.setText(text)
+    def close_serial(self, device=None):
+        """Отключает контроллер (или все, если device не указан): читателя, поток порта и сам порт"""
+        devices = list(self.controllers) if device is None else [device]
+        for name in devices:
+            session = self.controllers.pop(name, None)
+            if session is None:
+                continue
+            session.close()
+            index = self.controller_combo.findText(name)
+            if index >= 0:
+                self.controller_combo.removeItem(index)
+        if self.current_device not in self.controllers:
+            self.select_controller(self.controller_combo.currentText())
+    def handle_port_lost(self, device, error):
+        """Контроллер перестал отвечать (например, отключен кабель): сессия закрывается, а порт
+        опрашивается заново каждые RECONNECT_MS, пока контроллер не ответит"""
+        if device not in self.controllers:
+            return
+        self.close_serial(device)
+        self.notify(f"❌ {device}: связь с контроллером потеряна ({error}), повторное подключение...", False)
+        self.lost_ports.add(device)
+        if not self.reconnect_timer.isActive():
+            self.reconnect_timer.start(RECONNECT_MS)
+    def reconnect_lost_ports(self):
+        self.lost_ports = {port for port in self.lost_ports if port not in self.controllers}
+        if not self.lost_ports:
+            self.reconnect_timer.stop()
+            return
+        self.start_port_discovery(sorted(self.lost_ports), quiet=True)
+    def disconnect_controller(self):
+        """Отключает выбранный контроллер"""
+        if self.current_device is None:
+            return
+        device = self.current_device
+        self.close_serial(device)
+        self.lost_ports.discard(device)
+        self.log(f"🔌 {device}: контроллер отключен", component=device)
     def send_command(self, cmd):
-        if self.serial_port and self.serial_port.is_open:
-            try:
-                self.serial_port.write(f"{cmd}\n".encode())
-            except Exception as e:
-                self.show_message(f'Ошибка отправки: {e}', False)
+        session = self.current_controller()
+        if session is not None:
+            session.serial_mux.write(f"{cmd}\n".encode())
     def sync_time(self):
-        if self.serial_port and self.serial_port.is_open:
-            now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            self.send_command(f'TIME:{now}')
-            time.sleep(0.5)
-            while self.serial_port.in_waiting:
-                response = self.serial_port.readline().decode('utf-8', errors='replace').strip()
-            self.show_message('🕒 Время синхронизировано', True)
+        """Синхронизирует время всех подключенных контроллеров"""
+        for session in list(self.controllers.values()):
+            self.sync_controller_time(session)
+    def sync_controller_time(self, session):
+        future = send_time(session.serial_mux.channel)
+        future.add_done_callback(lambda f, device=session.name: self.finish_time_sync(device, f))
+    def finish_time_sync(self, device, future):
+        """Вызывается из потока порта; результат передается в интерфейс сигналом"""
+        try:
+            future.result()
+            self.time_sync_finished.emit(True, f'🕒 {device}: время синхронизировано')
+        except CommandError as e:
+            self.time_sync_finished.emit(False, f'❌ {device}: время не синхронизировано: {e}')
+    def handle_time_sync_finished(self, ok, message):
+        self.notify(message, ok)
+    def notify(self, message, ok=True):
+        """Пишет в журнал; окно с сообщением показывается, только пока контроллер один, чтобы десятки ответов не засыпали экран"""
+        self.log(message)
+        if len(self.controllers) <= 1:
+            self.show_message(message, ok)
     def show_message(self, text, success=True):
         msg = QMessageBox(self)
         msg.setWindowTitle('Информация')
@@ -601,204 +1045,372 @@ class MainWindow(QMainWindow):
         """)
         msg.exec()
     def closeEvent(self, event):
-        if self.arduino_thread:
-            self.arduino_thread.stop()
-        if self.photo_thread:
-            if self.photo_thread.isRunning():
-                self.photo_thread.wait()
-        if self.serial_port and self.serial_port.is_open:
-            self.serial_port.close()
+        self.reconnect_timer.stop()
+        if self.discovery_thread is not None and self.discovery_thread.isRunning():
+            self.discovery_thread.wait()
+        self.close_serial()
+        self.stop_photo_scheduler()
+        self.stop_metrics_server()
+        self.settings.close()
+        self.capture_queue.close()
+        self.stop_preview()
+        self.camera_service.close()
+        self.photo_writer.close()
+        if self.sensor_store is not None:
+            self.sensor_store.close()
+        self.events.close()
         event.accept()
-    def run_setup_wizard(self):
+    def queue_setup_wizard(self, device):
+        """Мастера настройки для нескольких новых контроллеров открываются по очереди"""
+        if device not in self.pending_wizards:
+            self.pending_wizards.append(device)
+        if not self.wizard_open:
+            QTimer.singleShot(500, self.run_pending_wizards)
+    def run_pending_wizards(self):
+        if self.wizard_open:
+            return
+        self.wizard_open = True
+        try:
+            while self.pending_wizards:
+                device = self.pending_wizards.pop(0)
+                if device in self.controllers:
+                    self.run_setup_wizard(device)
+        finally:
+            self.wizard_open = False
+    def run_setup_wizard(self, device=None):
+        device = device or self.current_device
         dlg = SetupDialog(self)
+        if device:
+            dlg.setWindowTitle(f'настройка ФитоДомика: {device}')
+        profiles = self.settings.controllers
+        if device in profiles:
+            dlg.set_params(profiles[device])
         if dlg.exec():
+            session = self.controllers.get(device)
+            if session is None:
+                self.show_message('❌ Нет соединения с Arduino', False)
+                return
             params = dlg.get_params()
-            steps = [
-                (f'SET:TEMP:{params["temp"]}', 'TEMP_OK'),
-                (f'SET:TEMP_TOL:{params["temp_tol"]}', 'TEMP_TOL_OK'),
-                (f'SET:SOIL:{params["soil"]}', 'SOIL_OK'),
-                (f'SET:SOIL_TOL:{params["soil_tol"]}', 'SOIL_TOL_OK'),
-                (f'SET:CURT_OPEN:{params["curt_open"]}', 'CURT_OPEN_OK'),
-                (f'SET:CURT_CLOSE:{params["curt_close"]}', 'CURT_CLOSE_OK'),
-                (f'SET:LAMP_ON:{params["lamp_on"]}', 'LAMP_ON_OK'),
-                (f'SET:LAMP_OFF:{params["lamp_off"]}', 'LAMP_OFF_OK'),
-            ]
-            for cmd, reply in steps:
-                ok = self.send_and_confirm(cmd, reply, timeout=6)
-                if not ok:
-                    self.show_message(f'❌ Ошибка при отправке {cmd}. Проверьте соединение и попробуйте снова.', False)
-                    return
-                time.sleep(0.3)
-            self.show_message('✅ Все параметры успешно сохранены!', True)
-    def send_and_confirm(self, cmd, expected_reply, timeout=6):
-        if self.serial_port and self.serial_port.is_open:
-            self.serial_port.reset_input_buffer()
-            self.serial_port.write(f"{cmd}\n".encode())
-            t0 = time.time()
-            while time.time() - t0 < timeout:
-                if self.serial_port.in_waiting:
-                    line = self.serial_port.readline().decode('utf-8', errors='replace').strip()
-                    if expected_reply in line:
-                        return True
-            self.show_message(f'⚠️ Не получено подтверждение для {cmd} (ждали "{expected_reply}")', False)
-        return False
-    def analyze_plant(self):
-        """Фотографирует и анализирует растение"""
-        global CAMERA_INDEX
-        CAMERA_INDEX = self.camera_index_spin.value()
-        self.camera_index = CAMERA_INDEX
+            self.settings.set('controllers', dict(profiles, **{device: params}))
+            self.log(f"⚙️ {device}: отправка параметров контроллеру...", component=device)
+            threading.Thread(target=self.push_config, args=(device, session.serial_mux.channel, params), daemon=True).start()
+    def push_config(self, device, channel, params):
+        """Выполняется вне потока интерфейса; результат передается в интерфейс сигналом"""
+        try:
+            elapsed = send_config(channel, params)
+        except CommandError as e:
+            self.config_push_finished.emit(False, f'❌ {device}: {e}. Проверьте соединение и попробуйте снова.')
+            return
+        self.config_push_finished.emit(True, f'✅ {device}: все параметры успешно сохранены за {elapsed:.2f} с!')
+    def handle_config_push_finished(self, ok, message):
+        self.notify(message, ok)
+    def analyze_plant(self, source="кнопка"):
+        """Ставит снимок с анализом в очередь камеры; повторное нажатие до начала съемки объединяется с ним"""
         self.log("📸 Инициализация процесса фотографирования...")
-        self.save_settings()
-        self.photo_thread = PlantPhotoThread(self.camera_index)
-        self.photo_thread.photo_taken_signal.connect(self.handle_photo_taken)
-        self.photo_thread.log_signal.connect(self.log)
-        self.photo_thread.start()
+        settings = self.settings.snapshot()
+        params = {"fast": settings['fast_analysis'], "tolerance": settings['analysis_tolerance'],
+                  "scene_threshold": settings['scene_threshold'], "display_size": self.display_size()}
+        self.capture_queue.submit(settings['camera_index'], source, params, self.finish_capture)
+    def run_capture(self, job):
+        """Выполняется в потоке очереди снимков; с окном общается только сигналами и через журнал событий"""
+        return take_plant_photo(job.camera_index, self.camera_service, self.photo_writer if SAVE_LOCAL else None,
+                                self.events.logger("анализ"), **job.params)
+    def finish_capture(self, job):
+        if job.result is not None:
+            self.photo_taken_signal.emit(*job.result)
+        self.events.add(f"⏱ Снимок ({', '.join(job.sources)}): ожидание {job.wait_time():.1f} с, "
+                        f"съемка и анализ {job.run_time():.1f} с, в очереди {self.capture_queue.depth()}",
+                        component="снимки")
+    def set_analysis_mode(self, index):
+        self.settings.set('fast_analysis', index == 0)
+    def show_rgb(self, label, image):
+        """Показывает готовый RGB-кадр размера окна: QImage ссылается на буфер без копии и без масштабирования"""
+        height, width = image.shape[:2]
+        label.setPixmap(QPixmap.fromImage(QImage(image.data, width, height, image.strides[0], QImage.Format.Format_RGB888)))
     def handle_photo_taken(self, original_image, detection_image, analysis):
-        """Обрабатывает сигнал о сделанном фото и анализе"""
-        height, width, channel = original_image.shape
-        bytes_per_line = 3 * width
-        q_img_orig = QImage(original_image.data, width, height, bytes_per_line, QImage.Format.Format_RGB888).rgbSwapped()
-        pixmap_orig = QPixmap.fromImage(q_img_orig)
-        self.image_label_orig.setPixmap(pixmap_orig.scaled(
-            self.image_label_orig.width(), self.image_label_orig.height(), 
-            Qt.AspectRatioMode.KeepAspectRatio
-        ))
-        height, width, channel = detection_image.shape
-        bytes_per_line = 3 * width
-        q_img = QImage(detection_image.data, width, height, bytes_per_line, QImage.Format.Format_RGB888).rgbSwapped()
-        pixmap = QPixmap.fromImage(q_img)
-        self.image_label.setPixmap(pixmap.scaled(
-            self.image_label.width(), self.image_label.height(), 
-            Qt.AspectRatioMode.KeepAspectRatio
-        ))
+        """Обрабатывает сигнал о сделанном фото и анализе; изображения уже уменьшены до размера окна в потоке снимка"""
+        self.stop_preview()
+        self.show_rgb(self.image_label_orig, original_image)
+        self.show_rgb(self.image_label, detection_image)
         self.analysis_text.clear()
         self.analysis_text.append(f"СОСТОЯНИЕ: {analysis['состояние']} | ЦВЕТА: {analysis['распределение цветов']}")
         self.analysis_text.append(f"ДЕТАЛИ: {analysis['детали']}")
         self.analysis_text.append(f"РЕКОМЕНДАЦИИ: {analysis['рекомендации']}")
         self.log("✅ Анализ растения успешно завершен")
-    def test_camera(self):
-        """Тестирование камеры"""
-        global CAMERA_INDEX
-        CAMERA_INDEX = self.camera_index_spin.value()
-        self.camera_index = CAMERA_INDEX
+    def load_growth_trend(self):
+        """Тренд роста текущей камеры из каталога снимков"""
         try:
-            self.log("🔄 Тестирование камеры...")
-            self.photo_thread = PlantPhotoThread(self.camera_index)
-            self.photo_thread.log_signal.connect(self.log)
-            self.photo_thread.photo_taken_signal.connect(self.handle_photo_taken)
-            self.photo_thread.start()
-            self.save_settings()
-            self.show_message(f"✅ Камера с индексом {self.camera_index} успешно инициализирована", True)
+            self.update_growth_label(self.analysis_catalog.trend(self.settings.camera_index))
         except Exception as e:
-            self.log(f"❌ Ошибка при тестировании камеры: {str(e)}")
-            self.show_message(f"❌ Ошибка инициализации камеры: {str(e)}", False)
-    def log(self, message):
-        """Добавляет сообщение в журнал событий"""
-        timestamp = datetime.now().strftime("[%H:%M:%S]")
-        formatted_message = f"{timestamp} {message}"
-        if hasattr(self, 'system_log_text') and self.system_log_text is not None:
-            self.system_log_text.append(formatted_message)
-            self.system_log_text.verticalScrollBar().setValue(
-                self.system_log_text.verticalScrollBar().maximum()
-            )
-    def save_settings(self):
-        """Сохраняет настройки"""
-        global CAMERA_INDEX
+            self.log(f"❌ Ошибка чтения каталога снимков: {str(e)}")
+    def update_growth_label(self, trend):
+        if trend is None:
+            self.growth_label.setText("Рост: нет снимков")
+            return
+        self.growth_label.setText(trend.describe())
+    def test_camera(self):
+        """Проверка камеры: включает живой просмотр вместо полного снимка с анализом"""
+        self.stop_preview()
+        self.start_preview()
+        self.show_message(f"📷 Просмотр камеры {self.settings.camera_index} включен на вкладке \"Анализ растений\"", True)
+    def display_size(self):
+        return self.image_label_orig.width(), self.image_label_orig.height()
+    def toggle_preview(self):
+        if self.preview_thread is None:
+            self.start_preview()
+        else:
+            self.stop_preview()
+    def start_preview(self):
+        if self.preview_thread is not None:
+            return
+        settings = self.settings.snapshot()
+        self.preview_thread = CameraPreviewThread(self.camera_service, settings['camera_index'],
+                                                  settings['preview_analysis_rate'], settings['fast_analysis'],
+                                                  settings['analysis_tolerance'])
+        self.preview_thread.display_size = self.display_size()
+        self.preview_thread.frame_ready.connect(self.handle_preview_frame)
+        self.preview_thread.log_signal.connect(self.log)
+        self.preview_thread.start()
+        self.preview_btn.setText("ОСТАНОВИТЬ ПРОСМОТР")
+        self.log(f"📷 Живой просмотр камеры {settings['camera_index']}")
+    def stop_preview(self):
+        if self.preview_thread is None:
+            return
+        self.preview_thread.stop()
+        self.preview_thread.wait()
+        self.preview_thread = None
+        self.preview_btn.setText("ЖИВОЙ ПРОСМОТР")
+    def handle_preview_frame(self):
+        """Забирает последний кадр просмотра; кадры, которые интерфейс не успел показать, уже выброшены"""
+        if self.preview_thread is None:
+            return
+        self.preview_thread.display_size = self.display_size()
+        latest = self.preview_thread.take_frame()
+        if latest is None:
+            return
+        for label, image in zip((self.image_label_orig, self.image_label), latest):
+            self.show_rgb(label, image)
+    def set_photo_codec(self, index):
+        codec = list(DEFAULT_QUALITY)[index]
+        self.settings.update({'photo_codec': codec, 'photo_quality': DEFAULT_QUALITY[codec]})
+    def log(self, message, level=None, component="приложение"):
+        """Добавляет сообщение в журнал событий; на вкладку оно попадет при ближайшем flush_log"""
+        self.events.add(message, level, component)
+    def flush_log(self):
+        """Выводит пачкой записи, пришедшие с прошлого вызова; прокручивает вниз, только если журнал и так был внизу"""
+        if self.events.last_seq == self.log_seq:
+            return
+        records, self.log_seq = self.events.since(self.log_seq, *self.log_filter())
+        components = self.events.components()
+        if len(components) != self.log_component_combo.count() - 1:
+            self.update_log_components(components)
+        if not records:
+            return
+        scrollbar = self.system_log_text.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum() - 4
+        self.system_log_text.appendPlainText("\n".join(record.format() for record in records))
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
+    def log_filter(self):
+        component = self.log_component_combo.currentText() if self.log_component_combo.currentIndex() > 0 else None
+        return LOG_LEVEL_FILTERS[self.log_level_combo.currentIndex()][1], component
+    def update_log_components(self, components):
+        current = self.log_component_combo.currentText()
+        self.log_component_combo.blockSignals(True)
+        self.log_component_combo.clear()
+        self.log_component_combo.addItem("Все компоненты")
+        self.log_component_combo.addItems(components)
+        self.log_component_combo.setCurrentText(current)
+        self.log_component_combo.blockSignals(False)
+    def refilter_log(self):
+        """Заново заполняет вкладку из буфера журнала по новому фильтру"""
+        self.system_log_text.clear()
+        self.log_seq = 0
+        self.flush_log()
+    def probe_event_loop(self):
+        now = time.monotonic()
+        EVENT_LOOP_LAG.observe(max(now - self.lag_probe_at - LAG_PROBE_MS / 1000, 0.0))
+        self.lag_probe_at = now
+    def register_gauges(self):
+        """Текущие значения очереди снимков и журнала для диагностики и Prometheus"""
+        METRICS.gauge("fitodomik_capture_queue_depth", "Ожидающие и идущие снимки", self.capture_queue.depth)
+        for state in ("submitted", "coalesced", "completed", "failed"):
+            METRICS.gauge("fitodomik_capture_jobs", "Заявки на снимки с запуска",
+                          lambda state=state: self.capture_queue.stats()[state], state=state)
+        METRICS.gauge("fitodomik_event_log_dropped", "Записи журнала, не попавшие на диск", lambda: self.events.dropped)
+        METRICS.gauge("fitodomik_controllers", "Подключенные контроллеры", lambda: len(self.controllers))
+    def update_diagnostics(self):
+        """Таблица метрик; пока вкладка не видна, не обновляется"""
+        if not self.diagnostics_table.isVisible():
+            return
+        rows = []
+        for metrics in METRICS.collect().values():
+            for metric in metrics:
+                title = metric.help + "".join(f" ({value})" for _, value in metric.labels)
+                if metric.kind == "histogram":
+                    count, *times = metric.summary()
+                    rows.append([title, str(count)] + [f"{value * 1000:.3f} мс" if count else "" for value in times])
+                else:
+                    rows.append([title, f"{metric.value:g}", "", "", "", ""])
+        self.diagnostics_table.setRowCount(len(rows))
+        for row, values in enumerate(rows):
+            for column, value in enumerate(values):
+                item = self.diagnostics_table.item(row, column)
+                if item is None:
+                    self.diagnostics_table.setItem(row, column, QTableWidgetItem(value))
+                elif item.text() != value:
+                    item.setText(value)
+    def start_metrics_server(self):
+        """Отдает метрики в формате Prometheus на localhost, если в настройках задан порт"""
+        port = self.settings.metrics_port
+        if not port:
+            self.metrics_url_label.setText("")
+            return
         try:
-            settings = {
-                'camera_index': self.camera_index,
-                'port': self.port_combo.currentText(),
-                'interval_minutes': self.baud_spin.value(),
-                'photo_mode': self.photo_mode,
-                'photo_time1': self.photo_time1,
-                'photo_time2': self.photo_time2
-            }
-            with open(CONFIG_FILE, 'w') as f:
-                json.dump(settings, f, indent=4)
-        except Exception as e:
-            print(f"Ошибка сохранения настроек: {e}")
-    def load_settings(self):
-        """Загружает сохраненные настройки"""
-        global CAMERA_INDEX
+            self.metrics_server = MetricsServer(METRICS, port)
+        except OSError as e:
+            self.metrics_url_label.setText(f"❌ порт {port} занят")
+            self.log(f"❌ Не удалось открыть порт метрик {port}: {e}", component="метрики")
+            return
+        self.metrics_url_label.setText(f"http://127.0.0.1:{port}/metrics")
+        self.log(f"📈 Метрики Prometheus: http://127.0.0.1:{port}/metrics", component="метрики")
+    def stop_metrics_server(self):
+        if self.metrics_server is not None:
+            self.metrics_server.close()
+            self.metrics_server = None
+    def apply_settings(self, changed):
+        """Применяет изменившиеся настройки (из виджетов или при смене профиля) к окну и сервисам"""
+        widgets = (('camera_index', self.camera_index_spin), ('interval_minutes', self.baud_spin),
+                   ('analysis_tolerance', self.analysis_tolerance_spin), ('scene_threshold', self.scene_threshold_spin),
+                   ('preview_analysis_rate', self.preview_rate_spin))
+        for key, widget in widgets:
+            if key in changed:
+                widget.blockSignals(True)
+                widget.setValue(changed[key])
+                widget.blockSignals(False)
+        if 'port' in changed:
+            if self.port_combo.findText(changed['port']) < 0:
+                self.port_combo.addItem(changed['port'])
+            self.port_combo.setCurrentText(changed['port'])
+        if 'camera_index' in changed:
+            self.camera_service.set_camera(changed['camera_index'])
+            self.load_growth_trend()
+        if 'fast_analysis' in changed:
+            self.analysis_mode_combo.blockSignals(True)
+            self.analysis_mode_combo.setCurrentIndex(0 if changed['fast_analysis'] else 1)
+            self.analysis_mode_combo.blockSignals(False)
+            self.analysis_tolerance_spin.setEnabled(changed['fast_analysis'])
+        if 'metrics_port' in changed:
+            self.metrics_port_spin.blockSignals(True)
+            self.metrics_port_spin.setValue(changed['metrics_port'])
+            self.metrics_port_spin.blockSignals(False)
+            self.stop_metrics_server()
+            self.start_metrics_server()
+        if 'preview_analysis_rate' in changed and self.preview_thread is not None:
+            self.preview_thread.analysis_rate = changed['preview_analysis_rate']
+        if 'photo_codec' in changed or 'photo_quality' in changed:
+            self.load_photo_format()
+            self.photo_writer.configure(self.settings.photo_codec, self.settings.photo_quality)
+        if {'photo_mode', 'photo_time1', 'photo_time2', 'photo_rules'} & set(changed):
+            self.load_photo_settings()
+            if self.photo_scheduler is not None:
+                self.restart_photo_thread()
+    def load_photo_format(self):
+        """Формат и качество фото из настроек в виджеты; для PNG качество - уровень сжатия 0-9"""
+        codec = self.settings.photo_codec
+        self.photo_codec_combo.blockSignals(True)
+        self.photo_quality_spin.blockSignals(True)
+        self.photo_codec_combo.setCurrentIndex(list(DEFAULT_QUALITY).index(codec))
+        self.photo_quality_spin.setRange(0, 9 if codec == "png" else 100)
+        self.photo_quality_spin.setValue(self.settings.photo_quality)
+        self.photo_codec_combo.blockSignals(False)
+        self.photo_quality_spin.blockSignals(False)
+    def load_profiles(self):
+        """Список профилей настроек в выпадающий список"""
+        self.profile_combo.blockSignals(True)
+        self.profile_combo.clear()
+        self.profile_combo.addItems(self.settings.profile_names())
+        self.profile_combo.setCurrentText(self.settings.profile)
+        self.profile_combo.blockSignals(False)
+        self.delete_profile_btn.setEnabled(self.profile_combo.count() > 1)
+    def switch_profile(self, name):
+        if not name or name == self.settings.profile:
+            return
+        self.settings.switch_profile(name)
+        self.log(f"⚙️ Профиль настроек: {name}", component="настройки")
+    def create_profile(self):
+        name, ok = QInputDialog.getText(self, "Новый профиль", "Название профиля (копия текущих настроек):")
+        if not ok:
+            return
         try:
-            if os.path.exists(CONFIG_FILE):
-                with open(CONFIG_FILE, 'r') as f:
-                    settings = json.load(f)
-                    CAMERA_INDEX = settings.get('camera_index', 0)
-                    self.camera_index = CAMERA_INDEX
-                    if hasattr(self, 'camera_index_spin'):
-                        self.camera_index_spin.setValue(self.camera_index)
-                    if hasattr(self, 'port_combo'):
-                        self.port_combo.setCurrentText(settings.get('port', 'COM10'))
-                    if hasattr(self, 'baud_spin'):
-                        self.baud_spin.setValue(settings.get('interval_minutes', 10))
-                    if 'photo_mode' in settings:
-                        self.photo_mode = settings.get('photo_mode', 'Раз в день')
-                    if 'photo_time1' in settings:
-                        self.photo_time1 = settings.get('photo_time1', '13:00')
-                    if 'photo_time2' in settings:
-                        self.photo_time2 = settings.get('photo_time2', '16:00')
-                    QTimer.singleShot(100, self.update_ui_from_settings)
-        except Exception as e:
-            print(f"Ошибка загрузки настроек: {e}")
-    def update_ui_from_settings(self):
-        """Обновляет элементы интерфейса на основе загруженных настроек"""
-        if hasattr(self, 'photo_interval_combo') and self.photo_interval_combo is not None:
-            index = self.photo_interval_combo.findText(self.photo_mode)
-            if index >= 0:
-                self.photo_interval_combo.setCurrentIndex(index)
-        if hasattr(self, 'photo_time1_edit') and self.photo_time1_edit is not None:
-            self.photo_time1_edit.setText(self.photo_time1)
-        if hasattr(self, 'photo_time2_edit') and self.photo_time2_edit is not None:
-            self.photo_time2_edit.setText(self.photo_time2)
-        if hasattr(self, 'photo_interval_combo'):
-            self.update_photo_time_inputs()
+            self.settings.create_profile(name)
+        except ValueError as e:
+            self.show_message(f"❌ Профиль не создан: {e}", False)
+            return
+        self.load_profiles()
+        self.log(f"⚙️ Создан профиль настроек: {name.strip()}", component="настройки")
+    def delete_profile(self):
+        name = self.settings.profile
+        answer = QMessageBox.question(self, "Удаление профиля", f"Удалить профиль настроек \"{name}\"?")
+        if answer != QMessageBox.StandardButton.Yes:
+            return
+        try:
+            self.settings.delete_profile(name)
+        except ValueError as e:
+            self.show_message(f"❌ Профиль не удален: {e}", False)
+            return
+        self.load_profiles()
+        self.log(f"⚙️ Профиль настроек \"{name}\" удален, текущий: {self.settings.profile}", component="настройки")
     def update_photo_time_inputs(self):
         """Обновляет видимость полей ввода времени в зависимости от режима фотографирования"""
         if not hasattr(self, 'photo_interval_combo') or not hasattr(self, 'photo_time_container'):
             return
         current_mode = self.photo_interval_combo.currentText()
-        if current_mode == "Каждые 10 минут (тест)":
+        if current_mode == TEST_MODE:
             self.photo_time_container.setVisible(False)
         else:
             self.photo_time_container.setVisible(True)
-            if hasattr(self, 'photo_time2_label'):
-                self.photo_time2_label.setVisible(current_mode == "Два раза в день")
-            if hasattr(self, 'photo_time2_edit'):
-                self.photo_time2_edit.setVisible(current_mode == "Два раза в день")
+            for widget in (self.photo_time1_label, self.photo_time1_edit):
+                widget.setVisible(current_mode != RULES_MODE)
+            for widget in (self.photo_time2_label, self.photo_time2_edit):
+                widget.setVisible(current_mode == TWICE_A_DAY)
+            for widget in (self.photo_rules_label, self.photo_rules_edit):
+                widget.setVisible(current_mode == RULES_MODE)
     def save_photo_settings(self):
-        """Сохраняет настройки фотографирования"""
-        old_photo_mode = self.photo_mode
-        old_photo_time1 = self.photo_time1
-        old_photo_time2 = self.photo_time2
-        self.photo_mode = self.photo_interval_combo.currentText()
-        if self.photo_mode != "Каждые 10 минут (тест)":
-            self.photo_time1 = self.photo_time1_edit.text().strip()
-            if not self.is_valid_time_format(self.photo_time1):
+        """Проверяет и сохраняет настройки фотографирования; расписание перезапускается в apply_settings"""
+        photo_mode = self.photo_interval_combo.currentText()
+        values = {'photo_mode': photo_mode}
+        if photo_mode == RULES_MODE:
+            photo_rules = self.photo_rules_edit.text().strip()
+            try:
+                if not parse_rules(photo_rules):
+                    raise ValueError("расписание пустое")
+            except ValueError as e:
+                self.show_message(f"❌ Ошибка в расписании: {e}", False)
+                return
+            values['photo_rules'] = photo_rules
+        elif photo_mode != TEST_MODE:
+            values['photo_time1'] = self.photo_time1_edit.text().strip()
+            if not self.is_valid_time_format(values['photo_time1']):
                 self.show_message("❌ Ошибка: Некорректный формат времени 1. Используйте формат ЧЧ:ММ", False)
                 return
-            if self.photo_mode == "Два раза в день":
-                self.photo_time2 = self.photo_time2_edit.text().strip()
-                if not self.is_valid_time_format(self.photo_time2):
+            if photo_mode == TWICE_A_DAY:
+                values['photo_time2'] = self.photo_time2_edit.text().strip()
+                if not self.is_valid_time_format(values['photo_time2']):
                     self.show_message("❌ Ошибка: Некорректный формат времени 2. Используйте формат ЧЧ:ММ", False)
                     return
-        self.save_settings()
-        self.calculate_next_photo_time()
+        self.settings.update(values)
+        settings = self.settings.snapshot()
         message = "Настройки фотографирования сохранены: "
-        if self.photo_mode == "Каждые 10 минут (тест)":
-            message += self.photo_mode
-        elif self.photo_mode == "Раз в день":
-            message += f"{self.photo_mode} в {self.photo_time1}"
-        else:  
-            message += f"{self.photo_mode} в {self.photo_time1} и {self.photo_time2}"
+        if photo_mode == TEST_MODE:
+            message += photo_mode
+        elif photo_mode == ONCE_A_DAY:
+            message += f"{photo_mode} в {settings['photo_time1']}"
+        elif photo_mode == RULES_MODE:
+            message += f"{photo_mode}: {settings['photo_rules']}"
+        else:
+            message += f"{photo_mode} в {settings['photo_time1']} и {settings['photo_time2']}"
         self.show_message(message, True)
-        photo_settings_changed = (
-            old_photo_mode != self.photo_mode or 
-            old_photo_time1 != self.photo_time1 or 
-            old_photo_time2 != self.photo_time2
-        )
-        if self.photo_thread_active and photo_settings_changed:
-            self.restart_photo_thread()
     def is_valid_time_format(self, time_str):
         """Проверяет валидность формата времени ЧЧ:ММ"""
         try:
@@ -808,113 +1420,33 @@ class MainWindow(QMainWindow):
             return 0 <= hours < 24 and 0 <= minutes < 60
         except ValueError:
             return False
-    def calculate_next_photo_time(self):
-        """Вычисляет секунды с начала дня до следующего запланированного фото"""
-        if self.photo_mode == "Каждые 10 минут (тест)":
-            self.next_photo_time = 0
-            return
-        current_time = datetime.now()
-        if self.photo_mode == "Раз в день":
-            time_points = [self.photo_time1]
-        else:
-            time_points = [self.photo_time1, self.photo_time2]
-        seconds_per_time = []
-        for time_str in time_points:
-            try:
-                hours, minutes = map(int, time_str.split(':'))
-                seconds = hours * 3600 + minutes * 60
-                seconds_per_time.append(seconds)
-            except ValueError:
-                seconds_per_time.append(current_time.hour * 3600 + current_time.minute * 60)
-        seconds_per_time.sort()
-        current_seconds = current_time.hour * 3600 + current_time.minute * 60 + current_time.second
-        for seconds in seconds_per_time:
-            if seconds > current_seconds:
-                self.next_photo_time = seconds
-                return
-        self.next_photo_time = seconds_per_time[0]
+    def start_photo_scheduler(self):
+        """Запускает расписание снимков с текущими настройками"""
+        settings = self.settings.snapshot()
+        self.photo_scheduler = PhotoScheduler(settings['photo_mode'], settings['photo_time1'], settings['photo_time2'],
+                                              self.scheduled_photo_signal.emit, self.events.logger("расписание"),
+                                              settings['photo_rules'])
+        self.photo_scheduler.start()
     def restart_photo_thread(self):
-        """Перезапускает поток фотографирования с новыми настройками"""
-        self.photo_thread_active = False
-        time.sleep(1)
-        self.photo_thread_active = True
-        self.photo_thread_runner = threading.Thread(target=self.photo_thread_function, daemon=True)
-        self.photo_thread_runner.start()
-    def photo_thread_function(self):
-        """Функция для выполнения периодического фотографирования"""
-        log_message = "🧵 Запущен поток периодического фотографирования: "
-        if self.photo_mode == "Каждые 10 минут (тест)":
-            log_message += f"режим = {self.photo_mode}"
-        elif self.photo_mode == "Раз в день":
-            log_message += f"режим = {self.photo_mode} в {self.photo_time1}"
-        else:
-            log_message += f"режим = {self.photo_mode} в {self.photo_time1} и {self.photo_time2}"
-        self.log(log_message)
-        self.calculate_next_photo_time()
-        last_photo_time = time.time()
-        current_day = datetime.now().day
-        photos_taken_today = {}
-        while self.photo_thread_active:
-            try:
-                current_time = time.time()
-                now = datetime.now()
-                if now.day != current_day:
-                    current_day = now.day
-                    photos_taken_today = {}
-                    self.log(f"Новый день ({now.strftime('%Y-%m-%d')}). Сбрасываем информацию о сделанных фото.")
-                if self.photo_mode == "Каждые 10 минут (тест)":
-                    if current_time - last_photo_time >= 600:
-                        self.log(f"Делаем тестовое фото (прошло {int((current_time - last_photo_time))} секунд)")
-                        self.take_scheduled_photo()
-                        last_photo_time = time.time()
-                else:
-                    current_seconds = now.hour * 3600 + now.minute * 60 + now.second
-                    time_points = []
-                    time_names = {}
-                    if self.photo_mode == "Раз в день":
-                        try:
-                            hours, minutes = map(int, self.photo_time1.split(':'))
-                            seconds = hours * 3600 + minutes * 60
-                            time_points.append(seconds)
-                            time_names[seconds] = self.photo_time1
-                        except ValueError:
-                            self.log(f"❌ Ошибка формата времени 1: {self.photo_time1}")
-                    else:
-                        for idx, time_str in enumerate([self.photo_time1, self.photo_time2]):
-                            try:
-                                hours, minutes = map(int, time_str.split(':'))
-                                seconds = hours * 3600 + minutes * 60
-                                time_points.append(seconds)
-                                time_names[seconds] = time_str
-                            except ValueError:
-                                self.log(f"❌ Ошибка формата времени {idx+1}: {time_str}")
-                    time_points.sort()
-                    for seconds in time_points:
-                        time_key = time_names[seconds]
-                        if time_key in photos_taken_today and photos_taken_today[time_key]:
-                            continue
-                        if abs(current_seconds - seconds) <= 30:
-                            self.log(f"Наступило запланированное время для фото: {time_names[seconds]}")
-                            self.take_scheduled_photo()
-                            photos_taken_today[time_key] = True
-                            break
-                time.sleep(5)
-            except Exception as e:
-                self.log(f"❌ Ошибка в потоке фотографирования: {str(e)}")
-                time.sleep(10)
+        """Перезапускает расписание с новыми настройками: старое отменяется сразу, не дожидаясь своего срока"""
+        self.stop_photo_scheduler()
+        self.start_photo_scheduler()
+    def stop_photo_scheduler(self):
+        if self.photo_scheduler is not None:
+            self.photo_scheduler.stop()
+            self.photo_scheduler = None
     def take_scheduled_photo(self):
         """Делает фото по расписанию"""
         self.log("\n=== Выполнение запланированного фотографирования ===")
-        self.analyze_plant()
+        self.analyze_plant("расписание")
     def stop_system(self):
         """Остановка системы"""
         if hasattr(self, 'sensor_thread') and self.sensor_thread:
             self.sensor_thread.stop()
-        if hasattr(self, 'photo_thread_active'):
-            self.photo_thread_active = False
+        if self.photo_scheduler is not None:
+            self.stop_photo_scheduler()
             self.log("🔄 Поток фотографирования остановлен")
-        if self.serial_port and self.serial_port.is_open:
-            self.serial_port.close()
+        self.close_serial()
         self.log("🛑 Система остановлена")
         self.show_message('🛑 Система остановлена', True)
     def check_connection(self):
@@ -923,22 +1455,34 @@ class MainWindow(QMainWindow):
             return False
         return True
     def load_photo_settings(self):
-        """Загружает настройки фотографирования из сохраненных данных"""
-        if hasattr(self, 'photo_interval_combo') and self.photo_interval_combo is not None:
-            self.photo_interval_combo.setCurrentText(self.photo_mode)
-        if hasattr(self, 'photo_time1_edit') and self.photo_time1_edit is not None:
-            self.photo_time1_edit.setText(self.photo_time1)
-        if hasattr(self, 'photo_time2_edit') and self.photo_time2_edit is not None:
-            self.photo_time2_edit.setText(self.photo_time2)
-        if hasattr(self, 'photo_interval_combo'):
-            self.update_photo_time_inputs()
+        """Заполняет поля фотографирования из настроек"""
+        settings = self.settings.snapshot()
+        self.photo_interval_combo.setCurrentText(settings['photo_mode'])
+        self.photo_time1_edit.setText(settings['photo_time1'])
+        self.photo_time2_edit.setText(settings['photo_time2'])
+        self.photo_rules_edit.setText(settings['photo_rules'])
+        self.update_photo_time_inputs()
     def setup_setup_tab(self):
         layout = QVBoxLayout(self.setup_tab)
+        profile_layout = QHBoxLayout()
+        profile_layout.addWidget(QLabel('Профиль настроек:'))
+        self.profile_combo = QComboBox()
+        self.profile_combo.currentTextChanged.connect(self.switch_profile)
+        profile_layout.addWidget(self.profile_combo, 1)
+        self.create_profile_btn = QPushButton('Новый профиль')
+        self.create_profile_btn.clicked.connect(self.create_profile)
+        profile_layout.addWidget(self.create_profile_btn)
+        self.delete_profile_btn = QPushButton('Удалить профиль')
+        self.delete_profile_btn.clicked.connect(self.delete_profile)
+        profile_layout.addWidget(self.delete_profile_btn)
+        layout.addLayout(profile_layout)
+        self.load_profiles()
         port_layout = QHBoxLayout()
         port_layout.addWidget(QLabel('COM порт:'))
         self.port_combo = QComboBox()
-        self.port_combo.addItems([f'COM{i}' for i in range(1, 21)])
-        self.port_combo.setCurrentText('COM10')
+        self.port_combo.setEditable(True)
+        self.port_combo.setCurrentText(self.settings.port)
+        self.refresh_ports()
         self.port_combo.setStyleSheet("""
             QComboBox {
                 background-color: #232323;
@@ -964,11 +1508,15 @@ class MainWindow(QMainWindow):
             }
         """)
         port_layout.addWidget(self.port_combo)
+        self.refresh_ports_btn = QPushButton('Обновить')
+        self.refresh_ports_btn.clicked.connect(self.refresh_ports)
+        port_layout.addWidget(self.refresh_ports_btn)
         port_layout.addWidget(QLabel('Интервал (мин):'))
         self.baud_spin = QSpinBox()
         self.baud_spin.setRange(1, 60)
         self.baud_spin.setSingleStep(1)
-        self.baud_spin.setValue(10)
+        self.baud_spin.setValue(self.settings.interval_minutes)
+        self.baud_spin.valueChanged.connect(lambda value: self.settings.set('interval_minutes', value))
         self.baud_spin.setStyleSheet("""
             QSpinBox {
                 background-color: #232323;
@@ -988,13 +1536,17 @@ class MainWindow(QMainWindow):
         self.connect_btn = QPushButton('Подключиться к Arduino')
         self.connect_btn.clicked.connect(self.connect_arduino)
         port_layout.addWidget(self.connect_btn)
+        self.find_btn = QPushButton('Найти Arduino')
+        self.find_btn.clicked.connect(self.find_arduino)
+        port_layout.addWidget(self.find_btn)
         layout.addLayout(port_layout)
         camera_group = QGroupBox("Настройки камеры")
         camera_group.setStyleSheet("QGroupBox { font-size: 18px; font-weight: bold; }")
         camera_layout = QFormLayout()
         self.camera_index_spin = QSpinBox()
         self.camera_index_spin.setRange(0, 10)
-        self.camera_index_spin.setValue(CAMERA_INDEX)
+        self.camera_index_spin.setValue(self.settings.camera_index)
+        self.camera_index_spin.valueChanged.connect(lambda value: self.settings.set('camera_index', value))
         self.camera_index_spin.setStyleSheet("""
             QSpinBox {
                 background-color: #232323;
@@ -1011,6 +1563,42 @@ class MainWindow(QMainWindow):
             }
         """)
         camera_layout.addRow("Индекс камеры:", self.camera_index_spin)
+        self.analysis_mode_combo = QComboBox()
+        self.analysis_mode_combo.addItems(["Быстрый (по рамке растения)", "Полный кадр"])
+        self.analysis_mode_combo.setCurrentIndex(0 if self.settings.fast_analysis else 1)
+        self.analysis_mode_combo.currentIndexChanged.connect(self.set_analysis_mode)
+        camera_layout.addRow("Анализ фото:", self.analysis_mode_combo)
+        self.analysis_tolerance_spin = QDoubleSpinBox()
+        self.analysis_tolerance_spin.setRange(0.1, 20.0)
+        self.analysis_tolerance_spin.setSingleStep(0.5)
+        self.analysis_tolerance_spin.setSuffix(" п.п.")
+        self.analysis_tolerance_spin.setValue(self.settings.analysis_tolerance)
+        self.analysis_tolerance_spin.setEnabled(self.settings.fast_analysis)
+        self.analysis_tolerance_spin.valueChanged.connect(lambda value: self.settings.set('analysis_tolerance', value))
+        camera_layout.addRow("Допуск быстрого анализа:", self.analysis_tolerance_spin)
+        self.scene_threshold_spin = QDoubleSpinBox()
+        self.scene_threshold_spin.setRange(0.0, 10.0)
+        self.scene_threshold_spin.setSingleStep(0.25)
+        self.scene_threshold_spin.setSuffix(" % кадра")
+        self.scene_threshold_spin.setSpecialValueText("выключен")
+        self.scene_threshold_spin.setValue(self.settings.scene_threshold)
+        self.scene_threshold_spin.valueChanged.connect(lambda value: self.settings.set('scene_threshold', value))
+        camera_layout.addRow("Пропуск повторных кадров:", self.scene_threshold_spin)
+        self.preview_rate_spin = QDoubleSpinBox()
+        self.preview_rate_spin.setRange(0.1, 10.0)
+        self.preview_rate_spin.setSingleStep(0.5)
+        self.preview_rate_spin.setSuffix(" раз/с")
+        self.preview_rate_spin.setValue(self.settings.preview_analysis_rate)
+        self.preview_rate_spin.valueChanged.connect(lambda value: self.settings.set('preview_analysis_rate', value))
+        camera_layout.addRow("Контуры в просмотре:", self.preview_rate_spin)
+        self.photo_codec_combo = QComboBox()
+        self.photo_codec_combo.addItems(["JPEG", "WebP", "PNG"])
+        self.photo_codec_combo.currentIndexChanged.connect(self.set_photo_codec)
+        camera_layout.addRow("Формат фото:", self.photo_codec_combo)
+        self.photo_quality_spin = QSpinBox()
+        self.load_photo_format()
+        self.photo_quality_spin.valueChanged.connect(lambda value: self.settings.set('photo_quality', value))
+        camera_layout.addRow("Качество (PNG - сжатие):", self.photo_quality_spin)
         self.test_camera_btn = QPushButton("Проверить камеру")
         self.test_camera_btn.clicked.connect(self.test_camera)
         camera_layout.addRow("", self.test_camera_btn)
@@ -1020,14 +1608,10 @@ class MainWindow(QMainWindow):
         photo_group.setStyleSheet("QGroupBox { font-size: 18px; font-weight: bold; }")
         photo_layout = QFormLayout()
         self.photo_interval_combo = QComboBox()
-        photo_modes = [
-            "Раз в день", 
-            "Два раза в день", 
-            "Каждые 10 минут (тест)"
-        ]
+        photo_modes = [ONCE_A_DAY, TWICE_A_DAY, RULES_MODE, TEST_MODE]
         for mode in photo_modes:
             self.photo_interval_combo.addItem(mode)
-        self.photo_interval_combo.setCurrentText("Раз в день")
+        self.photo_interval_combo.setCurrentText(ONCE_A_DAY)
         self.photo_interval_combo.setStyleSheet("""
             QComboBox {
                 background-color: #232323;
@@ -1090,6 +1674,25 @@ class MainWindow(QMainWindow):
         """)
         time2_layout.addWidget(self.photo_time2_edit)
         time_layout.addLayout(time2_layout)
+        rules_layout = QHBoxLayout()
+        self.photo_rules_label = QLabel("Расписание:")
+        rules_layout.addWidget(self.photo_rules_label)
+        self.photo_rules_edit = QLineEdit(self.settings.photo_rules)
+        self.photo_rules_edit.setPlaceholderText("07:00; 13:00; */30 6-20 * * *")
+        self.photo_rules_edit.setToolTip("Время ЧЧ:ММ или правило cron \"минута час день месяц день_недели\", "
+                                         "через точку с запятой")
+        self.photo_rules_edit.setStyleSheet("""
+            QLineEdit {
+                background-color: #232323;
+                color: #fff;
+                border: 1px solid #333;
+                border-radius: 6px;
+                padding: 4px 8px;
+                min-width: 80px;
+            }
+        """)
+        rules_layout.addWidget(self.photo_rules_edit)
+        time_layout.addLayout(rules_layout)
         photo_layout.addRow("", self.photo_time_container)
         self.photo_interval_combo.currentIndexChanged.connect(self.update_photo_time_inputs)
         self.save_photo_settings_btn = QPushButton("Сохранить настройки фото")
@@ -1100,15 +1703,26 @@ class MainWindow(QMainWindow):
         self.sync_time_btn = QPushButton('Синхронизировать время')
         self.sync_time_btn.clicked.connect(self.sync_time)
         layout.addWidget(self.sync_time_btn)
+        controller_buttons = QHBoxLayout()
+        self.setup_controller_btn = QPushButton('Настроить выбранный контроллер')
+        self.setup_controller_btn.clicked.connect(lambda: self.run_setup_wizard())
+        controller_buttons.addWidget(self.setup_controller_btn)
+        self.disconnect_btn = QPushButton('Отключить выбранный контроллер')
+        self.disconnect_btn.clicked.connect(self.disconnect_controller)
+        controller_buttons.addWidget(self.disconnect_btn)
+        layout.addLayout(controller_buttons)
         layout.addStretch(1)
     def auto_connect_arduino(self):
-        """Автоматическое подключение к Arduino при запуске программы"""
+        """Автоматическое подключение при запуске: порты известных контроллеров и все остальные опрашиваются параллельно,
+        подключаются все ответившие"""
         try:
-            port = self.port_combo.currentText()
-            interval_minutes = self.baud_spin.value()
+            port = self.port_combo.currentText().strip()
             self.log(f"\n=== АВТОМАТИЧЕСКОЕ ПОДКЛЮЧЕНИЕ К ARDUINO ===")
-            self.log(f"Попытка подключения к порту {port} с интервалом {interval_minutes} мин...")
-            self.connect_arduino()
+            known = [port] if port else []
+            known += [p for p in self.settings.controllers if p not in known]
+            ports = known + [p for p in list_candidate_ports() if p not in known]
+            self.log(f"Поиск контроллеров, известные порты: {', '.join(known) or 'нет'}")
+            self.start_port_discovery(ports)
         except Exception as e:
             self.log(f"❌ Ошибка при автоподключении: {str(e)}")
 class SetupDialog(QDialog):
@@ -1273,6 +1887,18 @@ class SetupDialog(QDialog):
         self.save_btn.setStyleSheet('background: #4CAF50; color: #fff; font-size: 16px; border-radius: 8px; padding: 8px 24px;')
         self.save_btn.clicked.connect(self.accept)
         layout.addRow(self.save_btn)
+    def set_params(self, params):
+        """Заполняет поля сохраненным профилем контроллера"""
+        def parse(text):
+            return datetime.strptime(text, '%H:%M').time()
+        self.temp_spin.setValue(int(params['temp']))
+        self.temp_tol_spin.setValue(int(params['temp_tol']))
+        self.soil_spin.setValue(int(params['soil']))
+        self.soil_tol_spin.setValue(int(params['soil_tol']))
+        self.curt_open_time.setTime(parse(params['curt_open']))
+        self.curt_close_time.setTime(parse(params['curt_close']))
+        self.lamp_on_time.setTime(parse(params['lamp_on']))
+        self.lamp_off_time.setTime(parse(params['lamp_off']))
     def get_params(self):
         def fmt(qt):
             return qt.toString('HH:mm')
@@ -0,0 +1,269 @@
+"""Каталог снимков растения: SQLite с индексами вместо разбора тысяч файлов greenhouse_report_*.txt.
+
+Каждая запись - один снимок: время, камера, имена файлов (относительно папки каталога), проценты цветов,
+состояние, найденные болезни и вредители, хеш файла фото и ряд роста: площадь растения, его рамка
+и число контуров. У повторного кадра (сцена не изменилась) photo и analysis - файлы прошлого снимка,
+а same_as - его отчет. По каждой камере хранится GrowthTrend, который обновляется в той же транзакции,
+что и запись снимка. Новые снимки записывает PhotoWriter сразу после сохранения файлов, старые
+отчеты переносятся одной командой:
+
+    python analysis_catalog.py import [--dir ~/FitoDomik_photos] [--camera 0]
+    python analysis_catalog.py find --days 30 --min yellow=10
+    python analysis_catalog.py growth
+"""
+import argparse
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from growth_trend import GrowthTrend
+from photo_writer import CODECS, PHOTO_PREFIX, ANALYSIS_PREFIX, REPORT_PREFIX
+CATALOG_FILE = "analysis_catalog.db"
+LOCAL_PATH = os.path.join(os.path.expanduser("~"), "FitoDomik_photos")
+COLORS = ("healthy_green", "yellow", "brown", "light_green")
+# Столбцы, появившиеся после первой версии каталога: в старые каталоги они добавляются при открытии
+ADDED_COLUMNS = {"plant_pixels": "INTEGER", "plant_area": "REAL", "box_x0": "INTEGER", "box_y0": "INTEGER",
+                 "box_x1": "INTEGER", "box_y1": "INTEGER", "contour_count": "INTEGER", "same_as": "TEXT"}
+COLUMNS = (("ts", "camera", "photo", "analysis", "report", "status") + COLORS + ("diseases", "pests", "image_hash")
+           + tuple(ADDED_COLUMNS))
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS captures (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    camera INTEGER,
+    photo TEXT,
+    analysis TEXT,
+    report TEXT NOT NULL UNIQUE,
+    status TEXT,
+    healthy_green REAL,
+    yellow REAL,
+    brown REAL,
+    light_green REAL,
+    diseases TEXT,
+    pests TEXT,
+    image_hash TEXT,
+    plant_pixels INTEGER,
+    plant_area REAL,
+    box_x0 INTEGER,
+    box_y0 INTEGER,
+    box_x1 INTEGER,
+    box_y1 INTEGER,
+    contour_count INTEGER,
+    same_as TEXT
+);
+CREATE INDEX IF NOT EXISTS captures_ts ON captures (ts);
+CREATE INDEX IF NOT EXISTS captures_camera_ts ON captures (camera, ts);
+CREATE INDEX IF NOT EXISTS captures_status_ts ON captures (status, ts);
+CREATE TABLE IF NOT EXISTS growth_trends (
+    camera INTEGER PRIMARY KEY,
+    """ + ",\n    ".join(f"{field} REAL" for field in GrowthTrend.FIELDS) + """
+);
+"""
+REPORT_NAME = re.compile(REPORT_PREFIX + r"(\d{8}_\d{6})\.txt$")
+class AnalysisCatalog:
+    """Каталог в файле path; у каждого потока свое соединение, WAL позволяет читать во время записи"""
+    def __init__(self, path):
+        self.path = path
+        self.directory = os.path.dirname(os.path.abspath(path))
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.ready = False
+    def connection(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            os.makedirs(self.directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self.lock:
+                if not self.ready:
+                    conn.executescript(SCHEMA)
+                    self.add_missing_columns(conn)
+                    conn.commit()
+                    self.ready = True
+            self.local.conn = conn
+        return conn
+    def add_missing_columns(self, conn):
+        """Каталоги, созданные раньше, получают новые столбцы; старые записи в них пустые"""
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(captures)")}
+        for column, kind in ADDED_COLUMNS.items():
+            if column not in existing:
+                conn.execute(f"ALTER TABLE captures ADD COLUMN {column} {kind}")
+    def add(self, record):
+        """Добавляет или заменяет запись снимка; ключ - файл отчета. Возвращает тренд камеры или None"""
+        return self.add_many([record]).get(record.get("camera"))
+    def add_many(self, records):
+        """Записывает снимки и обновляет тренды их камер одной транзакцией; возвращает {камера: GrowthTrend}"""
+        rows = [tuple(record.get(column) for column in COLUMNS) for record in records]
+        conn = self.connection()
+        trends = {}
+        with conn:
+            conn.executemany(f"INSERT OR REPLACE INTO captures ({', '.join(COLUMNS)}) "
+                             f"VALUES ({', '.join('?' * len(COLUMNS))})", rows)
+            for record in sorted(records, key=lambda r: r["ts"]):
+                camera = record.get("camera")
+                if camera is None or record.get("plant_area") is None:
+                    continue
+                if camera not in trends:
+                    trends[camera] = self.load_trend(conn, camera) or GrowthTrend()
+                trends[camera].update(record["ts"], record["plant_area"], record.get("yellow") or 0.0)
+            for camera, trend in trends.items():
+                conn.execute(f"INSERT OR REPLACE INTO growth_trends (camera, {', '.join(GrowthTrend.FIELDS)}) "
+                             f"VALUES ({', '.join('?' * (len(GrowthTrend.FIELDS) + 1))})", (camera,) + trend.to_row())
+        return trends
+    def load_trend(self, conn, camera):
+        row = conn.execute(f"SELECT {', '.join(GrowthTrend.FIELDS)} FROM growth_trends WHERE camera = ?",
+                           (camera,)).fetchone()
+        return None if row is None else GrowthTrend.from_row(tuple(row))
+    def trend(self, camera):
+        """Текущий тренд роста камеры или None, если снимков с площадью растения еще не было"""
+        return self.load_trend(self.connection(), camera)
+    def trends(self):
+        return {row[0]: self.load_trend(self.connection(), row[0])
+                for row in self.connection().execute("SELECT camera FROM growth_trends ORDER BY camera")}
+    def reports(self):
+        """Имена файлов отчетов, уже внесенных в каталог"""
+        return {row[0] for row in self.connection().execute("SELECT report FROM captures")}
+    def find(self, since=None, until=None, camera=None, status=None, min_percent=None, limit=None):
+        """Снимки за интервал [since, until] (секунды Unix) по индексу времени, новые первыми.
+        min_percent - нижние границы процентов цветов, например {"yellow": 10}."""
+        conditions = ["ts BETWEEN ? AND ?"]
+        params = [since or 0, time.time() if until is None else until]
+        if camera is not None:
+            conditions.append("camera = ?")
+            params.append(camera)
+        if status is not None:
+            conditions.append("status = ?")
+            params.append(status)
+        for color, value in (min_percent or {}).items():
+            if color not in COLORS:
+                raise ValueError(f"неизвестный цвет: {color}")
+            conditions.append(f"{color} >= ?")
+            params.append(value)
+        sql = f"SELECT * FROM captures WHERE {' AND '.join(conditions)} ORDER BY ts DESC"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return [dict(row) for row in self.connection().execute(sql, params)]
+    def close(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self.local.conn = None
+def parse_report(text):
+    """Состояние, проценты цветов, болезни и вредители из текста format_report.
+    В отчете только цвета больше 1% и с точностью 0.1%; остальные считаются нулем."""
+    from plant_analysis import LEAF_COLORS, DISEASES_DB, PESTS_DB
+    names = {color["name"]: key for key, color in LEAF_COLORS.items()}
+    disease_names = {disease["name"] for disease in DISEASES_DB.values()}
+    pest_names = {pest["name"] for pest in PESTS_DB.values()}
+    sections = {}
+    current = None
+    for line in text.splitlines():
+        if line.startswith("СОСТОЯНИЕ:"):
+            sections["status"] = line.split(":", 1)[1].strip()
+        elif line.endswith(":") and line.isupper():
+            current = line[:-1]
+        elif line and current is not None:
+            sections[current] = line
+    record = {color: 0.0 for color in COLORS}
+    for item in sections.get("РАСПРЕДЕЛЕНИЕ ЦВЕТОВ", "").split("; "):
+        name, _, value = item.rpartition(": ")
+        if name in names and value.endswith("%"):
+            record[names[name]] = float(value[:-1])
+    found = [item.split(":", 1)[0] for item in sections.get("ДЕТАЛИ АНАЛИЗА", "").split("; ")]
+    record["status"] = sections.get("status")
+    record["diseases"] = ", ".join(name for name in found if name in disease_names)
+    record["pests"] = ", ".join(name for name in found if name in pest_names)
+    return record
+def find_sibling(directory, prefix, stamp, extensions):
+    for extension in extensions:
+        name = f"{prefix}{stamp}{extension}"
+        if os.path.exists(os.path.join(directory, name)):
+            return name
+    return None
+def sidecar_measurements(path):
+    """Ряд роста по файлу контуров .npz; у старых снимков со вторым JPEG его нет"""
+    from photo_writer import load_contours, render_mask
+    from plant_analysis import plant_measurements
+    import cv2
+    shape, contours = load_contours(path)
+    return plant_measurements(contours, cv2.countNonZero(render_mask(shape, contours)), shape)
+def import_reports(catalog, directory=None, log=print, batch_size=500, camera=0):
+    """Переносит в каталог отчеты greenhouse_report_*.txt, которых в нем еще нет; возвращает (внесено, пропущено).
+    camera - индекс камеры, которой сняты старые отчеты: в самих отчетах его нет."""
+    directory = directory or catalog.directory
+    known = catalog.reports()
+    batch = []
+    imported = skipped = 0
+    with os.scandir(directory) as entries:
+        names = sorted(entry.name for entry in entries if REPORT_NAME.match(entry.name))
+    for name in names:
+        if name in known:
+            skipped += 1
+            continue
+        stamp = REPORT_NAME.match(name).group(1)
+        with open(os.path.join(directory, name), encoding='utf-8') as f:
+            record = parse_report(f.read())
+        record["ts"] = datetime.strptime(stamp, '%Y%m%d_%H%M%S').timestamp()
+        record["camera"] = camera
+        record["report"] = name
+        record["photo"] = find_sibling(directory, PHOTO_PREFIX, stamp, CODECS.values())
+        # До фонового PhotoWriter изображение с контурами хранилось вторым JPEG
+        record["analysis"] = find_sibling(directory, ANALYSIS_PREFIX, stamp, (".npz", ".jpg"))
+        if record["photo"] is not None:
+            with open(os.path.join(directory, record["photo"]), 'rb') as f:
+                record["image_hash"] = hashlib.sha1(f.read()).hexdigest()
+        if record["analysis"] is not None and record["analysis"].endswith(".npz"):
+            record.update(sidecar_measurements(os.path.join(directory, record["analysis"])))
+        batch.append(record)
+        if len(batch) >= batch_size:
+            catalog.add_many(batch)
+            imported += len(batch)
+            batch = []
+            log(f"  внесено {imported} из {len(names) - skipped}")
+    if batch:
+        catalog.add_many(batch)
+        imported += len(batch)
+    return imported, skipped
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Каталог снимков растения ФитоДомика")
+    parser.add_argument('--dir', default=LOCAL_PATH, help="папка архива с фото и каталогом")
+    commands = parser.add_subparsers(dest='command', required=True)
+    import_command = commands.add_parser('import', help="внести в каталог старые отчеты greenhouse_report_*.txt")
+    import_command.add_argument('--camera', type=int, default=0, help="камера, которой сняты старые отчеты")
+    commands.add_parser('growth', help="тренды роста по камерам")
+    find = commands.add_parser('find', help="снимки за последние дни")
+    find.add_argument('--days', type=float, default=30)
+    find.add_argument('--camera', type=int)
+    find.add_argument('--status')
+    find.add_argument('--min', action='append', default=[], metavar='ЦВЕТ=ПРОЦЕНТ',
+                      help=f"нижняя граница процента цвета ({', '.join(COLORS)}); можно несколько раз")
+    args = parser.parse_args(argv)
+    catalog = AnalysisCatalog(os.path.join(args.dir, CATALOG_FILE))
+    started = time.perf_counter()
+    if args.command == 'import':
+        imported, skipped = import_reports(catalog, args.dir, camera=args.camera)
+        print(f"Внесено отчетов: {imported}, уже были в каталоге: {skipped}, {time.perf_counter() - started:.1f} с")
+        return
+    if args.command == 'growth':
+        for camera, trend in catalog.trends().items():
+            print(f"Камера {camera}: {trend.describe()} (снимков: {int(trend.count)})")
+        return
+    min_percent = {}
+    for item in args.min:
+        color, _, value = item.partition('=')
+        min_percent[color] = float(value)
+    rows = catalog.find(time.time() - args.days * 86400, camera=args.camera, status=args.status,
+                        min_percent=min_percent)
+    elapsed = time.perf_counter() - started
+    for row in rows:
+        colors = ", ".join(f"{color} {row[color]:.1f}%" for color in COLORS if row[color])
+        print(f"{datetime.fromtimestamp(row['ts']):%Y-%m-%d %H:%M}  {row['status'] or '-':17s} {colors}  "
+              f"{row['photo'] or row['report']}{' (повторный кадр)' if row['same_as'] else ''}")
+    print(f"Найдено снимков: {len(rows)} за {elapsed * 1000:.1f} мс")
+if __name__ == '__main__':
+    main()
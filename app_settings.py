@@ -0,0 +1,234 @@
+"""Настройки ФитоДомика: один объект в памяти для окна, службы и рабочих потоков.
+
+Значения читаются из памяти (settings.camera_index или settings.get("camera_index")) без обращения к диску.
+Изменения проверяются по типу значения по умолчанию, подписчики получают словарь изменившихся настроек,
+а запись на диск откладывается на SAVE_DELAY секунд после последнего изменения (но не дольше MAX_SAVE_DELAY)
+и делается в фоне через временный файл с переименованием, поэтому сбой во время записи не портит файл.
+
+В файле может быть несколько профилей настроек, например для разных теплиц или сезонов:
+{"profile": "Основной", "profiles": {"Основной": {...}, "Зима": {...}}}.
+Файл старого формата без профилей читается как профиль DEFAULT_PROFILE.
+"""
+import copy
+import json
+import os
+import threading
+import time
+from photo_scheduler import TEST_MODE, ONCE_A_DAY, TWICE_A_DAY, RULES_MODE
+from photo_writer import DEFAULT_QUALITY
+CONFIG_FILE = os.path.join(os.path.expanduser("~"), "fitodomik_config.json")
+DEFAULT_PROFILE = "Основной"
+SAVE_DELAY = 1.0
+MAX_SAVE_DELAY = 10.0
+DEFAULTS = {
+    "camera_index": 0,
+    "port": "",
+    "interval_minutes": 10,
+    "photo_mode": ONCE_A_DAY,
+    "photo_time1": "13:00",
+    "photo_time2": "16:00",
+    "photo_rules": "07:00; 13:00; 19:00",
+    "fast_analysis": True,
+    "analysis_tolerance": 2.0,
+    "scene_threshold": 0.25,
+    "preview_analysis_rate": 1.0,
+    "photo_codec": "jpeg",
+    "photo_quality": DEFAULT_QUALITY["jpeg"],
+    "controllers": {},
+    "metrics_port": 0,
+}
+CHOICES = {
+    "photo_mode": (ONCE_A_DAY, TWICE_A_DAY, RULES_MODE, TEST_MODE),
+    "photo_codec": tuple(DEFAULT_QUALITY),
+}
+def check_value(key, value):
+    """Значение настройки, приведенное к типу значения по умолчанию; ValueError, если оно не подходит"""
+    if key not in DEFAULTS:
+        raise ValueError(f"неизвестная настройка {key}")
+    kind = type(DEFAULTS[key])
+    # bool - подкласс int: True в индексе камеры, как и 1 в флаге, скорее всего ошибка
+    if isinstance(value, bool) != (kind is bool):
+        raise ValueError(f"{key}: ожидается {kind.__name__}, получено {value!r}")
+    if kind is float and isinstance(value, int):
+        value = float(value)
+    if not isinstance(value, kind):
+        raise ValueError(f"{key}: ожидается {kind.__name__}, получено {value!r}")
+    if key in CHOICES and value not in CHOICES[key]:
+        raise ValueError(f"{key}: недопустимое значение {value!r}")
+    return copy.deepcopy(value) if kind is dict else value
+class Settings:
+    """Настройки текущего профиля в памяти с отложенной атомарной записью.
+
+    get и чтение атрибутов можно вызывать из любого потока; словари (controllers) возвращаются без
+    копии, менять их нельзя - новое значение передается через set. Подписчики subscribe(callback)
+    вызываются как callback(changed) в потоке, который изменил настройки, после изменения и вне блокировки.
+    """
+    def __init__(self, path=CONFIG_FILE, log=print, save_delay=SAVE_DELAY):
+        self.path = path
+        self.log = log
+        self.save_delay = save_delay
+        self.condition = threading.Condition()
+        self.write_lock = threading.Lock()
+        self.profile = DEFAULT_PROFILE
+        self.profiles = {DEFAULT_PROFILE: dict(DEFAULTS)}
+        self.values = self.profiles[DEFAULT_PROFILE]
+        self.callbacks = []
+        self.changed_at = None
+        self.dirty_since = None
+        self.closed = False
+        self.thread = None
+    def load(self, profile=None):
+        """Читает файл настроек; ошибочные значения заменяются значениями по умолчанию с записью в журнал.
+        profile - профиль вместо сохраненного в файле текущего (для службы)"""
+        try:
+            if not os.path.exists(self.path):
+                return
+            with open(self.path, 'r', encoding='utf-8') as f:
+                document = json.load(f)
+        except Exception as e:
+            self.log(f"❌ Ошибка загрузки настроек: {e}")
+            return
+        if "profiles" in document:
+            stored, current = document["profiles"], document.get("profile", DEFAULT_PROFILE)
+        else:
+            stored, current = {DEFAULT_PROFILE: document}, DEFAULT_PROFILE
+        profiles = {name: self.read_profile(name, values) for name, values in stored.items()}
+        if not profiles:
+            profiles = {DEFAULT_PROFILE: dict(DEFAULTS)}
+        current = profile or current
+        if current not in profiles:
+            self.log(f"⚠️ Профиль настроек \"{current}\" не найден, используется \"{next(iter(profiles))}\"")
+            current = next(iter(profiles))
+        with self.condition:
+            self.profiles = profiles
+            self.profile = current
+            self.values = profiles[current]
+    def read_profile(self, name, stored):
+        values = dict(DEFAULTS)
+        for key, value in stored.items():
+            if key not in DEFAULTS:
+                continue
+            try:
+                values[key] = check_value(key, value)
+            except ValueError as e:
+                self.log(f"⚠️ Профиль \"{name}\": {e}, используется {DEFAULTS[key]!r}")
+        return values
+    def __getattr__(self, key):
+        if key in DEFAULTS:
+            return self.get(key)
+        raise AttributeError(key)
+    def get(self, key):
+        with self.condition:
+            return self.values[key]
+    def snapshot(self):
+        """Копия всех настроек текущего профиля"""
+        with self.condition:
+            return copy.deepcopy(self.values)
+    def subscribe(self, callback):
+        self.callbacks.append(callback)
+    def set(self, key, value):
+        return self.update({key: value})
+    def update(self, values):
+        """Меняет несколько настроек сразу: подписчики получают одно уведомление.
+        Возвращает словарь изменившихся настроек; ValueError, если значение не подходит"""
+        values = {key: check_value(key, value) for key, value in values.items()}
+        with self.condition:
+            changed = {key: value for key, value in values.items() if self.values[key] != value}
+            self.values.update(changed)
+        if changed:
+            self.notify(changed)
+        return changed
+    def notify(self, changed):
+        self.schedule_save()
+        for callback in list(self.callbacks):
+            callback(changed)
+    def profile_names(self):
+        with self.condition:
+            return list(self.profiles)
+    def switch_profile(self, name):
+        """Делает профиль текущим; подписчики получают настройки, которые отличаются от прежнего профиля"""
+        with self.condition:
+            if name not in self.profiles:
+                raise ValueError(f"профиль \"{name}\" не найден")
+            previous, self.values = self.values, self.profiles[name]
+            self.profile = name
+            changed = {key: value for key, value in self.values.items() if previous[key] != value}
+        self.notify(changed)
+        return changed
+    def create_profile(self, name):
+        """Новый профиль - копия текущего; он сразу становится текущим"""
+        name = name.strip()
+        with self.condition:
+            if not name:
+                raise ValueError("пустое имя профиля")
+            if name in self.profiles:
+                raise ValueError(f"профиль \"{name}\" уже есть")
+            self.profiles[name] = copy.deepcopy(self.values)
+        return self.switch_profile(name)
+    def delete_profile(self, name):
+        """Удаляет профиль; если он был текущим, текущим становится первый оставшийся"""
+        with self.condition:
+            if name not in self.profiles:
+                raise ValueError(f"профиль \"{name}\" не найден")
+            if len(self.profiles) == 1:
+                raise ValueError("нельзя удалить единственный профиль")
+            del self.profiles[name]
+            current = self.profile if self.profile != name else next(iter(self.profiles))
+        if current == self.profile:
+            self.schedule_save()
+            return {}
+        return self.switch_profile(current)
+    def schedule_save(self):
+        """Откладывает запись: серия изменений подряд записывается на диск один раз"""
+        with self.condition:
+            if self.closed:
+                return
+            now = time.monotonic()
+            self.changed_at = now
+            if self.dirty_since is None:
+                self.dirty_since = now
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="Settings", daemon=True)
+                self.thread.start()
+            self.condition.notify_all()
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.closed:
+                    if self.dirty_since is None:
+                        self.condition.wait()
+                        continue
+                    delay = min(self.changed_at + self.save_delay, self.dirty_since + MAX_SAVE_DELAY) - time.monotonic()
+                    if delay <= 0:
+                        break
+                    self.condition.wait(delay)
+                if self.closed:
+                    return
+            self.flush()
+    def flush(self):
+        """Сразу записывает несохраненные изменения через временный файл в той же папке:
+        на диске всегда старый или новый файл целиком"""
+        with self.write_lock:
+            with self.condition:
+                if self.dirty_since is None:
+                    return
+                document = {"profile": self.profile, "profiles": copy.deepcopy(self.profiles)}
+                self.dirty_since = None
+            temp_path = self.path + ".tmp"
+            try:
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(document, f, indent=4, ensure_ascii=False)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, self.path)
+            except Exception as e:
+                self.log(f"❌ Ошибка сохранения настроек: {e}")
+    def close(self):
+        """Останавливает фоновую запись и дописывает изменения"""
+        with self.condition:
+            self.closed = True
+            thread, self.thread = self.thread, None
+            self.condition.notify_all()
+        if thread is not None:
+            thread.join()
+        self.flush()
@@ -0,0 +1,119 @@
+"""Повторный анализ архива фотографий на всех ядрах.
+
+Фото greenhouse_photo_* (JPEG, WebP или PNG) из папки архива раздаются пулу процессов; результаты дописываются
+в таблицу CSV сразу по мере готовности, поэтому прерванный запуск продолжается с того же места.
+Файл пропускается, если его строка в таблице посчитана для того же размера, времени изменения
+и той же версии правил анализа: после правки порогов анализа все фото пересчитываются.
+
+Запуск: python batch_analysis.py [--dir ~/FitoDomik_photos] [--workers 4] [--output results.csv]
+"""
+import argparse
+import csv
+import hashlib
+import multiprocessing
+import os
+import time
+from photo_writer import CODECS, PHOTO_PREFIX
+LOCAL_PATH = os.path.join(os.path.expanduser("~"), "FitoDomik_photos")
+PHOTO_EXTENSIONS = tuple(CODECS.values())
+RESULTS_FILE = "analysis_results.csv"
+COLOR_COLUMNS = ("healthy_green", "yellow", "brown", "light_green")
+COLUMNS = ("file", "size", "mtime_ns", "version", "status", "plant_pixels") + COLOR_COLUMNS + ("details", "error")
+def analysis_version():
+    """ANALYSIS_VERSION и хеш диапазонов цветов и минимальной площади контура: старые строки устаревают только
+    при изменении правил анализа, а не при любой правке plant_analysis.py"""
+    from plant_analysis import ANALYSIS_VERSION, LEAF_COLORS, MIN_CONTOUR_AREA
+    rules = repr((sorted(LEAF_COLORS.items()), MIN_CONTOUR_AREA)).encode('utf-8')
+    return f"{ANALYSIS_VERSION}-{hashlib.sha1(rules).hexdigest()[:8]}"
+def scan_photos(directory):
+    """Лениво перечисляет фото архива: (имя, размер, время изменения в нс)"""
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.name.startswith(PHOTO_PREFIX) and entry.name.endswith(PHOTO_EXTENSIONS) and entry.is_file():
+                stat = entry.stat()
+                yield entry.name, stat.st_size, stat.st_mtime_ns
+def load_results(path):
+    """Строки таблицы по имени файла; при повторах побеждает последняя"""
+    results = {}
+    if not os.path.exists(path):
+        return results
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            results[row["file"]] = row
+    return results
+def is_current(row, size, mtime_ns, version):
+    return (row is not None and row["size"] == str(size) and row["mtime_ns"] == str(mtime_ns)
+            and row["version"] == version)
+def init_worker():
+    import cv2
+    cv2.setNumThreads(1)
+def analyze_file(task):
+    """Выполняется в процессе пула: читает фото и повторяет detect_plant и analyze_health"""
+    directory, name, size, mtime_ns, version = task
+    import cv2
+    from plant_analysis import PlantAnalyzer
+    row = {"file": name, "size": size, "mtime_ns": mtime_ns, "version": version}
+    image = cv2.imread(os.path.join(directory, name))
+    if image is None:
+        row["error"] = "не удалось прочитать изображение"
+        return row
+    errors = []
+    analyzer = PlantAnalyzer(log=errors.append)
+    analysis = analyzer.analyze_frame(image)
+    row["status"] = analysis["состояние"]
+    row["details"] = analysis["детали"]
+    row["plant_pixels"] = analyzer.plant_pixels
+    for color in COLOR_COLUMNS:
+        row[color] = f"{analyzer.color_percentages.get(color, 0.0):.3f}"
+    row["error"] = "; ".join(errors)
+    return row
+def compact(path, results):
+    """Переписывает таблицу без устаревших повторов; замена атомарная"""
+    temp_path = path + ".tmp"
+    with open(temp_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        for name in sorted(results):
+            writer.writerow(results[name])
+    os.replace(temp_path, path)
+def run_batch(directory=LOCAL_PATH, output=None, workers=None, chunksize=4, log=print):
+    """Анализирует все неактуальные фото архива; возвращает (проанализировано, пропущено, секунд)"""
+    output = output or os.path.join(directory, RESULTS_FILE)
+    workers = workers or os.cpu_count() or 1
+    version = analysis_version()
+    results = load_results(output)
+    tasks = []
+    skipped = 0
+    for name, size, mtime_ns in scan_photos(directory):
+        if is_current(results.get(name), size, mtime_ns, version):
+            skipped += 1
+        else:
+            tasks.append((directory, name, size, mtime_ns, version))
+    log(f"Фото к анализу: {len(tasks)}, уже актуальны: {skipped}, процессов: {workers}")
+    started = time.perf_counter()
+    if tasks:
+        new_file = not os.path.exists(output)
+        with open(output, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=COLUMNS)
+            if new_file:
+                writer.writeheader()
+            with multiprocessing.Pool(workers, initializer=init_worker) as pool:
+                for done, row in enumerate(pool.imap_unordered(analyze_file, tasks, chunksize), 1):
+                    writer.writerow(row)
+                    f.flush()
+                    results[row["file"]] = {column: str(row.get(column, "")) for column in COLUMNS}
+                    if done % 100 == 0 or done == len(tasks):
+                        elapsed = time.perf_counter() - started
+                        log(f"  {done}/{len(tasks)} за {elapsed:.1f} с ({done / elapsed:.1f} фото/с)")
+    compact(output, results)
+    return len(tasks), skipped, time.perf_counter() - started
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Повторный анализ архива фотографий ФитоДомика")
+    parser.add_argument('--dir', default=LOCAL_PATH, help="папка архива с фото greenhouse_photo_*")
+    parser.add_argument('--output', help=f"таблица результатов CSV (по умолчанию {RESULTS_FILE} в папке архива)")
+    parser.add_argument('--workers', type=int, help="число процессов (по умолчанию все ядра)")
+    args = parser.parse_args(argv)
+    analyzed, skipped, elapsed = run_batch(args.dir, args.output, args.workers)
+    print(f"Готово: проанализировано {analyzed}, пропущено {skipped}, {elapsed:.1f} с")
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Поиск по истории анализов: разбор файлов greenhouse_report_*.txt против каталога SQLite
+
+Создается архив отчетов за год съемки раз в час (format_report по случайным процентам цветов).
+Запрос - "все снимки за последние 30 дней с желтым не меньше 10%": прежде для этого приходилось
+читать и разбирать каждый отчет, теперь это один запрос по индексу времени. Отдельно замеряются
+разовый перенос отчетов в каталог и тот же запрос в каталоге с десятью годами записей.
+Запуск из корня репозитория: python benchmarks/bench_analysis_catalog.py
+"""
+import glob
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from analysis_catalog import AnalysisCatalog, CATALOG_FILE, import_reports, parse_report
+from plant_analysis import PlantAnalyzer, format_report
+HOURS = 365 * 24
+REPEATS = 5
+def make_archive(directory, hours):
+    rng = random.Random(1)
+    analyzer = PlantAnalyzer(log=print)
+    now = time.time()
+    records = []
+    for hour in range(hours):
+        yellow = rng.uniform(0, 20)
+        brown = rng.uniform(0, 12)
+        analyzer.color_percentages = {"healthy_green": 100 - yellow - brown, "yellow": yellow, "brown": brown,
+                                      "light_green": rng.uniform(0, 30)}
+        analysis = analyzer.analyze_health()
+        ts = now - hour * 3600
+        stamp = datetime.fromtimestamp(ts).strftime('%Y%m%d_%H%M%S')
+        if directory is not None:
+            with open(os.path.join(directory, f"greenhouse_report_{stamp}.txt"), 'w', encoding='utf-8') as f:
+                f.write(format_report(analysis))
+        records.append(dict(analyzer.catalog_record(analysis, ts), report=f"greenhouse_report_{stamp}.txt"))
+    return records
+def legacy_query(directory, since, min_yellow):
+    """Как искали раньше: глоб, чтение и разбор каждого отчета"""
+    found = []
+    for path in glob.glob(os.path.join(directory, "greenhouse_report_*.txt")):
+        stamp = os.path.basename(path)[len("greenhouse_report_"):-len(".txt")]
+        if datetime.strptime(stamp, '%Y%m%d_%H%M%S').timestamp() < since:
+            continue
+        with open(path, encoding='utf-8') as f:
+            if parse_report(f.read())["yellow"] >= min_yellow:
+                found.append(path)
+    return found
+def timed(function, *args, **kwargs):
+    times = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        result = function(*args, **kwargs)
+        times.append(time.perf_counter() - started)
+    return sorted(times)[len(times) // 2] * 1000, result
+def main():
+    directory = tempfile.mkdtemp()
+    try:
+        make_archive(directory, HOURS)
+        since = time.time() - 30 * 86400
+        legacy_ms, legacy = timed(legacy_query, directory, since, 10)
+        catalog = AnalysisCatalog(os.path.join(directory, CATALOG_FILE))
+        started = time.perf_counter()
+        import_reports(catalog, directory, log=lambda message: None)
+        import_ms = (time.perf_counter() - started) * 1000
+        catalog_ms, rows = timed(catalog.find, since, min_percent={"yellow": 10})
+        assert len(rows) == len(legacy), f"каталог нашел {len(rows)}, разбор файлов {len(legacy)}"
+        print(f"{HOURS} отчетов: разбор файлов {legacy_ms:7.1f} мс, каталог {catalog_ms:5.2f} мс "
+              f"(найдено {len(rows)}); перенос отчетов в каталог {import_ms / 1000:.1f} с")
+        catalog.close()
+        big = AnalysisCatalog(os.path.join(directory, "big.db"))
+        big.add_many(make_archive(None, HOURS * 10))
+        big_ms, rows = timed(big.find, since, min_percent={"yellow": 10})
+        print(f"{HOURS * 10} записей: каталог {big_ms:5.2f} мс (найдено {len(rows)})")
+        big.close()
+    finally:
+        shutil.rmtree(directory)
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+"""Пропускная способность batch_analysis в зависимости от числа процессов и проверка возобновления
+
+Создает временный архив из синтетических кадров 1080p, анализирует его с 1, 2, 4, ... процессами
+(до числа ядер) и печатает фото/с и эффективность относительно одного процесса. Затем повторный
+запуск должен пропустить все фото как актуальные.
+Запуск из корня репозитория: python benchmarks/bench_batch_analysis.py [число фото]
+"""
+import os
+import sys
+import tempfile
+import cv2
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from batch_analysis import run_batch, PHOTO_PREFIX
+from bench_plant_detect import make_frame
+def worker_counts():
+    cores = os.cpu_count() or 1
+    counts = []
+    count = 1
+    while count < cores:
+        counts.append(count)
+        count *= 2
+    return counts + [cores]
+def main():
+    photos = int(sys.argv[1]) if len(sys.argv) > 1 else 48
+    with tempfile.TemporaryDirectory() as directory:
+        for i in range(photos):
+            cv2.imwrite(os.path.join(directory, f"{PHOTO_PREFIX}{i:05d}.jpg"), make_frame(1920, 1080, seed=i))
+        print(f"фото: {photos} (1080p), ядер: {os.cpu_count()}")
+        base = None
+        for workers in worker_counts():
+            output = os.path.join(directory, f"results_{workers}.csv")
+            analyzed, skipped, elapsed = run_batch(directory, output, workers, log=lambda message: None)
+            rate = analyzed / elapsed
+            base = base or rate
+            print(f"процессов {workers:2d}: {rate:6.1f} фото/с, ускорение {rate / base:4.2f}x, "
+                  f"эффективность {rate / base / workers * 100:5.1f}%")
+        analyzed, skipped, elapsed = run_batch(directory, output, workers, log=lambda message: None)
+        print(f"повторный запуск: проанализировано {analyzed}, пропущено {skipped} за {elapsed:.2f} с")
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Журнал событий: прежний QTextEdit.append с прокруткой против EventLog и пакетного вывода в QPlainTextEdit
+Прежний журнал добавлял каждое сообщение в QTextEdit сразу и прокручивал его вниз, а документ рос без
+предела. Здесь замеряется стоимость одного сообщения, когда в журнале уже HISTORY строк, и то же самое
+для EventLog.add с записью на диск плюс вывода пачки по таймеру в QPlainTextEdit с ограничением строк.
+Запуск из корня репозитория: QT_QPA_PLATFORM=offscreen python benchmarks/bench_event_log.py
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from PyQt6.QtWidgets import QApplication, QPlainTextEdit, QTextEdit
+from event_log import EventLog, EVENTS_FILE
+HISTORY = (1000, 10000, 50000)
+PROBE = 200
+LINES = 5000
+# Между срабатываниями таймера журнала (250 мс) при обычной работе приходит несколько сообщений
+BATCH = 10
+def message(idx):
+    return f"[12:00:00] 📊 Получены данные от COM3: температура 24.{idx % 10}°C, влажность 55%, сообщение {idx}"
+def old_append(widget, count):
+    for idx in range(count):
+        widget.append(message(idx))
+        scrollbar = widget.verticalScrollBar()
+        scrollbar.setValue(scrollbar.maximum())
+        QApplication.processEvents()
+def new_append(events, widget, count):
+    shown = events.last_seq
+    for idx in range(count):
+        events.add(message(idx), component="COM3")
+        if idx % BATCH == BATCH - 1:
+            records, shown = events.since(shown)
+            widget.appendPlainText("\n".join(record.format() for record in records))
+            scrollbar = widget.verticalScrollBar()
+            scrollbar.setValue(scrollbar.maximum())
+        QApplication.processEvents()
+def main():
+    app = QApplication.instance() or QApplication(sys.argv)
+    directory = tempfile.mkdtemp()
+    try:
+        for history in HISTORY:
+            old = QTextEdit()
+            old.setReadOnly(True)
+            old.show()
+            old_append(old, history)
+            started = time.perf_counter()
+            old_append(old, PROBE)
+            old_us = (time.perf_counter() - started) * 1e6 / PROBE
+            events = EventLog(os.path.join(directory, f"{history}", EVENTS_FILE), capacity=LINES)
+            new = QPlainTextEdit()
+            new.setReadOnly(True)
+            new.setMaximumBlockCount(LINES)
+            new.show()
+            new_append(events, new, history)
+            started = time.perf_counter()
+            new_append(events, new, PROBE)
+            new_us = (time.perf_counter() - started) * 1e6 / PROBE
+            events.close()
+            old.close()
+            new.close()
+            assert new.document().blockCount() <= LINES
+            print(f"{history:6d} строк в журнале: QTextEdit {old_us:8.1f} мкс на сообщение "
+                  f"({old.document().blockCount()} строк в документе), EventLog + пачки {new_us:6.1f} мкс "
+                  f"({new.document().blockCount()} строк)")
+        started = time.perf_counter()
+        events = EventLog(os.path.join(directory, "add", EVENTS_FILE), capacity=LINES, max_bytes=64 * 1024)
+        for idx in range(HISTORY[-1]):
+            events.add(message(idx), component="COM3")
+        add_us = (time.perf_counter() - started) * 1e6 / HISTORY[-1]
+        events.close()
+        files = sorted(os.listdir(os.path.join(directory, "add")))
+        print(f"EventLog.add без интерфейса: {add_us:.1f} мкс на сообщение, потеряно для диска {events.dropped}, "
+              f"файлы после ротации: {', '.join(files)}")
+    finally:
+        shutil.rmtree(directory)
+    app.quit()
+if __name__ == '__main__':
+    main()
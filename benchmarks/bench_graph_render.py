@@ -0,0 +1,100 @@
+"""Время перерисовки графика на одну точку: старый GraphWidget.update_data против blit одной линии
+
+Используется бэкенд Agg, поэтому PyQt6 не нужен; цифры отражают стоимость работы matplotlib,
+которую раньше выполнял поток интерфейса на каждую точку.
+Запуск из корня репозитория: python benchmarks/bench_graph_render.py
+"""
+import time
+from datetime import datetime, timedelta
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.dates as mdates
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+SAMPLES = 200
+MAX_POINTS = 60
+def make_axes():
+    figure = Figure(figsize=(6, 5), dpi=100)
+    canvas = FigureCanvasAgg(figure)
+    ax = figure.add_subplot(111)
+    figure.patch.set_facecolor('#232323')
+    ax.set_facecolor('#2c2c2c')
+    ax.grid(True, color='#444444', linestyle='--', linewidth=0.5)
+    for spine in ax.spines.values():
+        spine.set_color('#555555')
+    ax.set_ylim(10, 40)
+    return figure, canvas, ax
+def legacy(samples):
+    """Повторяет старый update_data: clear, стилизация, plot, autofmt_xdate, tight_layout, draw"""
+    figure, canvas, ax = make_axes()
+    times, data = [], []
+    start = time.perf_counter()
+    for ts, value in samples:
+        times.append(ts)
+        data.append(value)
+        if len(data) > MAX_POINTS:
+            data.pop(0)
+            times.pop(0)
+        ax.clear()
+        ax.plot(times, data, color='#ff5555', linewidth=2, marker='o', markersize=4, markerfacecolor='#ff5555')
+        ax.set_facecolor('#2c2c2c')
+        ax.grid(True, color='#444444', linestyle='--', linewidth=0.5)
+        for spine in ax.spines.values():
+            spine.set_color('#555555')
+        ax.set_ylabel('Температура (°C)', color='#aaaaaa', fontsize=10)
+        ax.set_ylim(10, 40)
+        ax.tick_params(axis='x', colors='#aaaaaa', labelsize=9)
+        ax.tick_params(axis='y', colors='#aaaaaa', labelsize=9)
+        figure.autofmt_xdate(rotation=45)
+        figure.tight_layout(pad=3.0)
+        canvas.draw()
+    return (time.perf_counter() - start) / len(samples)
+def incremental(samples):
+    """Повторяет новый путь: одна линия с animated=True, blit поверх фона, полная отрисовка только при сдвиге оси"""
+    figure, canvas, ax = make_axes()
+    ax.xaxis_date()
+    ax.set_ylabel('Температура (°C)', color='#aaaaaa', fontsize=10)
+    ax.tick_params(axis='x', colors='#aaaaaa', labelsize=9, labelrotation=45)
+    ax.tick_params(axis='y', colors='#aaaaaa', labelsize=9)
+    line, = ax.plot([], [], color='#ff5555', linewidth=2, marker='o', markersize=4,
+                    markerfacecolor='#ff5555', animated=True)
+    state = {'background': None}
+    def on_draw(event):
+        state['background'] = canvas.copy_from_bbox(ax.bbox)
+        ax.draw_artist(line)
+    canvas.mpl_connect('draw_event', on_draw)
+    times, data = [], []
+    full_draws = 0
+    start = time.perf_counter()
+    for ts, value in samples:
+        times.append(mdates.date2num(ts))
+        data.append(value)
+        if len(data) > MAX_POINTS:
+            data.pop(0)
+            times.pop(0)
+        line.set_data(times, data)
+        left, right = ax.get_xlim()
+        first, last = times[0], times[-1]
+        if state['background'] is None or last > right or first > left + (right - left) / 2:
+            span = max(last - first, 1 / 1440)
+            ax.set_xlim(first, last + max(span * 0.25, 1 / 1440))
+            figure.tight_layout(pad=3.0)
+            canvas.draw()
+            full_draws += 1
+            continue
+        canvas.restore_region(state['background'])
+        ax.draw_artist(line)
+        canvas.blit(ax.bbox)
+    return (time.perf_counter() - start) / len(samples), full_draws
+def main():
+    now = datetime.now()
+    samples = [(now + timedelta(seconds=5 * i), 20 + (i % 15)) for i in range(SAMPLES)]
+    old = legacy(samples)
+    new, full_draws = incremental(samples)
+    print(f"точек: {SAMPLES}, окно: {MAX_POINTS}")
+    print(f"старый update_data: {old * 1000:7.2f} мс на точку")
+    print(f"blit одной линии:   {new * 1000:7.2f} мс на точку (полных перерисовок: {full_draws})")
+    print(f"ускорение: {old / new:.1f}x; при max_fps=2 и нескольких точках в секунду "
+          f"отрисовок еще меньше за счет объединения")
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""Тренд роста: обновление GrowthTrend на каждом снимке против регрессии по всей истории
+Синтетическая серия - снимок раз в час в течение года: площадь растет линейно с шумом, доля желтого
+медленно растет. Пересчет регрессии по всей истории на каждом снимке дорожает с ростом архива, а
+инкрементальный тренд обновляется за постоянное время. Результаты сверяются с взвешенной регрессией
+NumPy по тем же снимкам.
+Запуск из корня репозитория: python benchmarks/bench_growth_trend.py
+"""
+import os
+import sys
+import time
+import numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from growth_trend import DAY, GrowthTrend
+HOURS = 365 * 24
+def make_series(hours):
+    rng = np.random.default_rng(1)
+    ts = 1.7e9 + np.arange(hours) * 3600.0
+    days = (ts - ts[0]) / DAY
+    area = 5 + 0.3 * days + rng.normal(0, 0.5, hours)
+    yellow = 2 + 0.02 * days + rng.normal(0, 0.3, hours)
+    return ts, area, yellow
+def full_regression(ts, values, half_life_days):
+    """Взвешенная регрессия по всем снимкам, как без инкрементальных сумм"""
+    days = ts / DAY
+    weights = 0.5 ** ((days[-1] - days) / half_life_days)
+    return np.polyfit(days - days[-1], values, 1, w=np.sqrt(weights))[0]
+def main():
+    ts, area, yellow = make_series(HOURS)
+    trend = GrowthTrend()
+    started = time.perf_counter()
+    for t, a, y in zip(ts, area, yellow):
+        trend.update(t, a, y)
+    incremental = (time.perf_counter() - started) / HOURS
+    checkpoints = (24, 24 * 30, HOURS)
+    for count in checkpoints:
+        started = time.perf_counter()
+        expected = full_regression(ts[:count], area[:count], trend.half_life_days)
+        full = time.perf_counter() - started
+        print(f"{count:5d} снимков: пересчет по истории {full * 1000:7.3f} мс на снимок")
+    assert abs(trend.growth_rate() - expected) < 1e-6, f"{trend.growth_rate()} != {expected}"
+    expected_yellow = full_regression(ts, yellow, trend.half_life_days)
+    assert abs(trend.yellowing_rate() - expected_yellow) < 1e-6
+    print(f"инкрементальный тренд: {incremental * 1e6:.1f} мкс на снимок при любой длине истории; "
+          f"рост {trend.growth_rate():+.3f} п.п./сут, пожелтение {trend.yellowing_rate():+.3f} п.п./сут")
+if __name__ == '__main__':
+    main()
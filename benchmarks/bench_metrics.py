@@ -0,0 +1,71 @@
+"""Метрики: стоимость замеров на горячих путях и разбивка снимка по этапам
+Замеряется observe и with histogram.time() отдельно, разбор строки порта через SerialMux.dispatch
+(с замером и счетчиками) против голого parse_line и сборка текста Prometheus. Затем анализируются
+FRAMES кадров 1080p и 4K, и из реестра печатается время каждого этапа с долей, которую съели сами замеры.
+Запуск из корня репозитория: python benchmarks/bench_metrics.py
+"""
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_plant_roi import make_scene
+from bench_serial_parser import SAMPLE_LINES
+from metrics import METRICS, Histogram
+from plant_analysis import PlantAnalyzer
+from serial_mux import SerialMux
+from serial_parser import parse_line
+CALLS = 200000
+FRAMES = 5
+def per_call(func, calls=CALLS):
+    started = time.perf_counter()
+    func(calls)
+    return (time.perf_counter() - started) * 1e9 / calls
+def main():
+    histogram = Histogram("bench_seconds", "замер")
+    def observe(calls):
+        for _ in range(calls):
+            histogram.observe(0.0012)
+    def timer(calls):
+        for _ in range(calls):
+            with histogram.time():
+                pass
+    observe_ns = per_call(observe)
+    timer_ns = per_call(timer)
+    print(f"observe: {observe_ns:.0f} нс, with time(): {timer_ns:.0f} нс")
+    lines = SAMPLE_LINES * (CALLS // len(SAMPLE_LINES))
+    mux = SerialMux(None, "bench")
+    mux.subscribers = []
+    def dispatch(calls):
+        for line in lines[:calls]:
+            mux.dispatch(line, 0.0)
+    def parse(calls):
+        for line in lines[:calls]:
+            try:
+                parse_line(line)
+            except Exception:
+                pass
+    dispatch_ns = per_call(dispatch, len(lines))
+    parse_ns = per_call(parse, len(lines))
+    print(f"строка порта: parse_line {parse_ns:.0f} нс, dispatch с метриками {dispatch_ns:.0f} нс")
+    for name, width, height in (("1080p", 1920, 1080), ("4K", 3840, 2160)):
+        stages = METRICS.collect()["fitodomik_photo_stage_seconds"]
+        before = {metric.labels: metric.snapshot()[1:3] for metric in stages}
+        frame = make_scene(width, height, 0)
+        for _ in range(FRAMES):
+            PlantAnalyzer(log=lambda message: None, fast=True).analyze_frame(frame)
+        print(f"{name}, {FRAMES} кадров, быстрый анализ:")
+        total = observations = 0
+        for metric in stages:
+            seconds, count = (now - was for now, was in zip(metric.snapshot()[1:3], before[metric.labels]))
+            if not count:
+                continue
+            total += seconds
+            observations += count
+            print(f"  {dict(metric.labels)['stage']:15s} {seconds * 1000 / FRAMES:7.2f} мс на кадр ({count // FRAMES} замера)")
+        print(f"  замеры: {observations * timer_ns / 1e6 / FRAMES:.4f} мс на кадр, "
+              f"{100 * observations * timer_ns / 1e9 / total:.3f}% времени этапов")
+    started = time.perf_counter()
+    text = METRICS.render()
+    print(f"текст Prometheus: {len(text)} байт за {(time.perf_counter() - started) * 1000:.2f} мс")
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Показ снимка растения: сколько времени занимает поток интерфейса
+
+Прежний handle_photo_taken получал два полноразмерных кадра BGR и в потоке интерфейса строил QImage,
+переставлял каналы (rgbSwapped копирует весь кадр), делал QPixmap и масштабировал его под окно.
+Теперь поток снимка сам уменьшает кадр до размера окна (display_images), а интерфейсу остается
+обернуть готовый RGB-буфер в QImage и сделать QPixmap. Размер окна - 640x480, как у меток на вкладке.
+Запуск из корня репозитория: python benchmarks/bench_photo_display.py
+"""
+import os
+import sys
+import time
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+import cv2
+import numpy as np
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QImage, QPixmap
+from PyQt6.QtWidgets import QApplication
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_plant_roi import make_scene
+from FitoDomikLo import display_images
+from plant_analysis import PlantAnalyzer
+SIZES = (("1080p", 1920, 1080), ("4K", 3840, 2160))
+LABEL = (640, 480)
+REPEATS = 10
+def legacy_show(image):
+    """Прежний код handle_photo_taken для одного изображения"""
+    height, width, channel = image.shape
+    q_img = QImage(image.data, width, height, 3 * width, QImage.Format.Format_RGB888).rgbSwapped()
+    return QPixmap.fromImage(q_img).scaled(LABEL[0], LABEL[1], Qt.AspectRatioMode.KeepAspectRatio)
+def show(image):
+    height, width = image.shape[:2]
+    return QPixmap.fromImage(QImage(image.data, width, height, image.strides[0], QImage.Format.Format_RGB888))
+def timed(function, *args):
+    times = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        function(*args)
+        times.append(time.perf_counter() - started)
+    return np.median(times) * 1000
+def main():
+    app = QApplication([])
+    for name, width, height in SIZES:
+        frame = make_scene(width, height, 0)
+        analyzer = PlantAnalyzer(log=print)
+        analyzer.analyze_frame(frame)
+        legacy = timed(lambda: (legacy_show(analyzer.original_image), legacy_show(analyzer.render_detection())))
+        worker = timed(display_images, cv2, analyzer.original_image, analyzer.plant_contours, LABEL)
+        original, overlay = display_images(cv2, analyzer.original_image, analyzer.plant_contours, LABEL)
+        ui = timed(lambda: (show(original), show(overlay)))
+        print(f"{name:6s}: интерфейс раньше {legacy:6.1f} мс, теперь {ui:4.2f} мс; "
+              f"подготовка в потоке снимка {worker:5.1f} мс")
+    app.quit()
+if __name__ == '__main__':
+    main()
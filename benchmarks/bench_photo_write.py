@@ -0,0 +1,69 @@
+"""Запись снимка: прежние два JPEG и отчет против фото с файлом контуров, в разных форматах
+
+Прежний save_photo_locally писал в потоке снимка исходный кадр и такой же кадр с контурами (два
+полных JPEG). Теперь пишется один кадр и контуры векторами, а в потоке снимка остается только
+PhotoWriter.submit. Сцена - синтетический куст из bench_plant_roi.
+Запуск из корня репозитория: python benchmarks/bench_photo_write.py
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+import cv2
+import numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_plant_roi import make_scene
+from plant_analysis import PlantAnalyzer
+from photo_writer import PhotoWriter, write_capture, render_analysis, render_mask, load_contours, analysis_path
+SIZES = (("1080p", 1920, 1080), ("4K", 3840, 2160))
+FORMATS = (("jpeg", 95), ("webp", 90), ("png", 3))
+REPEATS = 3
+def legacy_save(directory, timestamp, original, detection, report):
+    cv2.imwrite(os.path.join(directory, f"greenhouse_photo_{timestamp}.jpg"), original)
+    cv2.imwrite(os.path.join(directory, f"greenhouse_analysis_{timestamp}.jpg"), detection)
+    with open(os.path.join(directory, f"greenhouse_report_{timestamp}.txt"), 'w', encoding='utf-8') as f:
+        f.write(report)
+def measure(save):
+    """Медианное время записи и размер файлов одного снимка"""
+    times, size = [], 0
+    for repeat in range(REPEATS):
+        directory = tempfile.mkdtemp()
+        try:
+            started = time.perf_counter()
+            save(directory, f"{repeat:03d}")
+            times.append(time.perf_counter() - started)
+            size = sum(entry.stat().st_size for entry in os.scandir(directory))
+        finally:
+            shutil.rmtree(directory)
+    return np.median(times) * 1000, size / 1024
+def main():
+    report = "АНАЛИЗ СОСТОЯНИЯ РАСТЕНИЯ\n" * 10
+    for name, width, height in SIZES:
+        analyzer = PlantAnalyzer(log=print)
+        analyzer.analyze_frame(make_scene(width, height, 0))
+        image, contours = analyzer.original_image, analyzer.plant_contours
+        legacy_ms, legacy_kb = measure(lambda d, t: legacy_save(d, t, image, analyzer.render_detection(), report))
+        print(f"{name}: два JPEG {legacy_ms:6.1f} мс, {legacy_kb:7.0f} КБ")
+        for codec, quality in FORMATS:
+            ms, kb = measure(lambda d, t: write_capture(d, t, image, contours, report, codec, quality))
+            print(f"{name}: {codec:4s} + контуры {ms:6.1f} мс, {kb:7.0f} КБ")
+        directory = tempfile.mkdtemp()
+        try:
+            writer = PhotoWriter(directory, log=lambda message: None)
+            started = time.perf_counter()
+            writer.submit(image, contours, report, "queued")
+            submitted = time.perf_counter() - started
+            writer.close()
+            photo = os.path.join(directory, "greenhouse_photo_queued.jpg")
+            shape, loaded = load_contours(analysis_path(photo))
+            assert np.array_equal(render_mask(shape, loaded), analyzer.plant_mask), "маска по контурам не совпала"
+            started = time.perf_counter()
+            render_analysis(photo)
+            rendered = time.perf_counter() - started
+        finally:
+            shutil.rmtree(directory)
+        print(f"{name}: поток снимка ждет submit {submitted * 1000:.2f} мс; "
+              f"изображение с контурами по запросу {rendered * 1000:.1f} мс; маска восстанавливается точно")
+if __name__ == '__main__':
+    main()
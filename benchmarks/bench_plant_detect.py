@@ -0,0 +1,103 @@
+"""Классификация цветов листьев: прежний detect_plant (cv2.inRange на каждый цвет дважды) против одного прохода по таблицам
+
+Отдельно замеряется стадия, которую заменила классификация: поиск и рисование контуров в обоих вариантах одинаковы.
+
+Кадры синтетические: гладкий шум оттенка, насыщенности и яркости, в котором есть все классы цветов
+и пиксели на границах диапазонов. Перед замером проверяется, что маска растения и проценты цветов совпадают.
+Запуск из корня репозитория: python benchmarks/bench_plant_detect.py
+"""
+import os
+import sys
+import time
+import cv2
+import numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from plant_analysis import PlantAnalyzer, classify_pixels, plant_outline_mask, color_percentages
+SIZES = (("720p", 1280, 720), ("1080p", 1920, 1080), ("4K", 3840, 2160))
+REPEATS = 5
+LEGACY_COLORS = {
+    "healthy_green": {"lower": np.array([35, 30, 30]), "upper": np.array([85, 255, 255])},
+    "yellow": {"lower": np.array([20, 30, 30]), "upper": np.array([35, 255, 255])},
+    "brown": {"lower": np.array([10, 30, 10]), "upper": np.array([20, 255, 255])},
+    "light_green": {"lower": np.array([35, 30, 30]), "upper": np.array([85, 100, 255])}
+}
+def legacy_detect(image):
+    """Прежний detect_plant, включая рисование контуров на копии кадра"""
+    height, width = image.shape[:2]
+    hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+    total_mask = np.zeros((height, width), dtype=np.uint8)
+    for color_range in LEGACY_COLORS.values():
+        mask = cv2.inRange(hsv, color_range["lower"], color_range["upper"])
+        kernel = np.ones((3, 3), np.uint8)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
+        total_mask = cv2.bitwise_or(total_mask, mask)
+    contours, _ = cv2.findContours(total_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    contours = [c for c in contours if cv2.contourArea(c) > 100]
+    detection_image = image.copy()
+    cv2.drawContours(detection_image, contours, -1, (0, 255, 0), 2)
+    plant_mask = np.zeros_like(total_mask)
+    cv2.drawContours(plant_mask, contours, -1, 255, -1)
+    plant_pixels = np.count_nonzero(plant_mask)
+    percentages = {}
+    if plant_pixels > 0:
+        for color_name, color_range in LEGACY_COLORS.items():
+            mask = cv2.inRange(hsv, color_range["lower"], color_range["upper"])
+            percentages[color_name] = (cv2.countNonZero(cv2.bitwise_and(mask, plant_mask)) / plant_pixels) * 100
+    return plant_mask, percentages
+def legacy_classify(hsv, plant_mask):
+    """Только та часть, которую заменила классификация по таблицам: маски цветов, морфология и проценты"""
+    total_mask = np.zeros(hsv.shape[:2], dtype=np.uint8)
+    for color_range in LEGACY_COLORS.values():
+        mask = cv2.inRange(hsv, color_range["lower"], color_range["upper"])
+        kernel = np.ones((3, 3), np.uint8)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
+        total_mask = cv2.bitwise_or(total_mask, mask)
+    for color_range in LEGACY_COLORS.values():
+        mask = cv2.inRange(hsv, color_range["lower"], color_range["upper"])
+        cv2.countNonZero(cv2.bitwise_and(mask, plant_mask))
+    return total_mask
+def current_classify(hsv, plant_mask):
+    labels = classify_pixels(hsv)
+    total_mask = plant_outline_mask(labels)
+    color_percentages(labels, plant_mask, 1)
+    return total_mask
+def current_detect(image):
+    analyzer = PlantAnalyzer(log=print)
+    analyzer.original_image = image
+    analyzer.detect_plant(*image.shape[:2])
+    analyzer.render_detection()
+    return analyzer.plant_mask, analyzer.color_percentages
+def make_frame(width, height, seed):
+    rng = np.random.default_rng(seed)
+    channels = []
+    for high in (180, 256, 256):
+        small = rng.integers(0, high, size=(height // 16 + 1, width // 16 + 1)).astype(np.float32)
+        channels.append(np.clip(cv2.resize(small, (width, height), interpolation=cv2.INTER_CUBIC), 0, high - 1))
+    hsv = cv2.merge([c.astype(np.uint8) for c in channels])
+    return cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)
+def timed(function, *args):
+    best = float('inf')
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        function(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+def main():
+    for name, width, height in SIZES:
+        image = make_frame(width, height, seed=width)
+        old_mask, old_percentages = legacy_detect(image)
+        new_mask, new_percentages = current_detect(image)
+        assert np.array_equal(old_mask, new_mask), f"{name}: маски растения различаются"
+        assert old_percentages == new_percentages, f"{name}: {old_percentages} != {new_percentages}"
+        old = timed(legacy_detect, image)
+        new = timed(current_detect, image)
+        hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+        old_stage = timed(legacy_classify, hsv, new_mask)
+        new_stage = timed(current_classify, hsv, new_mask)
+        print(f"{name:6s}: detect_plant целиком {old * 1000:7.1f} -> {new * 1000:7.1f} мс ({old / new:.2f}x); "
+              f"классификация, морфология и проценты {old_stage * 1000:6.1f} -> {new_stage * 1000:6.1f} мс "
+              f"({old_stage / new_stage:.2f}x); результаты совпадают")
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Быстрый анализ растения (поиск на уменьшенном кадре и обработка внутри рамки) против полного кадра
+
+Сцена синтетическая: серый фон с шумом и куст из листьев-эллипсов разных оттенков зеленого
+с желтыми и коричневыми пятнами; куст занимает около десятой части кадра, рассада - около
+пятидесятой. Выигрыш почти пропорционален доле кадра, которую занимает рамка. Между снимками куст немного
+сдвигается, как при реальной съемке; рамка с прошлого снимка берется из ROI_TRACKER.
+Для каждого снимка сравниваются проценты цветов с полным анализом того же кадра.
+Запуск из корня репозитория: python benchmarks/bench_plant_roi.py
+"""
+import os
+import sys
+import time
+import cv2
+import numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import plant_analysis
+from plant_analysis import PlantAnalyzer, ROI_TRACKER, LEAF_COLORS
+SIZES = (("1080p", 1920, 1080), ("4K", 3840, 2160))
+SCENES = (("куст", 5), ("рассада", 12))
+SHOTS = 6
+def make_scene(width, height, shift, seed=0, size=5):
+    """Кадр BGR с кустом радиусом в 1/size меньшей стороны в центре, сдвинутым на shift пикселей"""
+    rng = np.random.default_rng(seed)
+    hsv = np.empty((height, width, 3), dtype=np.uint8)
+    hsv[..., 0] = rng.integers(0, 180, (height, width))
+    hsv[..., 1] = rng.integers(0, 25, (height, width))
+    hsv[..., 2] = rng.integers(90, 140, (height, width))
+    center_x, center_y = width // 2 + shift, height // 2 + shift // 2
+    radius = min(width, height) // size
+    leaves = np.random.default_rng(1)
+    for _ in range(40):
+        angle = leaves.uniform(0, 2 * np.pi)
+        distance = leaves.uniform(0, radius)
+        x = int(center_x + distance * np.cos(angle))
+        y = int(center_y + distance * np.sin(angle))
+        axes = (int(radius * leaves.uniform(0.15, 0.35)), int(radius * leaves.uniform(0.06, 0.15)))
+        color = (int(leaves.integers(40, 80)), int(leaves.integers(60, 230)), int(leaves.integers(80, 220)))
+        cv2.ellipse(hsv, (x, y), axes, float(np.degrees(angle)), 0, 360, color, -1)
+        if leaves.random() < 0.4:
+            spot = (int(leaves.integers(10, 34)), 180, 150)
+            cv2.circle(hsv, (x, y), max(axes[1] // 2, 2), spot, -1)
+    noise = rng.integers(-4, 5, (height, width), dtype=np.int16)
+    hsv[..., 2] = np.clip(hsv[..., 2].astype(np.int16) + noise, 0, 255).astype(np.uint8)
+    return cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)
+def analyze(frame, fast):
+    analyzer = PlantAnalyzer(log=print, fast=fast)
+    started = time.perf_counter()
+    analyzer.original_image = frame
+    analyzer.detect_plant(*frame.shape[:2])
+    return time.perf_counter() - started, analyzer
+def main():
+    print(f"Допуск по процентам цветов: {plant_analysis.ROI_TOLERANCE} п.п.")
+    for scene, size in SCENES:
+        for name, width, height in SIZES:
+            ROI_TRACKER.update(0, (height, width), None)
+            frames = [make_scene(width, height, shot * width // 200, shot, size) for shot in range(SHOTS)]
+            full_times, fast_times, errors, fallbacks = [], [], [], 0
+            for frame in frames:
+                full_time, full = analyze(frame, fast=False)
+                fast_time, fast = analyze(frame, fast=True)
+                full_times.append(full_time)
+                fast_times.append(fast_time)
+                fallbacks += fast.roi is None
+                errors.append(max(abs(full.color_percentages.get(color, 0.0) - fast.color_percentages.get(color, 0.0))
+                                  for color in LEAF_COLORS))
+            full_ms = np.median(full_times) * 1000
+            fast_ms = np.median(fast_times) * 1000
+            print(f"{scene:8s} {name:6s}: полный кадр {full_ms:6.1f} мс, быстрый {fast_ms:5.1f} мс "
+                  f"({full_ms / fast_ms:4.1f}x), полных анализов {fallbacks}/{SHOTS}, "
+                  f"наибольшее расхождение {max(errors):.2f} п.п.")
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Пропуск повторных кадров: сравнение миниатюр против полного анализа и записи каждого снимка
+
+Серия из SHOTS снимков одной и той же сцены (меняется только шум камеры), как в режиме "Каждые 10 минут"
+или ночью с выключенной лампой. Без пропуска каждый снимок проходит полный анализ и пишет фото с контурами;
+с пропуском повторный кадр стоит одной миниатюры и короткого отчета. Отдельно проверяется, что сдвинутое
+и подросшее растение и выключенная лампа повторными не считаются.
+Запуск из корня репозитория: python benchmarks/bench_scene_dedup.py
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+import numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_plant_roi import make_scene
+from plant_analysis import PlantAnalyzer, SCENE_CACHE, SCENE_THRESHOLD, scene_change, scene_thumbnail
+from photo_writer import PhotoWriter
+SIZES = (("1080p", 1920, 1080), ("4K", 3840, 2160))
+SHOTS = 6
+def capture_series(frames, scene_threshold):
+    """Время анализа и сохранения серии (с ожиданием записи) и размер папки снимков"""
+    directory = tempfile.mkdtemp()
+    try:
+        SCENE_CACHE.update(0, None)
+        writer = PhotoWriter(directory, log=lambda message: None)
+        started = time.perf_counter()
+        reused = 0
+        for shot, frame in enumerate(frames):
+            analyzer = PlantAnalyzer(log=lambda message: None, fast=True, writer=writer, scene_threshold=scene_threshold)
+            analysis = analyzer.analyze_frame(frame)
+            analyzer.writer.submit(analyzer.original_image, analyzer.plant_contours, str(analysis),
+                                   f"{shot:03d}", {"camera": 0}, analyzer.reused)
+            reused += analyzer.reused
+        writer.close()
+        elapsed = time.perf_counter() - started
+        size = sum(entry.stat().st_size for entry in os.scandir(directory))
+    finally:
+        shutil.rmtree(directory)
+    return elapsed * 1000 / len(frames), size / 1024, reused
+def main():
+    print(f"Порог: {SCENE_THRESHOLD}% клеток миниатюры")
+    for name, width, height in SIZES:
+        frames = [make_scene(width, height, 0, seed) for seed in range(SHOTS)]
+        started = time.perf_counter()
+        for frame in frames:
+            scene_thumbnail(frame)
+        thumbnail_ms = (time.perf_counter() - started) * 1000 / SHOTS
+        full_ms, full_kb, _ = capture_series(frames, 0.0)
+        dedup_ms, dedup_kb, reused = capture_series(frames, SCENE_THRESHOLD)
+        print(f"{name}: миниатюра {thumbnail_ms:.2f} мс; на снимок без пропуска {full_ms:6.1f} мс, "
+              f"с пропуском {dedup_ms:6.1f} мс; на диске {full_kb:7.0f} КБ против {dedup_kb:6.0f} КБ "
+              f"(повторных {reused} из {SHOTS})")
+        base = scene_thumbnail(frames[0])
+        dark = [np.clip(make_scene(width, height, 0, seed) * 0.08, 0, 255).astype(np.uint8) for seed in (0, 1)]
+        checks = (("шум камеры", frames[1], True),
+                  ("растение сдвинулось на 1% ширины", make_scene(width, height, width // 100, 1), False),
+                  ("растение подросло на 5%", make_scene(width, height, 0, 1, 5 / 1.05), False),
+                  ("лампа выключилась", dark[0], False))
+        for label, frame, expected in checks:
+            changed = scene_change(base, scene_thumbnail(frame))
+            assert (changed <= SCENE_THRESHOLD) == expected, f"{label}: изменилось {changed:.2f}%"
+            print(f"  {label}: изменилось {changed:.2f}% миниатюры - {'повтор' if expected else 'новый анализ'}")
+        changed = scene_change(scene_thumbnail(dark[0]), scene_thumbnail(dark[1]))
+        assert changed <= SCENE_THRESHOLD, f"темные кадры: изменилось {changed:.2f}%"
+        print(f"  два темных кадра: изменилось {changed:.2f}% миниатюры - повтор")
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""Замер записи и запросов по интервалу времени в sensor_store при растущей истории
+
+Запуск из корня репозитория: python benchmarks/bench_sensor_store.py
+"""
+import os
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sensor_store import SensorStore
+DEVICES = ('greenhouse-1', 'greenhouse-2', 'greenhouse-3', 'greenhouse-4')
+STEP = 5.0
+def fill(store, start, count):
+    for i in range(count):
+        ts = start + i * STEP
+        for device in DEVICES:
+            store.add(device, {'temperature': 20 + i % 10, 'humidity': 40.0, 'soil': 55.0}, ts)
+def query_latency(store, end):
+    best = None
+    for _ in range(20):
+        t0 = time.perf_counter()
+        rows = store.query('greenhouse-2', 'temperature', end - 3600, end)
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, len(rows)
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SensorStore(os.path.join(tmp, 'readings.db'), batch_size=2000)
+        store.start()
+        start = 1_700_000_000.0
+        total = 0
+        for chunk in (10_000, 40_000, 150_000, 300_000):
+            t0 = time.perf_counter()
+            fill(store, start + total * STEP, chunk)
+            store.close()
+            write_time = time.perf_counter() - t0
+            rows = chunk * len(DEVICES) * 3
+            total += chunk
+            store.start()
+            latency, found = query_latency(store, start + total * STEP)
+            days = total * STEP / 86400
+            print(f"история {days:6.1f} сут ({total * len(DEVICES) * 3:>9} строк): "
+                  f"запись {rows / write_time:10,.0f} строк/с, запрос за 1 ч ({found} точек) {latency * 1000:.2f} мс")
+        store.close()
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Микробенчмарк разбора строк: старая цепочка if/elif против serial_parser.parse_line
+
+Строки с показаниями и полный поток прошивки повторяются, как при стабильных условиях в теплице, и
+serial_parser берет их из словаря недавних строк. Третий случай - каждая строка DHT новая
+(влажность почвы целая и повторяется): так видна цена самого разбора без словаря.
+Запуск из корня репозитория: python benchmarks/bench_serial_parser.py
+"""
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from serial_parser import parse_line
+READING_LINES = [
+    "Soil moisture: 43%",
+    "Humidity: 41.30% Temperature: 24.60°C",
+]
+SAMPLE_LINES = READING_LINES + [
+    "Device states:",
+    "Lamp: ON",
+    "Curtains: OPEN",
+    "Pump: OFF",
+    "Fan: OFF",
+    "Current time: 2024-05-01 13:00:05",
+    "Failed to read from DHT sensor!",
+    "Pump turned ON: low soil moisture",
+]
+def changing_readings(count):
+    """count разных строк показаний: влажность и температура с шагом 0.01, влажность почвы целая"""
+    lines = []
+    for index in range(count // 2):
+        lines.append(f"Soil moisture: {index % 100}%")
+        lines.append(f"Humidity: {30 + index % 5000 / 100:.2f}% Temperature: {15 + index // 5000 / 100:.2f}°C")
+    return lines
+def legacy_parse(line):
+    """Копия разбора из ArduinoReader.run до появления serial_parser"""
+    data = {}
+    if "Humidity" in line and "Temperature" in line:
+        try:
+            parts = line.split("Temperature:")
+            humidity_part = parts[0].strip()
+            temperature_part = parts[1].strip()
+            hum_value = humidity_part.split(":")[1].replace("%", "").strip()
+            data['humidity'] = float(hum_value)
+            temp_value = temperature_part.replace("°C", "").strip()
+            data['temperature'] = float(temp_value)
+        except Exception:
+            pass
+    elif "Temperature" in line and "Humidity" not in line:
+        try:
+            temp_str = line.split(":")[1].replace("C", "").replace("°", "").strip()
+            data['temperature'] = float(temp_str)
+        except Exception:
+            pass
+    elif "Humidity" in line and "Soil" not in line and "Temperature" not in line:
+        try:
+            hum_str = line.split(":")[1].replace("%", "").strip()
+            data['humidity'] = float(hum_str)
+        except Exception:
+            pass
+    elif "Soil moisture" in line:
+        try:
+            soil_str = line.split(":")[1].replace("%", "").strip()
+            data['soil'] = float(soil_str)
+        except Exception:
+            pass
+    return data
+def run(func, lines):
+    start = time.perf_counter()
+    for line in lines:
+        func(line)
+    return time.perf_counter() - start
+def report(title, lines, repeat=9):
+    """Замеры обоих разборов чередуются, и берется лучший из repeat: фоновая нагрузка на машине
+    одинаково задевает оба, а не только тот, что шел вторым"""
+    legacy = table = None
+    for _ in range(repeat):
+        elapsed = run(legacy_parse, lines)
+        legacy = elapsed if legacy is None else min(legacy, elapsed)
+        elapsed = run(parse_line, lines)
+        table = elapsed if table is None else min(table, elapsed)
+    print(f"{title} ({len(lines)} строк)")
+    print(f"  if/elif:       {len(lines) / legacy:12,.0f} строк/с")
+    print(f"  serial_parser: {len(lines) / table:12,.0f} строк/с  ({legacy / table:.2f}x)")
+def main():
+    report("строки с показаниями", READING_LINES * 100000)
+    report("полный поток прошивки", SAMPLE_LINES * 20000)
+    report("меняющиеся показания, каждая строка DHT новая", changing_readings(200000))
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Настройки: прежняя перезапись fitodomik_config.json на каждое изменение против Settings в памяти
+Прежнее окно переписывало файл настроек целиком при каждом изменении виджета и перед каждым снимком,
+в том числе по расписанию. Здесь CHANGES изменений подряд, как при прокрутке поля "Допуск быстрого
+анализа": замеряется стоимость одного изменения в вызывающем потоке и сколько раз файл записан на диск.
+Запуск из корня репозитория: python benchmarks/bench_settings.py
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app_settings import DEFAULTS, Settings
+CHANGES = 1000
+CONTROLLERS = {f"COM{idx}": {"temp_min": 20.0, "temp_max": 28.0, "light_on": "07:00", "light_off": "21:00"}
+               for idx in range(4)}
+def old_save(path, settings):
+    with open(path, 'w') as f:
+        json.dump(settings, f, indent=4)
+def main():
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, "fitodomik_config.json")
+        settings = dict(DEFAULTS, controllers=CONTROLLERS)
+        started = time.perf_counter()
+        for idx in range(CHANGES):
+            settings["analysis_tolerance"] = 0.5 + idx % 40 * 0.5
+            old_save(path, settings)
+        old_us = (time.perf_counter() - started) * 1e6 / CHANGES
+        print(f"перезапись файла на каждое изменение: {old_us:7.1f} мкс в потоке интерфейса, записей {CHANGES}")
+        writes = []
+        store = Settings(path, log=print, save_delay=0.2)
+        store.load()
+        flush = store.flush
+        store.flush = lambda: (store.dirty_since is not None and writes.append(time.monotonic()), flush())
+        started = time.perf_counter()
+        for idx in range(CHANGES):
+            store.set("analysis_tolerance", 1.0 + idx % 40 * 0.5)
+        new_us = (time.perf_counter() - started) * 1e6 / CHANGES
+        time.sleep(0.5)
+        store.close()
+        with open(path, encoding='utf-8') as f:
+            saved = json.load(f)["profiles"]
+        assert next(iter(saved.values()))["analysis_tolerance"] == store.analysis_tolerance
+        print(f"Settings.set с отложенной записью:    {new_us:7.1f} мкс в потоке интерфейса, записей {len(writes)}")
+        started = time.perf_counter()
+        for _ in range(CHANGES):
+            store.get("camera_index")
+        print(f"чтение настройки из памяти: {(time.perf_counter() - started) * 1e6 / CHANGES:.2f} мкс")
+    finally:
+        shutil.rmtree(directory)
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""Время запуска и память двух режимов: приложение с интерфейсом и служба fitodomik_daemon
+
+Каждый режим запускается в отдельном процессе: импорт модуля, создание главного объекта
+без подключения к портам. Пиковая память берется из getrusage (Linux, ru_maxrss в КБ),
+поэтому скрипт рассчитан на Linux.
+Запуск из корня репозитория: python benchmarks/bench_startup.py
+"""
+import json
+import os
+import subprocess
+import sys
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNS = 5
+HEAVY = ('PyQt6.QtWidgets', 'matplotlib', 'cv2', 'numpy', 'requests')
+GUI = """
+from PyQt6.QtWidgets import QApplication
+app = QApplication([])
+import FitoDomikLo
+FitoDomikLo.MainWindow.auto_connect_arduino = lambda self: None
+window = FitoDomikLo.MainWindow()
+window.sensor_store.close()
+"""
+DAEMON = """
+import fitodomik_daemon
+service = fitodomik_daemon.HeadlessService(ports=[], db_path=':memory:')
+"""
+PROBE = """
+import json, resource, sys, tempfile, time, os
+os.environ['HOME'] = tempfile.mkdtemp()
+started = time.perf_counter()
+exec(sys.argv[1])
+elapsed = time.perf_counter() - started
+print(json.dumps({'elapsed': elapsed, 'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+                  'heavy': [m for m in sys.argv[2].split(',') if m in sys.modules]}))
+"""
+def measure(code):
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    results = []
+    for _ in range(RUNS):
+        output = subprocess.run([sys.executable, '-c', PROBE, code, ','.join(HEAVY)], cwd=ROOT, env=env,
+                                capture_output=True, text=True, check=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    results.sort(key=lambda r: r['elapsed'])
+    return results[len(results) // 2]
+def main():
+    for name, code in (('интерфейс', GUI), ('служба', DAEMON)):
+        result = measure(code)
+        print(f"{name:10s}: запуск {result['elapsed'] * 1000:6.0f} мс, пиковая память {result['rss_mb']:6.1f} МБ, "
+              f"загружены: {', '.join(result['heavy']) or 'ничего тяжелого'}")
+if __name__ == '__main__':
+    main()
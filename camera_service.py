@@ -0,0 +1,160 @@
+"""Долгоживущая сессия камеры: один поток держит устройство открытым и отдает свежий кадр по запросу"""
+import threading
+import time
+class CameraService:
+    """Единственный владелец камеры.
+
+    Поток открывает устройство, пропускает кадры прогрева, пока не установится экспозиция,
+    и затем непрерывно вызывает grab(), чтобы в буфере драйвера не копились старые кадры.
+    Декодирование (retrieve) выполняется только когда кто-то ждет кадр, поэтому capture()
+    возвращает кадр, снятый после запроса, не позже чем через один интервал кадров.
+    При ошибках устройство закрывается и открывается заново; пока камера недоступна, пауза между
+    попытками растет до max_reopen_delay, а одинаковые ошибки пишутся в журнал один раз.
+    Если кадр никто не запрашивал idle_timeout секунд, устройство закрывается, и поток спит до следующего
+    запроса, который снова открывает камеру с прогревом. После close() сервис больше не запускается.
+    OpenCV импортируется в потоке камеры, чтобы приложение без снимков его не загружало.
+    """
+    def __init__(self, camera_index=0, log=print, warmup_frames=5, max_warmup_frames=60, warmup_seconds=0.5,
+                 reopen_delay=2.0, max_reopen_delay=60.0, max_read_failures=5, idle_timeout=60.0):
+        self.camera_index = camera_index
+        self.log = log
+        self.warmup_frames = warmup_frames
+        self.max_warmup_frames = max_warmup_frames
+        self.warmup_seconds = warmup_seconds
+        self.reopen_delay = reopen_delay
+        self.max_reopen_delay = max_reopen_delay
+        self.last_error = None
+        self.max_read_failures = max_read_failures
+        self.idle_timeout = idle_timeout
+        self.requested_at = time.monotonic()
+        self.condition = threading.Condition()
+        self.frame = None
+        self.frame_seq = 0
+        self.waiting = 0
+        self.reopen = False
+        self.running = False
+        self.closed = False
+        self.thread = None
+    def start(self):
+        if self.running or self.closed:
+            return
+        self.requested_at = time.monotonic()
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="CameraService", daemon=True)
+        self.thread.start()
+    def set_camera(self, camera_index):
+        """Переключает сервис на другую камеру; текущее устройство закрывается в потоке камеры"""
+        with self.condition:
+            if camera_index == self.camera_index:
+                return
+            self.camera_index = camera_index
+            self.reopen = True
+            self.condition.notify_all()
+    def capture(self, timeout=10.0):
+        """Ждет кадр, снятый после вызова, и возвращает его копию; None, если камера не ответила за timeout"""
+        with self.condition:
+            seq = self.frame_seq
+        frame = self.next_frame(seq, timeout)[1]
+        return None if frame is None else frame.copy()
+    def next_frame(self, seq, timeout=1.0):
+        """Ждет кадр новее номера seq и возвращает (номер, кадр) без копии - кадр нельзя менять на месте.
+        Промежуточные кадры пропускаются: отдается всегда последний. (seq, None), если кадра не было за timeout
+        или сервис уже закрыт."""
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            if self.closed:
+                return seq, None
+            self.start()
+            self.requested_at = time.monotonic()
+            self.waiting += 1
+            self.condition.notify_all()
+            try:
+                while self.running and self.frame_seq == seq:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return seq, None
+                    self.condition.wait(remaining)
+                if self.frame_seq == seq:
+                    return seq, None
+                return self.frame_seq, self.frame
+            finally:
+                self.waiting -= 1
+    def run(self):
+        import cv2
+        delay = self.reopen_delay
+        while self.running:
+            with self.condition:
+                camera_index = self.camera_index
+                self.reopen = False
+            cap = self.open(cv2, camera_index)
+            if cap is None:
+                self.sleep(delay)
+                delay = min(delay * 2, self.max_reopen_delay)
+                continue
+            delay = self.reopen_delay
+            self.last_error = None
+            failures = 0
+            idle = False
+            while self.running and not self.reopen and failures < self.max_read_failures:
+                if not self.waiting and time.monotonic() - self.requested_at > self.idle_timeout:
+                    idle = True
+                    break
+                if not cap.grab():
+                    failures += 1
+                    continue
+                failures = 0
+                if self.waiting:
+                    ok, frame = cap.retrieve()
+                    if ok:
+                        self.publish(frame)
+            cap.release()
+            if idle:
+                self.log(f"📷 Камера {camera_index} закрыта: кадры не запрашивались {self.idle_timeout:.0f} с")
+                with self.condition:
+                    self.condition.wait_for(lambda: not self.running or self.waiting)
+            elif failures >= self.max_read_failures:
+                self.report(f"❌ Камера {camera_index} перестала отдавать кадры, переподключение...")
+                self.sleep(self.reopen_delay)
+    def open(self, cv2, camera_index):
+        """Открывает камеру и пропускает кадры прогрева; None, если устройство недоступно"""
+        started = time.monotonic()
+        cap = cv2.VideoCapture(camera_index)
+        if not cap.isOpened():
+            cap.release()
+            self.report(f"❌ Ошибка подключения камеры {camera_index}")
+            return None
+        frames = 0
+        previous = None
+        while self.running and frames < self.max_warmup_frames:
+            ok, frame = cap.read()
+            if not ok:
+                cap.release()
+                self.report(f"❌ Камера {camera_index} не отдает кадры")
+                return None
+            frames += 1
+            brightness = float(frame.mean())
+            settled = previous is not None and abs(brightness - previous) <= max(previous * 0.02, 1.0)
+            previous = brightness
+            if frames >= self.warmup_frames and time.monotonic() - started >= self.warmup_seconds and settled:
+                break
+        self.log(f"📷 Камера {camera_index} готова за {time.monotonic() - started:.1f} с (кадров прогрева: {frames})")
+        return cap
+    def report(self, message):
+        if message != self.last_error:
+            self.last_error = message
+            self.log(message)
+    def publish(self, frame):
+        with self.condition:
+            self.frame = frame
+            self.frame_seq += 1
+            self.condition.notify_all()
+    def sleep(self, seconds):
+        with self.condition:
+            self.condition.wait_for(lambda: not self.running or self.reopen, seconds)
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.running = False
+            self.condition.notify_all()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()
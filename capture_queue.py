@@ -0,0 +1,147 @@
+"""Очередь снимков: один рабочий поток на камеру, поэтому снимки одной камеры никогда не идут одновременно"""
+import collections
+import threading
+import time
+from metrics import METRICS
+WAIT_TIME = METRICS.histogram("fitodomik_capture_wait_seconds", "Ожидание снимка в очереди камеры")
+RUN_TIME = METRICS.histogram("fitodomik_capture_run_seconds", "Снимок с анализом в потоке камеры")
+class CaptureJob:
+    """Заявка на снимок. sources - кто его запросил (кнопка, расписание); повторные запросы, пришедшие
+    до начала съемки, добавляются сюда же. После выполнения result - результат run, error - исключение."""
+    def __init__(self, camera_index, source, params):
+        self.camera_index = camera_index
+        self.sources = [source]
+        self.params = params
+        self.callbacks = []
+        self.submitted = time.monotonic()
+        self.started = None
+        self.finished = None
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+    def wait(self, timeout=None):
+        """Ждет окончания снимка и возвращает результат (None при ошибке, отмене или таймауте)"""
+        self.done.wait(timeout)
+        return self.result
+    def wait_time(self):
+        return self.started - self.submitted
+    def run_time(self):
+        return self.finished - self.started
+class CaptureQueue:
+    """Заявки на снимки с одним рабочим потоком на каждую камеру.
+
+    run(job) выполняется в потоке камеры и возвращает результат снимка. У камеры не больше одной
+    ожидающей заявки: запрос, пришедший, пока заявка еще не началась, объединяется с ней (параметры
+    остаются от первого запроса), а запрос во время съемки ставит одну новую заявку. callback(job)
+    вызывается в потоке камеры, одинаковые callback объединенных запросов - один раз; в интерфейс
+    результат нужно передавать сигналом.
+    stats() - глубина очереди, счетчики и задержки последних history снимков.
+    device(camera_index) - устройство, через которое снимает камера: снимки одного устройства идут по очереди
+    в одном потоке. По умолчанию это сам индекс камеры; если все камеры снимают через один CameraService,
+    device возвращает его, и смена камеры во время снимка не дает двум потокам снимать одновременно.
+    """
+    def __init__(self, run, log=print, history=100, device=None):
+        self.run_job = run
+        self.log = log
+        self.device = device or (lambda camera_index: camera_index)
+        self.condition = threading.Condition()
+        self.pending = {}
+        self.running = {}
+        self.workers = {}
+        self.closed = False
+        self.counters = collections.Counter()
+        self.waits = collections.deque(maxlen=history)
+        self.runs = collections.deque(maxlen=history)
+    def submit(self, camera_index, source="", params=None, callback=None):
+        """Ставит снимок камеры в очередь; возвращает CaptureJob или None, если очередь закрыта"""
+        with self.condition:
+            if self.closed:
+                return None
+            self.counters["submitted"] += 1
+            device = self.device(camera_index)
+            job = self.pending.get(device)
+            if job is not None:
+                job.sources.append(source)
+                self.counters["coalesced"] += 1
+                self.log(f"⏳ Снимок камеры {job.camera_index} уже в очереди ({', '.join(job.sources)})")
+            else:
+                job = CaptureJob(camera_index, source, params)
+                self.pending[device] = job
+                if device not in self.workers:
+                    self.start_worker(device, camera_index)
+                self.condition.notify_all()
+            if callback is not None and callback not in job.callbacks:
+                job.callbacks.append(callback)
+            return job
+    def start_worker(self, device, camera_index):
+        worker = threading.Thread(target=self.work, args=(device,), name=f"CaptureQueue-{camera_index}", daemon=True)
+        self.workers[device] = worker
+        worker.start()
+    def work(self, device):
+        try:
+            while True:
+                with self.condition:
+                    while device not in self.pending and not self.closed:
+                        self.condition.wait()
+                    if self.closed:
+                        return
+                    job = self.pending.pop(device)
+                    self.running[device] = job
+                    job.started = time.monotonic()
+                try:
+                    job.result = self.run_job(job)
+                except Exception as e:
+                    job.error = e
+                    self.log(f"❌ Ошибка при выполнении фотографирования: {str(e)}")
+                job.finished = time.monotonic()
+                with self.condition:
+                    del self.running[device]
+                    self.counters["failed" if job.error is not None else "completed"] += 1
+                    self.waits.append(job.wait_time())
+                    self.runs.append(job.run_time())
+                WAIT_TIME.observe(job.wait_time())
+                RUN_TIME.observe(job.run_time())
+                job.done.set()
+                for callback in job.callbacks:
+                    try:
+                        callback(job)
+                    except Exception as e:
+                        self.log(f"❌ Ошибка обработки результата снимка: {str(e)}")
+        finally:
+            # Поток не должен оставаться в workers после выхода: иначе submit не запустит новый
+            # и следующие снимки этой камеры никогда не начнутся
+            with self.condition:
+                if self.workers.get(device) is threading.current_thread():
+                    del self.workers[device]
+                    if device in self.pending and not self.closed:
+                        self.start_worker(device, self.pending[device].camera_index)
+    def depth(self, camera_index=None):
+        """Ожидающие и идущие снимки одной камеры или всех"""
+        with self.condition:
+            return sum(1 for jobs in (self.pending, self.running) for job in jobs.values()
+                       if camera_index is None or job.camera_index == camera_index)
+    def stats(self):
+        """Снимок метрик: глубина очереди, счетчики, средние и худшие задержки в секундах"""
+        with self.condition:
+            waits, runs = list(self.waits), list(self.runs)
+            stats = {"pending": len(self.pending), "running": len(self.running)}
+            for name in ("submitted", "coalesced", "completed", "failed"):
+                stats[name] = self.counters[name]
+        for name, values in (("wait", waits), ("run", runs)):
+            stats[f"{name}_avg"] = sum(values) / len(values) if values else 0.0
+            stats[f"{name}_max"] = max(values, default=0.0)
+        return stats
+    def close(self):
+        """Отменяет ожидающие снимки, дожидается идущих и останавливает потоки"""
+        with self.condition:
+            self.closed = True
+            cancelled = list(self.pending.values())
+            self.pending.clear()
+            workers = list(self.workers.values())
+            self.workers.clear()
+            self.condition.notify_all()
+        for job in cancelled:
+            job.done.set()
+        for worker in workers:
+            if worker is not threading.current_thread():
+                worker.join()
@@ -0,0 +1,120 @@
+"""Асинхронный канал команд контроллеру: ответы сопоставляются с запросами, у каждой команды свой таймаут"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+class CommandError(Exception):
+    """Команда не выполнена: контроллер ответил ошибкой, канал закрыт или запись в порт не удалась"""
+class CommandTimeout(CommandError):
+    """Контроллер не прислал ожидаемый ответ за отведенное время"""
+class _Pending:
+    __slots__ = ('command', 'data', 'reply', 'error_reply', 'timeout', 'future', 'deadline')
+    def __init__(self, command, data, reply, error_reply, timeout, future):
+        self.command = command
+        self.data = data
+        self.reply = reply
+        self.error_reply = error_reply
+        self.timeout = timeout
+        self.future = future
+        self.deadline = None
+class CommandChannel:
+    """Очередь команд с собственным потоком записи.
+
+    Одновременно в полете держится не больше max_in_flight команд и не больше max_bytes байт:
+    приемный буфер Arduino Uno всего 64 байта, и лишние байты прошивка просто потеряет.
+    write может писать в порт сразу или вернуть Future (как SerialMux.write).
+    Входящие строки передаются в feed_line из потока чтения порта.
+    """
+    def __init__(self, write, max_in_flight=4, max_bytes=60):
+        self.write = write
+        self.max_in_flight = max_in_flight
+        self.max_bytes = max_bytes
+        self.condition = threading.Condition()
+        self.queued = deque()
+        self.in_flight = []
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="CommandChannel", daemon=True)
+        self.thread.start()
+    def send(self, command, reply, timeout=6.0, error_reply=None):
+        """Ставит команду в очередь и сразу возвращает Future, который завершится строкой ответа"""
+        future = Future()
+        pending = _Pending(command, f"{command}\n".encode(), reply, error_reply, timeout, future)
+        with self.condition:
+            if not self.running:
+                future.set_exception(CommandError(f"канал команд закрыт: {command}"))
+                return future
+            self.queued.append(pending)
+            self.condition.notify()
+        return future
+    def feed_line(self, line):
+        """Сопоставляет строку от контроллера с самой старой командой, ответ которой начинает эту строку"""
+        with self.condition:
+            if not self.in_flight:
+                return False
+            for index, pending in enumerate(self.in_flight):
+                if line.startswith(pending.reply):
+                    pending.future.set_result(line)
+                elif pending.error_reply is not None and line.startswith(pending.error_reply):
+                    pending.future.set_exception(CommandError(f"контроллер ответил {line} на {pending.command}"))
+                else:
+                    continue
+                del self.in_flight[index]
+                self.condition.notify()
+                return True
+        return False
+    def can_send(self, pending):
+        if not self.in_flight:
+            return True
+        if len(self.in_flight) >= self.max_in_flight:
+            return False
+        return sum(len(p.data) for p in self.in_flight) + len(pending.data) <= self.max_bytes
+    def expire(self, now):
+        expired = [p for p in self.in_flight if p.deadline <= now]
+        for pending in expired:
+            self.in_flight.remove(pending)
+            pending.future.set_exception(
+                CommandTimeout(f"нет ответа {pending.reply} на {pending.command} за {pending.timeout:g} с")
+            )
+    def run(self):
+        while True:
+            with self.condition:
+                while self.running:
+                    now = time.monotonic()
+                    self.expire(now)
+                    if self.queued and self.can_send(self.queued[0]):
+                        break
+                    deadline = min((p.deadline for p in self.in_flight), default=None)
+                    self.condition.wait(None if deadline is None else deadline - now)
+                if not self.running:
+                    self.fail_all()
+                    return
+                pending = self.queued.popleft()
+                pending.deadline = time.monotonic() + pending.timeout
+                self.in_flight.append(pending)
+            try:
+                written = self.write(pending.data)
+            except Exception as e:
+                self.fail_write(pending, e)
+                continue
+            if isinstance(written, Future):
+                written.add_done_callback(lambda f, pending=pending: self.write_done(pending, f))
+    def write_done(self, pending, written):
+        if written.exception() is not None:
+            self.fail_write(pending, written.exception())
+    def fail_write(self, pending, error):
+        with self.condition:
+            if pending in self.in_flight:
+                self.in_flight.remove(pending)
+                pending.future.set_exception(CommandError(f"ошибка записи {pending.command}: {error}"))
+                self.condition.notify()
+    def fail_all(self):
+        for pending in list(self.in_flight) + list(self.queued):
+            if not pending.future.done():
+                pending.future.set_exception(CommandError(f"канал команд закрыт: {pending.command}"))
+        self.in_flight = []
+        self.queued.clear()
+    def close(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        self.thread.join()
@@ -0,0 +1,39 @@
+"""Команды настройки контроллера поверх CommandChannel, общие для приложения и службы без интерфейса"""
+import time
+from datetime import datetime
+from command_channel import CommandError, CommandTimeout
+def send_time(channel, timeout=3):
+    """Отправляет текущее время; Future завершится строкой 'Time set to: ...'"""
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    return channel.send(f'TIME:{now}', 'Time set to:', timeout=timeout)
+def send_config(channel, params):
+    """Отправляет параметры одной командой SET:ALL, а для старой прошивки по одной.
+
+    Блокирует до ответа контроллера и возвращает затраченное время в секундах;
+    при ошибке бросает CommandError с указанием команды.
+    """
+    started = time.monotonic()
+    batch = (f'SET:ALL:{params["temp"]},{params["temp_tol"]},{params["soil"]},{params["soil_tol"]},'
+             f'{params["curt_open"]},{params["curt_close"]},{params["lamp_on"]},{params["lamp_off"]}')
+    try:
+        channel.send(batch, 'ALL_OK', timeout=1.5, error_reply='ALL_ERR').result()
+    except CommandTimeout:
+        steps = [
+            (f'SET:TEMP:{params["temp"]}', 'TEMP_OK'),
+            (f'SET:TEMP_TOL:{params["temp_tol"]}', 'TEMP_TOL_OK'),
+            (f'SET:SOIL:{params["soil"]}', 'SOIL_OK'),
+            (f'SET:SOIL_TOL:{params["soil_tol"]}', 'SOIL_TOL_OK'),
+            (f'SET:CURT_OPEN:{params["curt_open"]}', 'CURT_OPEN_OK'),
+            (f'SET:CURT_CLOSE:{params["curt_close"]}', 'CURT_CLOSE_OK'),
+            (f'SET:LAMP_ON:{params["lamp_on"]}', 'LAMP_ON_OK'),
+            (f'SET:LAMP_OFF:{params["lamp_off"]}', 'LAMP_OFF_OK'),
+        ]
+        futures = [(cmd, channel.send(cmd, reply, timeout=6)) for cmd, reply in steps]
+        for cmd, future in futures:
+            try:
+                future.result()
+            except CommandError as e:
+                raise CommandError(f"ошибка при отправке {cmd}: {e}") from e
+    except CommandError as e:
+        raise CommandError(f"ошибка при отправке параметров: {e}") from e
+    return time.monotonic() - started
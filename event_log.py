@@ -0,0 +1,130 @@
+"""Журнал событий: кольцевой буфер в памяти для вкладки "Журнал" и запись на диск в фоне.
+
+Запись журнала - время, уровень, компонент и текст. В памяти хранятся последние capacity записей, поэтому
+добавление стоит одинаково и через месяц работы. На диск записи уходят строками JSON (events.jsonl)
+фоновым потоком, пачками всего, что накопилось; когда файл вырастает больше max_bytes, он переименовывается
+в events.jsonl.1, старые копии сдвигаются, и хранится не больше backups копий.
+"""
+import collections
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR")
+EVENTS_FILE = "events.jsonl"
+def guess_level(message):
+    """Уровень по значку в начале сообщения: ❌ - ошибка, ⚠️ - предупреждение, остальное - информация"""
+    text = message.lstrip()
+    if text.startswith("❌"):
+        return "ERROR"
+    if text.startswith("⚠️"):
+        return "WARNING"
+    return "INFO"
+class LogRecord:
+    __slots__ = ("seq", "ts", "level", "component", "message")
+    def __init__(self, seq, ts, level, component, message):
+        self.seq = seq
+        self.ts = ts
+        self.level = level
+        self.component = component
+        self.message = message
+    def format(self):
+        """Строка для вкладки "Журнал" в прежнем виде: [ЧЧ:ММ:СС] сообщение"""
+        return f"{datetime.fromtimestamp(self.ts).strftime('[%H:%M:%S]')} {self.message}"
+    def to_json(self):
+        return json.dumps({"time": datetime.fromtimestamp(self.ts).isoformat(timespec='milliseconds'),
+                           "level": self.level, "component": self.component, "message": self.message},
+                          ensure_ascii=False)
+class EventLog:
+    """Журнал в памяти и, если задан path, в файлах с ротацией.
+
+    add и функции logger(component) можно вызывать из любого потока: они только кладут запись в буфер
+    и в очередь записи. Если диск не успевает и в очереди max_queue записей, новые записи пропускают
+    файл (счетчик dropped), но остаются в памяти: журнал никогда не задерживает вызывающий поток.
+    since(seq) - записи новее seq и номер последней записи для пакетного вывода в интерфейс по таймеру.
+    """
+    def __init__(self, path=None, capacity=5000, max_bytes=1024 * 1024, backups=5, max_queue=10000):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.lock = threading.Lock()
+        self.records = collections.deque(maxlen=capacity)
+        self.counter = itertools.count(1)
+        self.last_seq = 0
+        self.component_names = set()
+        self.dropped = 0
+        self.queue = queue.Queue(max_queue)
+        self.thread = None
+        if path is not None:
+            self.thread = threading.Thread(target=self.run, name="EventLog", daemon=True)
+            self.thread.start()
+    def add(self, message, level=None, component="приложение"):
+        level = level or guess_level(message)
+        with self.lock:
+            record = LogRecord(next(self.counter), time.time(), level, component, message)
+            self.records.append(record)
+            self.last_seq = record.seq
+            self.component_names.add(component)
+        if self.thread is not None:
+            try:
+                self.queue.put_nowait(record)
+            except queue.Full:
+                self.dropped += 1
+        return record
+    def logger(self, component):
+        """Функция log(message, level=None) для модулей, которые принимают log"""
+        return lambda message, level=None: self.add(message, level, component)
+    def since(self, seq, min_level="DEBUG", component=None):
+        """(записи новее seq, прошедшие фильтр, от старых к новым; номер последней просмотренной записи).
+        Номер берется под той же блокировкой, что и записи: следующий вызов с ним начнется ровно после них,
+        даже если другой поток добавил запись во время вызова. Стоит столько, сколько пришло новых записей"""
+        minimum = LEVELS.index(min_level)
+        found = []
+        with self.lock:
+            last_seq = self.last_seq
+            for record in reversed(self.records):
+                if record.seq <= seq:
+                    break
+                if LEVELS.index(record.level) >= minimum and (component is None or record.component == component):
+                    found.append(record)
+        found.reverse()
+        return found, last_seq
+    def components(self):
+        with self.lock:
+            return sorted(self.component_names)
+    def run(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        f = open(self.path, 'a', encoding='utf-8')
+        try:
+            while True:
+                batch = [self.queue.get()]
+                while len(batch) < 1000:
+                    try:
+                        batch.append(self.queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = None in batch
+                f.write("".join(record.to_json() + "\n" for record in batch if record is not None))
+                f.flush()
+                if f.tell() > self.max_bytes:
+                    f.close()
+                    self.rotate()
+                    f = open(self.path, 'a', encoding='utf-8')
+                if stop:
+                    return
+        finally:
+            f.close()
+    def rotate(self):
+        for index in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{index}"):
+                os.replace(f"{self.path}.{index}", f"{self.path}.{index + 1}")
+        os.replace(self.path, f"{self.path}.1")
+    def close(self):
+        """Дописывает очередь на диск и останавливает поток записи"""
+        thread, self.thread = self.thread, None
+        if thread is not None:
+            self.queue.put(None)
+            thread.join()
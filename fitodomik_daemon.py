@@ -0,0 +1,207 @@
+"""ФитоДомик без графического интерфейса: запись показаний контроллеров и фото по расписанию.
+
+Служба для машин без экрана. Qt и matplotlib не импортируются вовсе, а OpenCV с NumPy
+подгружаются только если включены фото. Настройки берутся из того же fitodomik_config.json,
+что и у FitoDomikLo.py, показания пишутся в ту же базу.
+
+Запуск: python fitodomik_daemon.py [--port COM3 --port COM4] [--profile Зима] [--no-photos]
+"""
+import argparse
+import os
+import signal
+import threading
+import time
+from datetime import datetime
+from app_settings import Settings, CONFIG_FILE
+from camera_service import CameraService
+from capture_queue import CaptureQueue
+from command_channel import CommandError
+from controller_commands import send_time, send_config
+from metrics import METRICS, MetricsServer
+from photo_scheduler import PhotoScheduler
+from photo_writer import PhotoWriter
+from analysis_catalog import AnalysisCatalog, CATALOG_FILE
+from port_discovery import discover, list_candidate_ports
+from sensor_store import SensorStore
+from serial_mux import SerialMux
+from serial_parser import DeviceState, SensorFault, SensorReading
+LOCAL_PATH = os.path.join(os.path.expanduser("~"), "FitoDomik_photos")
+READINGS_DB_FILE = os.path.join(os.path.expanduser("~"), "fitodomik_readings.db")
+RECONNECT_DELAY = 10.0
+def log(message, level=None):
+    """Печать в stdout для журнала системы; отладочные сообщения (каждая неразобранная строка порта) пропускаются"""
+    if level == "DEBUG":
+        return
+    print(f"{datetime.now().strftime('[%H:%M:%S]')} {message}", flush=True)
+class HeadlessService:
+    """Подключает все ответившие контроллеры, пишет показания в базу и фотографирует по расписанию"""
+    def __init__(self, ports=None, config_path=CONFIG_FILE, db_path=READINGS_DB_FILE, photo_dir=LOCAL_PATH,
+                 photos=True, profile=None, metrics_port=None):
+        self.ports = ports
+        self.profile = profile
+        self.metrics_port = metrics_port
+        self.photo_dir = photo_dir
+        self.photos = photos
+        self.settings = Settings(config_path, log)
+        self.store = SensorStore(db_path, log)
+        self.controllers = {}
+        self.dht_faults = set()
+        self.stop_event = threading.Event()
+        self.capture_queue = CaptureQueue(self.run_capture, log, device=lambda camera_index: self.camera)
+        self.camera = None
+        self.writer = None
+        self.scheduler = None
+        self.metrics_server = None
+    def start(self):
+        self.settings.load(self.profile)
+        log(f"⚙️ Профиль настроек: {self.settings.profile}")
+        self.start_metrics_server()
+        self.store.start()
+        ports = self.ports
+        if ports is None:
+            known = [p for p in [self.settings.port] + list(self.settings.controllers) if p]
+            ports = list(dict.fromkeys(known + list_candidate_ports()))
+        log(f"🔍 Опрос портов: {', '.join(ports) or 'нет'}")
+        discover(ports, on_result=self.handle_probe)
+        if not self.controllers:
+            log("⚠️ Контроллеры не найдены, фото по расписанию продолжат работать")
+        if self.photos:
+            self.camera = CameraService(self.settings.camera_index, log)
+            self.camera.start()
+            self.writer = PhotoWriter(self.photo_dir, self.settings.photo_codec, self.settings.photo_quality, log,
+                                      catalog=AnalysisCatalog(os.path.join(self.photo_dir, CATALOG_FILE)),
+                                      on_cataloged=self.log_growth)
+            self.scheduler = PhotoScheduler(self.settings.photo_mode, self.settings.photo_time1,
+                                            self.settings.photo_time2, self.take_photo, log, self.settings.photo_rules)
+            self.scheduler.start()
+    def start_metrics_server(self):
+        """Метрики в формате Prometheus на localhost: порт из --metrics-port или из настроек, 0 - выключены"""
+        port = self.settings.metrics_port if self.metrics_port is None else self.metrics_port
+        if not port:
+            return
+        METRICS.gauge("fitodomik_capture_queue_depth", "Ожидающие и идущие снимки", self.capture_queue.depth)
+        METRICS.gauge("fitodomik_controllers", "Подключенные контроллеры", lambda: len(self.controllers))
+        try:
+            self.metrics_server = MetricsServer(METRICS, port)
+        except OSError as e:
+            log(f"❌ Не удалось открыть порт метрик {port}: {e}")
+            return
+        log(f"📈 Метрики Prometheus: http://127.0.0.1:{port}/metrics")
+    def handle_probe(self, result):
+        if result.serial_port is None:
+            log(f"— {result.device}: {result.error}")
+            return
+        device = result.device
+        mux = SerialMux(result.serial_port, device, result.initial_data, log)
+        mux.subscribe(self.store.subscriber(device))
+        mux.subscribe(lambda line, record, received_at: self.handle_record(device, record))
+        mux.subscribe_lost(lambda error: self.handle_lost(device, mux))
+        self.controllers[device] = (result.serial_port, mux)
+        mux.start()
+        log(f"✅ Подключено к {device}")
+        send_time(mux.channel).add_done_callback(lambda f: self.finish_time_sync(device, f))
+        profile = self.settings.controllers.get(device)
+        if profile is not None:
+            threading.Thread(target=self.push_profile, args=(device, mux.channel, profile), daemon=True).start()
+    def handle_lost(self, device, mux):
+        """Вызывается из потока порта, когда контроллер перестал отвечать: порт закрывается и опрашивается
+        заново каждые RECONNECT_DELAY секунд, пока контроллер не ответит или служба не остановится"""
+        controller = self.controllers.get(device)
+        if controller is None or controller[1] is not mux:
+            return
+        del self.controllers[device]
+        controller[0].close()
+        threading.Thread(target=self.reconnect, args=(device,), name=f"Reconnect {device}", daemon=True).start()
+    def reconnect(self, device):
+        while not self.stop_event.wait(RECONNECT_DELAY):
+            if device in self.controllers:
+                return
+            log(f"🔍 {device}: повторное подключение...")
+            discover([device], on_result=self.handle_probe)
+    def finish_time_sync(self, device, future):
+        try:
+            future.result()
+            log(f"🕒 {device}: время синхронизировано")
+        except CommandError as e:
+            log(f"❌ {device}: время не синхронизировано: {e}")
+    def push_profile(self, device, channel, profile):
+        try:
+            elapsed = send_config(channel, profile)
+            log(f"✅ {device}: профиль отправлен за {elapsed:.2f} с")
+        except CommandError as e:
+            log(f"❌ {device}: {e}")
+    def handle_record(self, device, record):
+        """Пишет в журнал только события: переключения устройств с причиной и отказ датчика"""
+        if type(record) is SensorReading:
+            if device in self.dht_faults:
+                self.dht_faults.discard(device)
+                log(f"✅ {device}: датчик DHT снова отвечает")
+        elif type(record) is SensorFault:
+            if device not in self.dht_faults:
+                self.dht_faults.add(device)
+                log(f"⚠️ {device}: не удалось прочитать датчик DHT")
+        elif type(record) is DeviceState and record.reason:
+            log(f"ℹ️ {device}: {record.device} {'ON' if record.on else 'OFF'} ({record.reason})")
+    def take_photo(self):
+        """Снимок по расписанию через очередь камеры; поток расписания ждет, пока он закончится"""
+        job = self.capture_queue.submit(self.settings.camera_index, "расписание")
+        if job is not None and job.wait() is not None:
+            log(f"⏱ Снимок: ожидание {job.wait_time():.1f} с, съемка и анализ {job.run_time():.1f} с")
+    def run_capture(self, job):
+        """Выполняется в потоке очереди камеры; модуль анализа импортируется при первом снимке"""
+        from plant_analysis import PlantAnalyzer
+        result = PlantAnalyzer(job.camera_index, log, None, self.camera, self.settings.fast_analysis,
+                               self.settings.analysis_tolerance, self.writer, self.settings.scene_threshold).run()
+        if result is not None:
+            analysis = result[2]
+            log(f"✅ Анализ растения: {analysis['состояние']}; {analysis['детали']}")
+        return result
+    def log_growth(self, trend):
+        if trend is not None:
+            log(f"📈 {trend.describe()}")
+    def wait(self):
+        while not self.stop_event.wait(1.0):
+            pass
+    def stop(self, *args):
+        self.stop_event.set()
+    def close(self):
+        for device, (serial_port, mux) in list(self.controllers.items()):
+            mux.close()
+            serial_port.close()
+        self.controllers = {}
+        if self.scheduler is not None:
+            self.scheduler.stop()
+        self.capture_queue.close()
+        if self.camera is not None:
+            self.camera.close()
+        if self.writer is not None:
+            self.writer.close()
+        self.store.close()
+        if self.metrics_server is not None:
+            self.metrics_server.close()
+        log("🛑 Служба остановлена")
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ФитоДомик без графического интерфейса")
+    parser.add_argument('--port', action='append', dest='ports',
+                        help="порт контроллера; можно указать несколько раз, по умолчанию опрашиваются все")
+    parser.add_argument('--config', default=CONFIG_FILE, help="файл настроек приложения")
+    parser.add_argument('--profile', help="профиль настроек; по умолчанию текущий профиль приложения")
+    parser.add_argument('--db', default=READINGS_DB_FILE, help="база показаний SQLite")
+    parser.add_argument('--photo-dir', default=LOCAL_PATH, help="папка для фото и отчетов")
+    parser.add_argument('--no-photos', action='store_true', help="только запись показаний, без камеры")
+    parser.add_argument('--metrics-port', type=int,
+                        help="порт метрик Prometheus на 127.0.0.1; по умолчанию из настроек, 0 - выключены")
+    args = parser.parse_args(argv)
+    started = time.perf_counter()
+    service = HeadlessService(args.ports, args.config, args.db, args.photo_dir, photos=not args.no_photos,
+                              profile=args.profile, metrics_port=args.metrics_port)
+    signal.signal(signal.SIGINT, service.stop)
+    signal.signal(signal.SIGTERM, service.stop)
+    service.start()
+    log(f"Служба запущена за {time.perf_counter() - started:.2f} с, контроллеров: {len(service.controllers)}")
+    try:
+        service.wait()
+    finally:
+        service.close()
+if __name__ == '__main__':
+    main()
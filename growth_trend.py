@@ -0,0 +1,105 @@
+"""Тренды роста растения, которые обновляются снимок за снимком без пересчета всей истории"""
+DAY = 86400.0
+# Тренд считается, когда снимки разнесены во времени хотя бы на час (взвешенное отклонение времени)
+MIN_SPREAD_DAYS = 1 / 24
+class GrowthTrend:
+    """Взвешенная линейная регрессия площади растения и доли желтого по времени.
+
+    Старые снимки забываются экспоненциально с периодом полураспада half_life_days, поэтому тренд
+    отражает последние дни, а не всю историю. Хранятся только суммы регрессии относительно времени
+    последнего снимка: новый снимок обновляет их за O(1). Снимок старше последнего (например, при
+    переносе старых отчетов) тоже учитывается, просто с меньшим весом.
+    area - доля кадра, занятая растением, в процентах; yellow - процент желтого внутри растения.
+    """
+    FIELDS = ("half_life_days", "t_last", "weight", "st", "stt", "sa", "sta", "sy", "sty",
+              "area", "yellow", "count", "previous_yellowing")
+    def __init__(self, half_life_days=7.0):
+        self.half_life_days = half_life_days
+        self.t_last = 0.0
+        self.weight = 0.0
+        self.st = 0.0
+        self.stt = 0.0
+        self.sa = 0.0
+        self.sta = 0.0
+        self.sy = 0.0
+        self.sty = 0.0
+        self.area = None
+        self.yellow = None
+        self.count = 0
+        self.previous_yellowing = None
+    @classmethod
+    def from_row(cls, row):
+        trend = cls()
+        for field, value in zip(cls.FIELDS, row):
+            setattr(trend, field, value)
+        return trend
+    def to_row(self):
+        return tuple(getattr(self, field) for field in self.FIELDS)
+    def update(self, ts, area, yellow):
+        """Добавляет снимок: ts - секунды Unix, area и yellow - проценты"""
+        self.previous_yellowing = self.yellowing_rate()
+        t = ts / DAY
+        if self.count == 0:
+            self.t_last = t
+        dt = t - self.t_last
+        if dt >= 0:
+            decay = 0.5 ** (dt / self.half_life_days)
+            # Суммы хранятся относительно t_last: переносим начало отсчета на новый снимок
+            self.stt = decay * (self.stt - 2 * dt * self.st + dt * dt * self.weight)
+            self.st = decay * (self.st - dt * self.weight)
+            self.sta = decay * (self.sta - dt * self.sa)
+            self.sty = decay * (self.sty - dt * self.sy)
+            self.weight *= decay
+            self.sa *= decay
+            self.sy *= decay
+            self.t_last = t
+            self.area = area
+            self.yellow = yellow
+            weight, x = 1.0, 0.0
+        else:
+            weight, x = 0.5 ** (-dt / self.half_life_days), dt
+        self.weight += weight
+        self.st += weight * x
+        self.stt += weight * x * x
+        self.sa += weight * area
+        self.sta += weight * x * area
+        self.sy += weight * yellow
+        self.sty += weight * x * yellow
+        self.count += 1
+    def slope(self, s, sx):
+        determinant = self.weight * self.stt - self.st * self.st
+        if self.count < 2 or determinant <= (self.weight * MIN_SPREAD_DAYS) ** 2:
+            return None
+        return (self.weight * sx - self.st * s) / determinant
+    def growth_rate(self):
+        """Изменение доли кадра под растением, процентных пунктов в сутки"""
+        return self.slope(self.sa, self.sta)
+    def relative_growth(self):
+        """Рост площади в процентах от текущей площади за сутки"""
+        rate = self.growth_rate()
+        if rate is None or not self.area:
+            return None
+        return rate / self.area * 100
+    def yellowing_rate(self):
+        """Изменение доли желтого, процентных пунктов в сутки"""
+        return self.slope(self.sy, self.sty)
+    def yellowing_change(self):
+        """На сколько скорость пожелтения изменилась с предыдущего снимка"""
+        rate = self.yellowing_rate()
+        if rate is None or self.previous_yellowing is None:
+            return None
+        return rate - self.previous_yellowing
+    def describe(self):
+        """Строка для журнала и интерфейса"""
+        if self.count == 0:
+            return "Рост: нет снимков"
+        text = f"Растение занимает {self.area:.1f}% кадра, желтого {self.yellow:.1f}%"
+        growth = self.growth_rate()
+        if growth is None:
+            return text + "; для тренда нужны снимки хотя бы за несколько часов"
+        text += f"; рост {growth:+.2f} п.п./сут ({self.relative_growth() or 0:+.1f}%/сут)"
+        text += f", пожелтение {self.yellowing_rate():+.2f} п.п./сут"
+        change = self.yellowing_change()
+        if change is not None and abs(change) >= 0.01:
+            text += f" ({'ускоряется' if change > 0 else 'замедляется'} на {abs(change):.2f})"
+        return text
@@ -0,0 +1,195 @@
+"""Метрики производительности: гистограммы времени этапов и счетчики в памяти процесса.
+
+Модули заводят метрики один раз при импорте (STAGE = METRICS.histogram(...)) и на горячем пути только
+вызывают observe или with STAGE.time(): поиск ячейки гистограммы двоичным поиском и сложение под
+блокировкой, без выделения памяти и без обращения к диску. Метрики показываются на вкладке "Диагностика"
+и, если задан порт, отдаются MetricsServer в текстовом формате Prometheus на http://127.0.0.1:порт/metrics.
+"""
+import bisect
+import http.server
+import threading
+import time
+# Границы ячеек в секундах: от разбора строки порта (десятки микросекунд) до снимка 4K (секунды)
+DEFAULT_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+def format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+def format_value(value):
+    value = float(value)
+    if value != value:
+        return "NaN"
+    if value in (float("inf"), float("-inf")):
+        return "+Inf" if value > 0 else "-Inf"
+    return str(int(value)) if value.is_integer() else repr(value)
+class StageTimer:
+    """with histogram.time(): ... - записывает время блока, в том числе если блок завершился исключением"""
+    __slots__ = ("histogram", "started")
+    def __init__(self, histogram):
+        self.histogram = histogram
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started)
+        return False
+class Histogram:
+    """Распределение длительностей по ячейкам buckets, сумма, число наблюдений и максимум"""
+    kind = "histogram"
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self.lock = threading.Lock()
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+            if value > self.max:
+                self.max = value
+    def time(self):
+        return StageTimer(self)
+    def snapshot(self):
+        with self.lock:
+            return list(self.counts), self.sum, self.count, self.max
+    def quantile(self, q, counts=None, count=None):
+        """Оценка квантиля по ячейкам с линейной интерполяцией внутри ячейки, как histogram_quantile в Prometheus"""
+        if counts is None:
+            counts, _, count, _ = self.snapshot()
+        if not count:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if seen + bucket_count >= rank and bucket_count:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                low = self.buckets[index - 1] if index else 0.0
+                return low + (self.buckets[index] - low) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+    def summary(self):
+        """(число, среднее, p50, p95, максимум) для таблицы диагностики"""
+        counts, total, count, maximum = self.snapshot()
+        if not count:
+            return 0, 0.0, 0.0, 0.0, 0.0
+        return (count, total / count, min(self.quantile(0.5, counts, count), maximum),
+                min(self.quantile(0.95, counts, count), maximum), maximum)
+    def render(self):
+        counts, total, count, _ = self.snapshot()
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f"{self.name}_bucket{format_labels(self.labels, [('le', le)])} {cumulative}")
+        lines.append(f"{self.name}_sum{format_labels(self.labels)} {format_value(total)}")
+        lines.append(f"{self.name}_count{format_labels(self.labels)} {count}")
+        return lines
+class Counter:
+    kind = "counter"
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.lock = threading.Lock()
+        self.value = 0
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+    def render(self):
+        return [f"{self.name}{format_labels(self.labels)} {format_value(self.value)}"]
+class Gauge:
+    """Значение, которое читается функцией read в момент показа: глубина очереди, потерянные записи журнала"""
+    kind = "gauge"
+    def __init__(self, name, help, read, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.read = read
+    @property
+    def value(self):
+        try:
+            return self.read()
+        except Exception:
+            return float("nan")
+    def render(self):
+        return [f"{self.name}{format_labels(self.labels)} {format_value(self.value)}"]
+class MetricsRegistry:
+    """Все метрики процесса. Метрика определяется именем и метками: повторный вызов histogram или counter
+    с теми же именем и метками возвращает уже заведенный объект, gauge заменяет функцию чтения."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = {}
+    def get(self, factory, name, help, labels, *args):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            metric = self.metrics.get(key)
+            if metric is None or factory is Gauge:
+                metric = factory(name, help, *args, labels=key[1])
+                self.metrics[key] = metric
+            return metric
+    def histogram(self, name, help, **labels):
+        return self.get(Histogram, name, help, labels)
+    def counter(self, name, help, **labels):
+        return self.get(Counter, name, help, labels)
+    def gauge(self, name, help, read, **labels):
+        return self.get(Gauge, name, help, labels, read)
+    def collect(self):
+        """Метрики, сгруппированные по имени в порядке заведения"""
+        with self.lock:
+            metrics = list(self.metrics.values())
+        families = {}
+        for metric in metrics:
+            families.setdefault(metric.name, []).append(metric)
+        return families
+    def render(self):
+        """Текстовый формат Prometheus 0.0.4"""
+        lines = []
+        for name, metrics in self.collect().items():
+            lines.append(f"# HELP {name} {metrics[0].help}")
+            lines.append(f"# TYPE {name} {metrics[0].kind}")
+            for metric in metrics:
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+METRICS = MetricsRegistry()
+def photo_stage(stage):
+    """Гистограмма одного этапа снимка: съемка, HSV, морфология, контуры, оценка здоровья, кодирование, запись"""
+    return METRICS.histogram("fitodomik_photo_stage_seconds", "Длительность этапов снимка и анализа растения",
+                             stage=stage)
+class MetricsServer:
+    """HTTP-сервер метрик в собственном потоке; слушает только host (по умолчанию localhost)"""
+    def __init__(self, registry=METRICS, port=9108, host="127.0.0.1"):
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            def log_message(self, format, *args):
+                pass
+        self.server = http.server.ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, name="MetricsServer", daemon=True)
+        self.thread.start()
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
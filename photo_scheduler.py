@@ -0,0 +1,208 @@
+"""Расписание фотографирования, общее для приложения и службы без интерфейса.
+
+Правила расписания:
+"ЧЧ:ММ" - каждый день в это время;
+cron из пяти полей "минута час день месяц день_недели" (*, списки через запятую, диапазоны a-b, шаг /n;
+день недели 0-6, воскресенье - 0 или 7), например "*/30 6-22 * * *" - каждые полчаса днем;
+интервал (IntervalRule) - через равные промежутки от запуска, как в тестовом режиме.
+В режиме "По расписанию" правил сколько угодно, они разделяются точкой с запятой или переводом строки.
+"""
+import heapq
+import threading
+import time
+from datetime import datetime, timedelta
+TEST_MODE = "Каждые 10 минут (тест)"
+ONCE_A_DAY = "Раз в день"
+TWICE_A_DAY = "Два раза в день"
+RULES_MODE = "По расписанию"
+TEST_INTERVAL = 600
+# Ожидание делится на отрезки не длиннее MAX_SLEEP: после сна компьютера или перевода часов
+# срок проверяется заново по настенному времени, а не по монотонным часам, которые во сне стоят
+MAX_SLEEP = 300
+# Снимок, опоздавший больше чем на LATE_GRACE секунд, считается пропущенным и догоняется с записью в журнал
+LATE_GRACE = 60
+CRON_FIELDS = (("минута", 0, 59), ("час", 0, 23), ("день", 1, 31), ("месяц", 1, 12), ("день недели", 0, 7))
+def parse_cron_field(text, name, low, high):
+    """Множество значений одного поля cron"""
+    values = set()
+    for part in text.split(','):
+        part, _, step = part.partition('/')
+        try:
+            if part == '*':
+                start, end = low, high
+            elif '-' in part:
+                start, end = (int(value) for value in part.split('-', 1))
+            else:
+                # "5/15" в cron - с пятой минуты до конца диапазона с шагом 15
+                start = int(part)
+                end = high if step else start
+            step = int(step) if step else 1
+        except ValueError:
+            raise ValueError(f"поле \"{name}\" не число, не диапазон и не *: {text}")
+        if not low <= start <= end <= high or step < 1:
+            raise ValueError(f"поле \"{name}\" вне диапазона {low}-{high}: {text}")
+        values.update(range(start, end + 1, step))
+    return values
+class CronRule:
+    """Правило cron или ежедневное время ЧЧ:ММ; next_time - ближайшее срабатывание строго после after"""
+    def __init__(self, text):
+        self.text = text.strip()
+        fields = self.text.split()
+        if len(fields) == 1 and ':' in fields[0]:
+            hours, _, minutes = fields[0].partition(':')
+            fields = [minutes, hours, '*', '*', '*']
+        if len(fields) != 5:
+            raise ValueError(f"нужно ЧЧ:ММ или пять полей cron: {self.text}")
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            parse_cron_field(field, *spec) for field, spec in zip(fields, CRON_FIELDS))
+        # В cron воскресенье - 0 или 7, у datetime.weekday() понедельник - 0
+        self.weekdays = {(day - 1) % 7 for day in weekdays}
+        # Как в cron: если ограничены и число, и день недели, достаточно совпадения любого из них.
+        # Поле, начинающееся с *, в том числе */2, cron ограничением не считает и проверяет оба поля через И
+        self.any_day = not fields[2].startswith('*') and not fields[4].startswith('*')
+        self.sorted_hours = sorted(self.hours)
+        self.sorted_minutes = sorted(self.minutes)
+        if self.next_time(datetime.now()) is None:
+            raise ValueError(f"правило никогда не срабатывает: {self.text}")
+    def day_matches(self, day):
+        if day.month not in self.months:
+            return False
+        if self.any_day:
+            return day.day in self.days or day.weekday() in self.weekdays
+        return day.day in self.days and day.weekday() in self.weekdays
+    def next_time(self, after):
+        start = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        day = start.replace(hour=0, minute=0)
+        # Четыре года с запасом покрывают правила на 29 февраля
+        for _ in range(4 * 366 + 1):
+            if self.day_matches(day):
+                for hour in self.sorted_hours:
+                    for minute in self.sorted_minutes:
+                        candidate = day.replace(hour=hour, minute=minute)
+                        if candidate >= start:
+                            return candidate
+            day += timedelta(days=1)
+        return None
+    def __str__(self):
+        return self.text
+class IntervalRule:
+    """Каждые seconds секунд, отсчет от предыдущего снимка"""
+    def __init__(self, seconds):
+        self.seconds = seconds
+    def next_time(self, after):
+        return after + timedelta(seconds=self.seconds)
+    def __str__(self):
+        return f"каждые {self.seconds // 60} мин"
+def split_rules(text):
+    """Записи правил из строки через точку с запятой или перевод строки"""
+    return [part.strip() for part in text.replace('\n', ';').split(';') if part.strip()]
+def parse_rules(text):
+    """Правила из строки; ValueError с описанием первой ошибочной записи"""
+    return [CronRule(entry) for entry in split_rules(text)]
+class PhotoScheduler:
+    """Вызывает take_photo по расписанию в собственном потоке.
+
+    Сроки всех правил лежат в очереди с приоритетом; поток спит до ближайшего срока (отрезками не
+    длиннее MAX_SLEEP) и не тратит процессор между снимками. stop будит поток сразу. Если несколько
+    сроков наступили одновременно или были пропущены, пока компьютер спал, делается один снимок, а
+    следующие сроки считаются от текущего времени, поэтому один срок никогда не срабатывает дважды.
+    mode - TEST_MODE, ONCE_A_DAY, TWICE_A_DAY (time1 и time2 в формате ЧЧ:ММ) или RULES_MODE (правила в rules).
+    """
+    def __init__(self, mode, time1, time2, take_photo, log=print, rules=""):
+        self.mode = mode
+        self.time1 = time1
+        self.time2 = time2
+        self.rules_text = rules
+        self.take_photo = take_photo
+        self.log = log
+        self.condition = threading.Condition()
+        self.queue = []
+        self.stopped = False
+        self.thread = None
+    def describe(self):
+        if self.mode == TEST_MODE:
+            return f"режим = {self.mode}"
+        if self.mode == ONCE_A_DAY:
+            return f"режим = {self.mode} в {self.time1}"
+        if self.mode == RULES_MODE:
+            return f"режим = {self.mode}: {self.rules_text}"
+        return f"режим = {self.mode} в {self.time1} и {self.time2}"
+    def rules(self):
+        """Правила текущего режима; ошибочные записи пропускаются с сообщением в журнал"""
+        if self.mode == TEST_MODE:
+            return [IntervalRule(TEST_INTERVAL)]
+        if self.mode == RULES_MODE:
+            entries = split_rules(self.rules_text)
+        else:
+            entries = [self.time1] if self.mode == ONCE_A_DAY else [self.time1, self.time2]
+        rules = []
+        for idx, entry in enumerate(entries):
+            try:
+                rules.append(CronRule(entry))
+            except ValueError as e:
+                self.log(f"❌ Ошибка в расписании, запись {idx + 1}: {e}")
+        return rules
+    def next_run(self):
+        """Время ближайшего снимка (datetime) или None"""
+        with self.condition:
+            return datetime.fromtimestamp(self.queue[0][0]) if self.queue else None
+    def start(self):
+        """Запускает поток расписания; повторный вызов ничего не делает"""
+        with self.condition:
+            if self.thread is not None:
+                return
+            now = datetime.now()
+            self.stopped = False
+            self.queue = [(rule.next_time(now).timestamp(), index, rule) for index, rule in enumerate(self.rules())]
+            heapq.heapify(self.queue)
+            self.thread = threading.Thread(target=self.run, name="PhotoScheduler", daemon=True)
+            self.thread.start()
+        self.log(f"🧵 Запущено фотографирование по расписанию: {self.describe()}")
+        next_run = self.next_run()
+        if next_run is not None:
+            self.log(f"🕒 Следующий снимок: {next_run:%Y-%m-%d %H:%M}")
+    def stop(self):
+        """Останавливает поток сразу, не дожидаясь ближайшего срока; снимок, который уже идет, дорабатывает"""
+        with self.condition:
+            thread, self.thread = self.thread, None
+            self.stopped = True
+            self.condition.notify_all()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+    def wait_due(self):
+        """Ждет ближайшего срока; возвращает наступившие сроки или None после stop"""
+        with self.condition:
+            while not self.stopped:
+                if not self.queue:
+                    self.condition.wait()
+                    continue
+                delay = self.queue[0][0] - time.time()
+                if delay > 0:
+                    self.condition.wait(min(delay, MAX_SLEEP))
+                    continue
+                now = time.time()
+                due = []
+                while self.queue and self.queue[0][0] <= now:
+                    due.append(heapq.heappop(self.queue))
+                return due
+            return None
+    def run(self):
+        while True:
+            due = self.wait_due()
+            if due is None:
+                return
+            deadline = min(entry[0] for entry in due)
+            late = time.time() - deadline
+            if late > LATE_GRACE:
+                missed = ", ".join(f"{datetime.fromtimestamp(entry[0]):%H:%M} ({entry[2]})" for entry in due)
+                self.log(f"⏰ Пропущенный снимок {missed}, опоздание {int(late // 60)} мин: делаем один снимок сейчас")
+            else:
+                self.log(f"Наступило запланированное время для фото: {datetime.fromtimestamp(deadline):%H:%M}")
+            try:
+                self.take_photo()
+            except Exception as e:
+                self.log(f"❌ Ошибка в потоке фотографирования: {str(e)}")
+            now = datetime.now()
+            with self.condition:
+                for _, index, rule in due:
+                    heapq.heappush(self.queue, (rule.next_time(now).timestamp(), index, rule))
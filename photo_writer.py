@@ -0,0 +1,196 @@
+"""Запись снимков растения в фоне: фото, контуры растения и отчет.
+
+Для каждого снимка пишутся три файла с общей меткой времени:
+greenhouse_photo_*.jpg|webp|png - исходный кадр в выбранном формате,
+greenhouse_analysis_*.npz - контуры растения векторами (несколько килобайт вместо второго полного JPEG),
+greenhouse_report_*.txt - текстовый отчет.
+Маска растения - это залитые контуры, поэтому отдельно не хранится; изображение с контурами и маска
+строятся по запросу (render_analysis, render_mask). OpenCV и NumPy импортируются при первой записи.
+Для повторного кадра (сцена не изменилась) пишется только отчет, а запись каталога ссылается на фото
+и контуры прошлого снимка.
+
+Просмотр сохраненного анализа: python photo_writer.py greenhouse_photo_20250101_130000.jpg [-o result.jpg]
+"""
+import argparse
+import hashlib
+import os
+import queue
+import threading
+import time
+from metrics import photo_stage
+CODECS = {"jpeg": ".jpg", "webp": ".webp", "png": ".png"}
+# Качество 0-100 для JPEG и WebP, для PNG - уровень сжатия 0-9
+DEFAULT_QUALITY = {"jpeg": 95, "webp": 90, "png": 3}
+PHOTO_PREFIX = "greenhouse_photo_"
+ANALYSIS_PREFIX = "greenhouse_analysis_"
+REPORT_PREFIX = "greenhouse_report_"
+CONTOUR_COLOR = (0, 255, 0)
+ENCODE_TIME = photo_stage("encode")
+WRITE_TIME = photo_stage("write")
+def encode_params(cv2, codec, quality):
+    if codec == "jpeg":
+        return [cv2.IMWRITE_JPEG_QUALITY, int(quality)]
+    if codec == "webp":
+        return [cv2.IMWRITE_WEBP_QUALITY, int(quality)]
+    return [cv2.IMWRITE_PNG_COMPRESSION, int(quality)]
+def analysis_path(photo_path):
+    """Файл контуров для фото: та же метка времени, префикс greenhouse_analysis_ и расширение .npz"""
+    directory, name = os.path.split(photo_path)
+    stem = os.path.splitext(name)[0]
+    if stem.startswith(PHOTO_PREFIX):
+        stem = ANALYSIS_PREFIX + stem[len(PHOTO_PREFIX):]
+    return os.path.join(directory, stem + ".npz")
+def save_contours(path, shape, contours):
+    """Все контуры одним массивом точек и длинами контуров, сжатие zlib"""
+    import numpy as np
+    points = np.concatenate(contours).reshape(-1, 2) if contours else np.empty((0, 2), dtype=np.int32)
+    with open(path, 'wb') as f:
+        np.savez_compressed(f, shape=np.array(shape[:2], dtype=np.int32), points=points.astype(np.int32),
+                            lengths=np.array([len(contour) for contour in contours], dtype=np.int32))
+def load_contours(path):
+    """(высота, ширина) кадра и список контуров в формате cv2.findContours"""
+    import numpy as np
+    with np.load(path) as data:
+        shape = tuple(int(value) for value in data["shape"])
+        points = data["points"]
+        lengths = data["lengths"]
+    contours = [chunk.reshape(-1, 1, 2) for chunk in np.split(points, np.cumsum(lengths)[:-1])] if len(lengths) else []
+    return shape, contours
+def render_mask(shape, contours):
+    """Маска растения: залитые контуры, как plant_mask в анализе"""
+    import cv2
+    import numpy as np
+    mask = np.zeros(shape, dtype=np.uint8)
+    cv2.drawContours(mask, contours, -1, 255, -1)
+    return mask
+def render_analysis(photo_path):
+    """Изображение с контурами растения, как его рисует анализ; None, если фото не читается"""
+    import cv2
+    image = cv2.imread(photo_path)
+    if image is None:
+        return None
+    contours = load_contours(analysis_path(photo_path))[1]
+    cv2.drawContours(image, contours, -1, CONTOUR_COLOR, 2)
+    return image
+def write_file(path, data):
+    """Запись через временный файл: оборванная запись не оставит полуфайла с настоящим именем"""
+    temp_path = path + ".tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+def write_capture(directory, timestamp, image, contours, report, codec="jpeg", quality=None):
+    """Синхронно пишет фото, контуры и отчет одного снимка.
+    Возвращает имена файлов (photo, analysis, report) и хеш фото image_hash для каталога."""
+    import cv2
+    if quality is None:
+        quality = DEFAULT_QUALITY[codec]
+    photo_path = os.path.join(directory, f"{PHOTO_PREFIX}{timestamp}{CODECS[codec]}")
+    with ENCODE_TIME.time():
+        ok, data = cv2.imencode(CODECS[codec], image, encode_params(cv2, codec, quality))
+    if not ok:
+        raise ValueError(f"не удалось закодировать фото в {codec}")
+    data = data.tobytes()
+    with WRITE_TIME.time():
+        write_file(photo_path, data)
+        save_contours(analysis_path(photo_path), image.shape, contours)
+        report_name = write_report(directory, timestamp, report)
+    return {"photo": os.path.basename(photo_path), "analysis": os.path.basename(analysis_path(photo_path)),
+            "report": report_name, "image_hash": hashlib.sha1(data).hexdigest()}
+def write_report(directory, timestamp, report):
+    """Пишет текстовый отчет и возвращает имя его файла"""
+    report_name = f"{REPORT_PREFIX}{timestamp}.txt"
+    with open(os.path.join(directory, report_name), 'w', encoding='utf-8') as f:
+        f.write(report)
+    return report_name
+class PhotoWriter:
+    """Очередь записи снимков с собственным потоком.
+
+    submit возвращается сразу, поэтому кодирование и запись на диск не задерживают поток снимка.
+    Очередь ограничена max_queue снимками: если диск не успевает, submit ждет свободного места,
+    а не копит кадры в памяти. close дописывает все, что уже в очереди.
+    catalog - AnalysisCatalog: после записи файлов туда добавляется запись снимка, а on_cataloged
+    получает обновленный тренд роста камеры (GrowthTrend или None).
+    Для повторного кадра (reference) пишется только отчет, а фото и контуры берутся с последнего полностью
+    записанного снимка той же камеры; если его нет, кадр записывается целиком.
+    """
+    def __init__(self, directory, codec="jpeg", quality=None, log=print, max_queue=4, catalog=None,
+                 on_cataloged=None):
+        self.directory = directory
+        self.log = log
+        self.catalog = catalog
+        self.on_cataloged = on_cataloged
+        self.queue = queue.Queue(max_queue)
+        self.thread = None
+        self.lock = threading.Lock()
+        # Файлы последнего полностью записанного снимка по камерам, на них ссылаются повторные кадры
+        self.captures = {}
+        self.configure(codec, quality)
+    def configure(self, codec, quality=None):
+        """Формат и качество для следующих снимков; неизвестный формат заменяется на JPEG"""
+        if codec not in CODECS:
+            codec = "jpeg"
+        self.codec = codec
+        self.quality = DEFAULT_QUALITY[codec] if quality is None else quality
+    def submit(self, image, contours, report, timestamp=None, record=None, reference=False):
+        """Ставит снимок в очередь; image и contours после этого нельзя менять.
+        record - поля каталога (время, камера, проценты цветов, состояние), имена файлов добавятся при записи.
+        reference - сцена не изменилась с прошлого снимка: сохранить только отчет и ссылку на прошлое фото."""
+        timestamp = timestamp or time.strftime('%Y%m%d_%H%M%S')
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="PhotoWriter", daemon=True)
+                self.thread.start()
+        self.queue.put((timestamp, image, contours, report, self.codec, self.quality, record, reference))
+    def run(self):
+        while True:
+            task = self.queue.get()
+            if task is None:
+                return
+            timestamp, image, contours, report, codec, quality, record, reference = task
+            camera = None if record is None else record.get("camera")
+            started = time.perf_counter()
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                previous = self.captures.get(camera) if reference else None
+                if previous is not None:
+                    files = dict(previous, report=write_report(self.directory, timestamp, report),
+                                 same_as=previous["report"])
+                    self.log(f"✅ Отчет сохранен, фото то же, что {previous['photo']}")
+                else:
+                    files = write_capture(self.directory, timestamp, image, contours, report, codec, quality)
+                    self.captures[camera] = files
+                    self.log(f"✅ Фото сохранено: {files['photo']} за {time.perf_counter() - started:.2f} с")
+            except Exception as e:
+                self.captures.pop(camera, None)
+                self.log(f"❌ Ошибка при сохранении файлов: {str(e)}")
+                continue
+            if self.catalog is not None and record is not None:
+                try:
+                    trend = self.catalog.add(dict(record, **files))
+                except Exception as e:
+                    self.log(f"❌ Ошибка записи в каталог снимков: {str(e)}")
+                    continue
+                if self.on_cataloged is not None:
+                    self.on_cataloged(trend)
+    def close(self):
+        with self.lock:
+            thread, self.thread = self.thread, None
+        if thread is not None:
+            self.queue.put(None)
+            thread.join()
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Изображение с контурами растения для сохраненного фото")
+    parser.add_argument('photo', help="файл greenhouse_photo_*")
+    parser.add_argument('-o', '--output', help="куда сохранить; без параметра изображение показывается в окне")
+    args = parser.parse_args(argv)
+    import cv2
+    image = render_analysis(args.photo)
+    if image is None:
+        parser.error(f"не удалось прочитать {args.photo}")
+    if args.output:
+        cv2.imwrite(args.output, image)
+    else:
+        cv2.imshow(os.path.basename(args.photo), image)
+        cv2.waitKey(0)
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,426 @@
+"""Фотографирование и анализ состояния растения без графического интерфейса.
+
+Модуль тянет OpenCV и NumPy, поэтому импортируется только там, где действительно делается фото.
+"""
+import threading
+import time
+from datetime import datetime
+import cv2
+import numpy as np
+from metrics import METRICS, photo_stage
+from photo_writer import CONTOUR_COLOR, write_capture
+# Версия правил анализа для batch_analysis: увеличивается при изменении порогов analyze_health и всего,
+# что меняет результат, кроме таблиц LEAF_COLORS и MIN_CONTOUR_AREA, которые учитываются автоматически
+ANALYSIS_VERSION = 1
+LEAF_COLORS = {
+    "healthy_green": {"lower": (35, 30, 30), "upper": (85, 255, 255), "name": "здоровый зеленый"},
+    "yellow": {"lower": (20, 30, 30), "upper": (35, 255, 255), "name": "желтый"},
+    "brown": {"lower": (10, 30, 10), "upper": (20, 255, 255), "name": "коричневый"},
+    "light_green": {"lower": (35, 30, 30), "upper": (85, 100, 255), "name": "светло-зеленый"}
+}
+LEAF_BITS = {name: 1 << index for index, name in enumerate(LEAF_COLORS)}
+LABEL_COUNT = 1 << len(LEAF_COLORS)
+# Контур растения строится из масок, сглаженных открытием и закрытием. Обе операции монотонны,
+# а light_green лежит внутри healthy_green, поэтому ее сглаженная маска ничего не добавляет к объединению.
+MORPH_COLORS = ("healthy_green", "yellow", "brown")
+MORPH_KERNEL = np.ones((3, 3), np.uint8)
+CAPTURE_TIME = photo_stage("capture")
+HSV_TIME = photo_stage("hsv")
+MORPHOLOGY_TIME = photo_stage("morphology")
+CONTOUR_TIME = photo_stage("contour")
+HEALTH_TIME = photo_stage("analyze_health")
+SCENE_REUSED = METRICS.counter("fitodomik_scene_reused_total", "Снимки, для которых взят анализ прошлого кадра")
+def build_channel_luts():
+    """Три таблицы по 256 значений (H, S, V): для значения канала - биты цветов, в диапазон которых оно попадает"""
+    values = np.arange(256)
+    luts = [np.zeros(256, dtype=np.uint8) for _ in range(3)]
+    for name, color in LEAF_COLORS.items():
+        for channel, lut in enumerate(luts):
+            inside = (values >= color["lower"][channel]) & (values <= color["upper"][channel])
+            lut[inside] |= LEAF_BITS[name]
+    return luts
+HUE_LUT, SATURATION_LUT, VALUE_LUT = build_channel_luts()
+LABELS_WITH_COLOR = {name: [label for label in range(LABEL_COUNT) if label & bit] for name, bit in LEAF_BITS.items()}
+def classify_pixels(hsv):
+    """Метка каждого пикселя - набор битов LEAF_BITS; то же, что cv2.inRange по каждому цвету, но за один проход"""
+    hue, saturation, value = cv2.split(hsv)
+    labels = cv2.LUT(hue, HUE_LUT)
+    cv2.bitwise_and(labels, cv2.LUT(saturation, SATURATION_LUT), dst=labels)
+    cv2.bitwise_and(labels, cv2.LUT(value, VALUE_LUT), dst=labels)
+    return labels
+def hsv_labels(image):
+    """Перевод в HSV и метки цветов каждого пикселя"""
+    with HSV_TIME.time():
+        return classify_pixels(cv2.cvtColor(image, cv2.COLOR_BGR2HSV))
+def plant_outline_mask(labels):
+    """Объединение масок MORPH_COLORS после открытия и закрытия; ненулевые пиксели - растение"""
+    total_mask = None
+    with MORPHOLOGY_TIME.time():
+        for name in MORPH_COLORS:
+            mask = cv2.bitwise_and(labels, LEAF_BITS[name])
+            mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, MORPH_KERNEL)
+            mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, MORPH_KERNEL)
+            total_mask = mask if total_mask is None else cv2.bitwise_or(total_mask, mask)
+    return total_mask
+def color_percentages(labels, plant_mask, plant_pixels):
+    """Доля пикселей каждого цвета внутри маски растения по одной гистограмме меток"""
+    hist = cv2.calcHist([labels], [0], plant_mask, [LABEL_COUNT], [0, LABEL_COUNT]).ravel().astype(np.int64)
+    return {name: (int(hist[labels_with].sum()) / plant_pixels) * 100 for name, labels_with in LABELS_WITH_COLOR.items()}
+DISEASES_DB = {
+    "yellow_leaves": {"name": "Хлороз", "description": "Пожелтение листьев", "causes": ["Недостаток железа", "Переувлажнение", "Недостаток азота"], "solutions": ["Добавить железосодержащие удобрения", "Уменьшить полив", "Внести азотные удобрения"]},
+    "brown_spots": {"name": "Грибковое заболевание", "description": "Коричневые пятна на листьях", "causes": ["Грибковая инфекция", "Избыточная влажность", "Плохая вентиляция"], "solutions": ["Обработать фунгицидами", "Улучшить вентиляцию", "Удалить пораженные листья"]}
+}
+PESTS_DB = {
+    "aphids": {"name": "Тля", "description": "Мелкие насекомые на листьях и стеблях", "damage": "Высасывают сок из растения, вызывают деформацию листьев", "solutions": ["Обработать инсектицидами", "Использовать мыльный раствор", "Привлечь естественных хищников"]},
+    "thrips": {"name": "Трипсы", "description": "Мелкие удлиненные насекомые", "damage": "Повреждают листья и цветы, переносят вирусы", "solutions": ["Обработать инсектицидами", "Использовать синие липкие ловушки", "Удалять сорняки"]}
+}
+MIN_CONTOUR_AREA = 100
+# Быстрый режим: контур ищется на уменьшенном кадре шириной COARSE_WIDTH, а полная обработка идет
+# только внутри рамки растения с запасом ROI_MARGIN от ее размера (но не меньше ROI_MIN_MARGIN пикселей).
+# Кадр уменьшается выборкой пикселей (INTER_NEAREST): на 4K это в 20 раз быстрее INTER_AREA, а метки
+# считаются по настоящим цветам пикселей, без смешивания на краях листьев.
+COARSE_WIDTH = 640
+ROI_MARGIN = 0.05
+ROI_MIN_MARGIN = 16
+ROI_TOLERANCE = 2.0
+def find_contours(labels, min_area):
+    """Внешние контуры растения площадью больше min_area"""
+    outline = plant_outline_mask(labels)
+    with CONTOUR_TIME.time():
+        contours, _ = cv2.findContours(outline, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        return [contour for contour in contours if cv2.contourArea(contour) > min_area]
+def bounding_box(contours):
+    """Общая рамка (x0, y0, x1, y1) всех контуров или None"""
+    if not contours:
+        return None
+    x, y, w, h = cv2.boundingRect(np.concatenate(contours))
+    return x, y, x + w, y + h
+def union_box(first, second):
+    if first is None or second is None:
+        return first or second
+    return min(first[0], second[0]), min(first[1], second[1]), max(first[2], second[2]), max(first[3], second[3])
+def measure(labels, contours, shape, offset=(0, 0)):
+    """Маска растения размера shape и проценты цветов; labels и контуры заданы в окне со сдвигом offset"""
+    plant_mask = np.zeros(shape, dtype=np.uint8)
+    x0, y0 = offset
+    window = plant_mask[y0:y0 + labels.shape[0], x0:x0 + labels.shape[1]]
+    cv2.drawContours(window, contours, -1, 255, -1)
+    plant_pixels = cv2.countNonZero(window)
+    percentages = color_percentages(labels, window, plant_pixels) if plant_pixels > 0 else {}
+    return plant_mask, percentages
+class RoiTracker:
+    """Рамка растения с прошлого снимка для каждой камеры; с нее начинается поиск на следующем кадре"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.boxes = {}
+    def get(self, camera_index, shape):
+        with self.lock:
+            saved = self.boxes.get(camera_index)
+        if saved is None or saved[0] != shape:
+            return None
+        return saved[1]
+    def update(self, camera_index, shape, box):
+        with self.lock:
+            if box is None:
+                self.boxes.pop(camera_index, None)
+            else:
+                self.boxes[camera_index] = (shape, box)
+ROI_TRACKER = RoiTracker()
+# Повторные кадры: снимок сравнивается с последним полностью проанализированным кадром той же камеры по
+# миниатюре SCENE_SIZE в оттенках серого. Клетка миниатюры считается изменившейся, если ее яркость
+# сдвинулась больше чем на SCENE_LEVEL; кадр повторный, если изменилось не больше scene_threshold процентов
+# клеток. Сравнение всегда с полностью проанализированным кадром, поэтому медленный рост не накапливается
+# незамеченным, а не реже раза в SCENE_MAX_AGE секунд анализ все равно идет полностью.
+SCENE_SIZE = (64, 48)
+SCENE_LEVEL = 12
+SCENE_THRESHOLD = 0.25
+SCENE_MAX_AGE = 6 * 3600
+def scene_thumbnail(frame):
+    """Миниатюра кадра для сравнения сцен; кадр сначала прореживается, чтобы не читать все пиксели 4K"""
+    step = max(frame.shape[1] // (SCENE_SIZE[0] * 8), 1)
+    gray = cv2.cvtColor(np.ascontiguousarray(frame[::step, ::step]), cv2.COLOR_BGR2GRAY)
+    return cv2.resize(gray, SCENE_SIZE, interpolation=cv2.INTER_AREA)
+def scene_change(first, second):
+    """Доля клеток миниатюры в процентах, яркость которых изменилась больше чем на SCENE_LEVEL"""
+    changed = cv2.countNonZero(cv2.threshold(cv2.absdiff(first, second), SCENE_LEVEL, 255, cv2.THRESH_BINARY)[1])
+    return changed / first.size * 100
+class SceneCache:
+    """Миниатюра и результат последнего полного анализа для каждой камеры"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.scenes = {}
+    def get(self, camera_index, shape):
+        with self.lock:
+            saved = self.scenes.get(camera_index)
+        if saved is None or saved["shape"] != shape:
+            return None
+        return saved
+    def update(self, camera_index, scene):
+        with self.lock:
+            if scene is None:
+                self.scenes.pop(camera_index, None)
+            else:
+                self.scenes[camera_index] = scene
+SCENE_CACHE = SceneCache()
+def plant_measurements(contours, plant_pixels, shape):
+    """Поля ряда роста для каталога: площадь в пикселях и в процентах кадра, рамка, число контуров"""
+    box = bounding_box(contours) or (None, None, None, None)
+    return {"plant_pixels": plant_pixels, "plant_area": plant_pixels / (shape[0] * shape[1]) * 100,
+            "box_x0": box[0], "box_y0": box[1], "box_x1": box[2], "box_y1": box[3], "contour_count": len(contours)}
+class PlantAnalyzer:
+    """Один снимок с камеры: обнаружение растения, анализ цветов и отчет.
+    log - функция для сообщений (в приложении это сигнал журнала, в службе - печать).
+    camera - CameraService; без него камера открывается на один кадр.
+    writer - PhotoWriter: снимок пишется в фоне; без него, но с save_dir, запись идет сразу в этом потоке.
+    fast - быстрый режим: поиск на уменьшенном кадре и полная обработка только внутри рамки растения,
+    рамка с прошлого снимка этой камеры берется из ROI_TRACKER. Если растение упирается в край рамки
+    или части растения вне рамки могли бы изменить проценты цветов больше чем на tolerance процентных
+    пунктов по сравнению с полным кадром, кадр анализируется целиком. После анализа roi - рамка
+    (x0, y0, x1, y1), внутри которой он шел, или None для полного кадра, plant_contours - контуры
+    растения в координатах всего кадра, plant_box и plant_pixels - их общая рамка и площадь.
+    scene_threshold - пропуск повторных кадров: если по сравнению с последним полностью проанализированным
+    кадром этой камеры изменилось не больше scene_threshold процентов миниатюры, берется прошлый результат
+    из SCENE_CACHE (reused становится True, plant_mask - None), а writer сохраняет только отчет и ссылку
+    на прошлое фото. 0 - анализировать каждый кадр."""
+    def __init__(self, camera_index=0, log=print, save_dir=None, camera=None, fast=False, tolerance=ROI_TOLERANCE,
+                 writer=None, scene_threshold=0.0):
+        self.camera_index = camera_index
+        self.camera = camera
+        self.fast = fast
+        self.tolerance = tolerance
+        self.log = log
+        self.save_dir = save_dir
+        self.writer = writer
+        self.scene_threshold = scene_threshold
+        self.reused = False
+        self.original_image = None
+        self.detection_image = None
+        self.roi = None
+        self.plant_contours = []
+        self.plant_box = None
+        self.plant_pixels = 0
+        self.color_percentages = {}
+        self.detected_diseases = []
+        self.detected_pests = []
+    def run(self):
+        """Делает фото и анализ; возвращает (исходное изображение, контуры растения, анализ) или None"""
+        self.log("📸 Делаем фото с камеры...")
+        with CAPTURE_TIME.time():
+            frame = self.take_photo()
+        if frame is None:
+            self.log("❌ Не удалось получить изображение с камеры")
+            return None
+        self.log("🔍 Анализируем изображение растения...")
+        analysis = self.analyze_frame(frame)
+        if self.writer is not None or self.save_dir is not None:
+            self.save_photo_locally(format_report(analysis), analysis)
+        return self.original_image, self.plant_contours, analysis
+    def analyze_frame(self, frame):
+        """Анализ готового кадра без камеры: обнаружение растения и оценка здоровья"""
+        self.original_image = frame.copy()
+        self.reused = False
+        if not (self.scene_threshold > 0 and self.reuse_scene()):
+            height, width = frame.shape[:2]
+            self.detect_plant(height, width)
+            if self.scene_threshold > 0:
+                SCENE_CACHE.update(self.camera_index, {
+                    "shape": frame.shape, "thumbnail": self.scene, "time": time.time(), "roi": self.roi,
+                    "color_percentages": self.color_percentages, "plant_contours": self.plant_contours,
+                    "plant_box": self.plant_box, "plant_pixels": self.plant_pixels})
+        with HEALTH_TIME.time():
+            return self.analyze_health()
+    def reuse_scene(self):
+        """Берет результат прошлого полного анализа этой камеры, если сцена почти не изменилась"""
+        self.scene = scene_thumbnail(self.original_image)
+        cached = SCENE_CACHE.get(self.camera_index, self.original_image.shape)
+        if cached is None or time.time() - cached["time"] > SCENE_MAX_AGE:
+            return False
+        changed = scene_change(cached["thumbnail"], self.scene)
+        if changed > self.scene_threshold:
+            return False
+        self.height, self.width = self.original_image.shape[:2]
+        self.detection_image = None
+        self.plant_mask = None
+        self.roi = cached["roi"]
+        self.color_percentages = cached["color_percentages"]
+        self.plant_contours = cached["plant_contours"]
+        self.plant_box = cached["plant_box"]
+        self.plant_pixels = cached["plant_pixels"]
+        self.reused = True
+        SCENE_REUSED.inc()
+        self.log(f"♻️ Сцена не изменилась (отличается {changed:.1f}% кадра), берем анализ прошлого снимка")
+        return True
+    def take_photo(self):
+        """Сделать фото с камеры"""
+        if self.camera is not None:
+            frame = self.camera.capture()
+            if frame is None:
+                self.log("❌ Ошибка получения изображения с камеры")
+            return frame
+        try:
+            cap = cv2.VideoCapture(self.camera_index)
+            if not cap.isOpened():
+                self.log("❌ Ошибка подключения камеры")
+                return None
+            ret, frame = cap.read()
+            cap.release()
+            if not ret:
+                self.log("❌ Ошибка получения изображения с камеры")
+                return None
+            return frame
+        except Exception as e:
+            self.log(f"❌ Ошибка при фотографировании: {str(e)}")
+            return None
+    def detect_plant(self, height, width):
+        """Обнаружение растения на изображении: одна классификация пикселей по таблицам вместо inRange на каждый цвет"""
+        try:
+            self.height = height
+            self.width = width
+            self.detection_image = None
+            self.roi = None
+            found = self.detect_in_roi() if self.fast else None
+            if found is None:
+                labels = hsv_labels(self.original_image)
+                filtered_contours = find_contours(labels, MIN_CONTOUR_AREA)
+                found = filtered_contours, (0, 0), measure(labels, filtered_contours, (height, width))
+            filtered_contours, offset, (self.plant_mask, percentages) = found
+            if percentages:
+                self.color_percentages = percentages
+            self.plant_contours = [contour + offset for contour in filtered_contours] if any(offset) else filtered_contours
+            self.plant_box = bounding_box(self.plant_contours)
+            if self.plant_box is not None:
+                x0, y0, x1, y1 = self.plant_box
+                self.plant_pixels = cv2.countNonZero(self.plant_mask[y0:y1, x0:x1])
+            if self.fast:
+                ROI_TRACKER.update(self.camera_index, (height, width), self.plant_box)
+        except Exception as e:
+            self.log(f"❌ Ошибка при обнаружении растения: {str(e)}")
+    def render_detection(self):
+        """Изображение с контурами растения; рисуется только по запросу"""
+        if self.detection_image is None and self.original_image is not None:
+            self.detection_image = self.original_image.copy()
+            cv2.drawContours(self.detection_image, self.plant_contours, -1, CONTOUR_COLOR, 2)
+        return self.detection_image
+    def detect_in_roi(self):
+        """Быстрый путь: (контуры, сдвиг рамки, (маска, проценты)) или None, если нужен полный анализ"""
+        scale = COARSE_WIDTH / self.width
+        if scale > 0.5:
+            return None
+        small = cv2.resize(self.original_image, None, fx=scale, fy=scale, interpolation=cv2.INTER_NEAREST)
+        small_labels = hsv_labels(small)
+        small_outline = plant_outline_mask(small_labels)
+        with CONTOUR_TIME.time():
+            contours, _ = cv2.findContours(small_outline, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            box = bounding_box([contour for contour in contours if cv2.contourArea(contour) > MIN_CONTOUR_AREA * scale * scale])
+        if box is None:
+            return None
+        box = tuple(int(round(value / scale)) for value in box)
+        box = union_box(box, ROI_TRACKER.get(self.camera_index, (self.height, self.width)))
+        margin_x = max(int((box[2] - box[0]) * ROI_MARGIN), ROI_MIN_MARGIN)
+        margin_y = max(int((box[3] - box[1]) * ROI_MARGIN), ROI_MIN_MARGIN)
+        x0, y0 = max(box[0] - margin_x, 0), max(box[1] - margin_y, 0)
+        x1, y1 = min(box[2] + margin_x, self.width), min(box[3] + margin_y, self.height)
+        crop = self.original_image[y0:y1, x0:x1]
+        labels = hsv_labels(crop)
+        contours = find_contours(labels, MIN_CONTOUR_AREA)
+        found = bounding_box(contours)
+        if found is None:
+            return None
+        if ((found[0] == 0 and x0 > 0) or (found[1] == 0 and y0 > 0)
+                or (found[2] == x1 - x0 and x1 < self.width) or (found[3] == y1 - y0 and y1 < self.height)):
+            return None
+        plant_mask, percentages = measure(labels, contours, (self.height, self.width), (x0, y0))
+        # Пиксели растения вне рамки, видимые на уменьшенном кадре, могли бы сдвинуть любой процент
+        # не больше чем на 100 * outside / (plant + outside): это и сравнивается с допуском.
+        small_x0, small_y0 = int(x0 * scale), int(y0 * scale)
+        small_x1, small_y1 = int(np.ceil(x1 * scale)), int(np.ceil(y1 * scale))
+        outside = cv2.countNonZero(small_outline) - cv2.countNonZero(small_outline[small_y0:small_y1, small_x0:small_x1])
+        outside /= scale * scale
+        plant_pixels = cv2.countNonZero(plant_mask[y0:y1, x0:x1])
+        if 100 * outside / (plant_pixels + outside) > self.tolerance:
+            return None
+        self.roi = (x0, y0, x1, y1)
+        return contours, (x0, y0), (plant_mask, percentages)
+    def analyze_health(self):
+        """Анализ здоровья растения"""
+        try:
+            self.detected_diseases = []
+            self.detected_pests = []
+            if self.color_percentages.get("yellow", 0) > 10:
+                self.detected_diseases.append(DISEASES_DB["yellow_leaves"])
+            if self.color_percentages.get("brown", 0) > 5:
+                self.detected_diseases.append(DISEASES_DB["brown_spots"])
+            if self.color_percentages.get("brown", 0) > 5:
+                if self.color_percentages.get("yellow", 0) > 15:
+                    self.detected_pests.append(PESTS_DB["aphids"])
+                elif self.color_percentages.get("brown", 0) > 10:
+                    self.detected_pests.append(PESTS_DB["thrips"])
+            status = "нормальное"
+            details = []
+            recommendations = []
+            if self.color_percentages.get("yellow", 0) > 10:
+                status = "требует внимания"
+                details.append("Обнаружено значительное пожелтение листьев")
+                recommendations.append("Проверьте режим полива")
+                recommendations.append("Проверьте уровень освещенности")
+            if self.color_percentages.get("brown", 0) > 5:
+                status = "требует внимания"
+                details.append("Обнаружены коричневые участки на листьях")
+                recommendations.append("Проверьте на наличие заболеваний")
+                recommendations.append("Удалите поврежденные листья")
+            for disease in self.detected_diseases:
+                details.append(f"{disease['name']}: {disease['description']}")
+                recommendations.extend(disease['solutions'])
+            for pest in self.detected_pests:
+                details.append(f"{pest['name']}: {pest['description']}")
+                recommendations.extend(pest['solutions'])
+            if not details:
+                recommendations.append("Поддерживайте текущий режим ухода")
+            LEAF_COLORS = {
+                "healthy_green": {"name": "здоровый зеленый"},
+                "yellow": {"name": "желтый"},
+                "brown": {"name": "коричневый"},
+                "light_green": {"name": "светло-зеленый"}
+            }
+            return {
+                "состояние": status,
+                "распределение цветов": "; ".join([f"{LEAF_COLORS[k]['name']}: {v:.1f}%" for k, v in self.color_percentages.items() if v > 1]),
+                "детали": "; ".join(details) if details else "отклонений не выявлено",
+                "рекомендации": "; ".join(recommendations)
+            }
+        except Exception as e:
+            self.log(f"❌ Ошибка при анализе здоровья растения: {str(e)}")
+            return {
+                "состояние": "ошибка анализа",
+                "распределение цветов": "",
+                "детали": f"Ошибка при анализе: {str(e)}",
+                "рекомендации": "Попробуйте повторить анализ"
+            }
+    def catalog_record(self, analysis, ts):
+        """Поля записи каталога снимков, кроме имен файлов"""
+        record = {color: self.color_percentages.get(color, 0.0) for color in LEAF_COLORS}
+        record.update(plant_measurements(self.plant_contours, self.plant_pixels, self.original_image.shape))
+        record.update(ts=ts, camera=self.camera_index, status=analysis["состояние"],
+                      diseases=", ".join(disease["name"] for disease in self.detected_diseases),
+                      pests=", ".join(pest["name"] for pest in self.detected_pests))
+        return record
+    def save_photo_locally(self, text="Анализ состояния растений", analysis=None):
+        """Сохранить фото, контуры и отчет: через очередь writer (с записью в каталог) или сразу в save_dir"""
+        if self.original_image is None:
+            self.log("❌ Нет изображений для сохранения")
+            return False
+        now = datetime.now()
+        timestamp = now.strftime('%Y%m%d_%H%M%S')
+        if self.writer is not None:
+            record = None if analysis is None else self.catalog_record(analysis, now.timestamp())
+            self.writer.submit(self.original_image, self.plant_contours, text, timestamp, record, self.reused)
+            return True
+        try:
+            write_capture(self.save_dir, timestamp, self.original_image, self.plant_contours, text)
+            self.log("✅ Фото сохранено локально")
+            return True
+        except Exception as e:
+            self.log(f"❌ Ошибка при сохранении файлов: {str(e)}")
+            return False
+def format_report(analysis):
+    return f"АНАЛИЗ СОСТОЯНИЯ РАСТЕНИЯ\nДата анализа: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\nСОСТОЯНИЕ: {analysis['состояние']}\n\nРАСПРЕДЕЛЕНИЕ ЦВЕТОВ:\n{analysis['распределение цветов']}\n\nДЕТАЛИ АНАЛИЗА:\n{analysis['детали']}\n\nРЕКОМЕНДАЦИИ:\n{analysis['рекомендации']}\n"
@@ -0,0 +1,72 @@
+"""Поиск контроллеров ФитоДомика: параллельный опрос последовательных портов"""
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import serial
+from serial.tools import list_ports
+from serial_parser import parse_line, LineParseError
+ProbeResult = namedtuple('ProbeResult', 'device serial_port initial_data error elapsed')
+ARDUINO_VIDS = (0x2341, 0x2A03, 0x1A86, 0x0403, 0x10C4)
+def list_candidate_ports():
+    """Реальные порты системы; платы с известными USB VID (Arduino, CH340, FTDI, CP210x) идут первыми"""
+    ports = list(list_ports.comports())
+    ports.sort(key=lambda p: (p.vid not in ARDUINO_VIDS, p.device))
+    return [p.device for p in ports]
+def probe_port(device, baud=9600, timeout=4.0, ping_delay=1.0, ping_interval=0.5):
+    """Открывает порт и ждет любую строку, которую узнает serial_parser (в том числе PONG на PING).
+
+    Открытие порта перезагружает Arduino, поэтому PING начинаем слать после ping_delay,
+    когда загрузчик уже отработал. При успехе порт остается открытым, а байты начиная
+    с узнанной строки возвращаются в initial_data, чтобы первое показание не потерялось.
+    """
+    started = time.monotonic()
+    try:
+        port = serial.Serial(device, baud, timeout=0.1)
+    except (serial.SerialException, OSError, ValueError) as e:
+        return ProbeResult(device, None, b"", str(e), time.monotonic() - started)
+    buffer = bytearray()
+    next_ping = started + ping_delay
+    try:
+        while time.monotonic() - started < timeout:
+            now = time.monotonic()
+            if now >= next_ping:
+                port.write(b"PING\n")
+                next_ping = now + ping_interval
+            chunk = port.read(port.in_waiting or 1)
+            if not chunk:
+                continue
+            buffer.extend(chunk)
+            start = 0
+            while True:
+                end = buffer.find(b"\n", start)
+                if end < 0:
+                    break
+                line = buffer[start:end].decode('utf-8', errors='replace').strip()
+                try:
+                    known = parse_line(line) is not None
+                except LineParseError:
+                    known = True
+                if known:
+                    return ProbeResult(device, port, bytes(buffer[start:]), None, time.monotonic() - started)
+                start = end + 1
+            del buffer[:start]
+    except Exception as e:
+        port.close()
+        return ProbeResult(device, None, b"", str(e), time.monotonic() - started)
+    port.close()
+    return ProbeResult(device, None, b"", "нет ответа прошивки", time.monotonic() - started)
+def discover(devices=None, on_result=None, timeout=4.0, max_workers=8):
+    """Опрашивает порты параллельно; on_result вызывается для каждого порта по мере готовности"""
+    if devices is None:
+        devices = list_candidate_ports()
+    results = []
+    if not devices:
+        return results
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(devices)), thread_name_prefix="PortProbe") as pool:
+        futures = [pool.submit(probe_port, device, timeout=timeout) for device in devices]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+    return results
@@ -0,0 +1,132 @@
+"""Хранилище показаний датчиков: SQLite в режиме WAL с пакетной записью из фонового потока"""
+import os
+import queue
+import sqlite3
+import threading
+import time
+from serial_parser import SensorReading
+METRICS = ('temperature', 'humidity', 'soil')
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS readings (
+    device TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    ts REAL NOT NULL,
+    value REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS readings_device_metric_ts ON readings (device, metric, ts);
+"""
+_STOP = object()
+class SensorStore:
+    def __init__(self, path, log=print, batch_size=200, flush_interval=2.0):
+        self.path = path
+        self.log = log
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue()
+        self.local = threading.local()
+        self.writer = None
+        self.rows_written = 0
+        self.batches_written = 0
+        self.write_errors = 0
+    def start(self):
+        """Создает схему и запускает поток записи"""
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        conn = self.connect()
+        conn.executescript(SCHEMA)
+        conn.commit()
+        self.writer = threading.Thread(target=self.writer_loop, name="SensorStoreWriter", daemon=True)
+        self.writer.start()
+    def connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+    def add(self, device, data, ts=None):
+        """Ставит показания в очередь на запись; вызывается из потока чтения и не блокирует его.
+        ts - время получения показаний (time.time()); без него берется момент вызова"""
+        if ts is None:
+            ts = time.time()
+        for metric in METRICS:
+            value = data.get(metric)
+            if value is not None:
+                self.queue.put((device, metric, ts, value))
+    def subscriber(self, device):
+        """Подписчик SerialMux, который сохраняет каждое показание устройства с временем получения строки:
+        монотонное received_at переводится в настенное время, поэтому очередь строк не сдвигает метки"""
+        def on_line(line, record, received_at):
+            if type(record) is SensorReading:
+                ts = None if received_at is None else time.time() - (time.monotonic() - received_at)
+                self.add(device, record._asdict(), ts)
+        return on_line
+    def writer_loop(self):
+        conn = self.connect()
+        batch = []
+        deadline = None
+        running = True
+        while running:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                running = False
+            elif item is not None:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+                if len(batch) < self.batch_size:
+                    continue
+            if batch:
+                self.write_batch(conn, batch)
+                batch = []
+            deadline = None
+        conn.close()
+    def write_batch(self, conn, batch):
+        try:
+            with conn:
+                conn.executemany("INSERT INTO readings (device, metric, ts, value) VALUES (?, ?, ?, ?)", batch)
+            self.rows_written += len(batch)
+            self.batches_written += 1
+        except sqlite3.Error as e:
+            self.write_errors += 1
+            self.log(f"❌ Ошибка записи показаний в {self.path}: {e}")
+    def reader_connection(self):
+        """Отдельное соединение на каждый читающий поток: WAL позволяет читать параллельно с записью"""
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = self.connect()
+            self.local.conn = conn
+        return conn
+    def query(self, device, metric, start, end=None):
+        """Возвращает список (ts, value) за интервал [start, end] по индексу (device, metric, ts)"""
+        if end is None:
+            end = time.time()
+        return self.reader_connection().execute(
+            "SELECT ts, value FROM readings WHERE device = ? AND metric = ? AND ts BETWEEN ? AND ? ORDER BY ts",
+            (device, metric, start, end)
+        ).fetchall()
+    def latest(self, device):
+        """Последнее сохраненное значение каждой величины для устройства"""
+        result = {}
+        conn = self.reader_connection()
+        for metric in METRICS:
+            row = conn.execute(
+                "SELECT value FROM readings WHERE device = ? AND metric = ? ORDER BY ts DESC LIMIT 1",
+                (device, metric)
+            ).fetchone()
+            if row is not None:
+                result[metric] = row[0]
+        return result
+    def close(self):
+        """Дописывает очередь и останавливает поток записи"""
+        if self.writer is not None:
+            self.queue.put(_STOP)
+            self.writer.join()
+            self.writer = None
+        conn = getattr(self.local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self.local.conn = None
@@ -0,0 +1,181 @@
+"""Единственный владелец последовательного порта: один поток выполняет все чтения и записи"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from command_channel import CommandChannel
+from metrics import METRICS
+from serial_parser import parse_line, LineParseError, SensorReading
+PARSE_TIME = METRICS.histogram("fitodomik_serial_parse_seconds", "Разбор одной строки контроллера")
+LINES = METRICS.counter("fitodomik_serial_lines_total", "Строки, прочитанные из портов контроллеров")
+PARSE_ERRORS = METRICS.counter("fitodomik_serial_parse_errors_total", "Строки, которые не удалось разобрать")
+class SerialMux:
+    """Читает порт, режет поток на строки, разбирает каждую строку один раз и раздает подписчикам.
+
+    Подписчик - функция (line, record, received_at), где record - запись serial_parser или None,
+    а received_at - time.monotonic() в момент получения байт. Подписчики вызываются из потока порта
+    и не должны блокироваться. Запись идет через очередь, которую разбирает тот же поток;
+    команды с ожиданием ответа отправляются через channel.
+    log(message, level=None) - журнал ошибок порта и подписчиков; неразобранные строки пишутся с уровнем DEBUG.
+    После max_errors ошибок порта подряд (контроллер отключили от USB) поток останавливается, команды и
+    записи в очереди завершаются ошибкой, а подписчики subscribe_lost получают callback(error), чтобы
+    владелец закрыл сессию и снова поискал контроллер.
+    """
+    def __init__(self, serial_port, name="", initial_data=b"", log=print, max_errors=5):
+        self.serial_port = serial_port
+        self.log = log
+        self.max_errors = max_errors
+        self.initial_data = initial_data
+        self.name = name or getattr(serial_port, 'port', '')
+        self.subscribers = []
+        self.stats_subscribers = []
+        self.lost_subscribers = []
+        self.writes = queue.Queue()
+        self.running = False
+        self.thread = None
+        self.readings = 0
+        self.parse_errors = 0
+        self.window_bytes = 0
+        self.window_lines = 0
+        self.window_start = time.monotonic()
+        self.channel = CommandChannel(self.write)
+        self.subscribe(self.feed_channel)
+    def subscribe(self, callback):
+        self.subscribers = self.subscribers + [callback]
+    def unsubscribe(self, callback):
+        self.subscribers = [s for s in self.subscribers if s != callback]
+    def subscribe_stats(self, callback):
+        self.stats_subscribers = self.stats_subscribers + [callback]
+    def unsubscribe_stats(self, callback):
+        self.stats_subscribers = [s for s in self.stats_subscribers if s != callback]
+    def subscribe_lost(self, callback):
+        self.lost_subscribers = self.lost_subscribers + [callback]
+    def feed_channel(self, line, record, received_at):
+        self.channel.feed_line(line)
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name=f"SerialMux {self.name}", daemon=True)
+        self.thread.start()
+    def write(self, data):
+        """Ставит байты в очередь записи и будит поток порта; Future завершится после записи"""
+        future = Future()
+        if not self.running:
+            future.set_exception(IOError(f"порт {self.name} закрыт"))
+            return future
+        self.writes.put((data, future))
+        self.wake()
+        return future
+    def wake(self):
+        if hasattr(self.serial_port, 'cancel_read'):
+            try:
+                self.serial_port.cancel_read()
+            except Exception:
+                pass
+    def run(self):
+        buffer = bytearray(self.initial_data)
+        self.split_lines(buffer, time.monotonic())
+        errors = 0
+        while self.running:
+            try:
+                self.flush_writes()
+                chunk = self.serial_port.read(self.serial_port.in_waiting or 1)
+                received_at = time.monotonic()
+                errors = 0
+                if chunk:
+                    self.window_bytes += len(chunk)
+                    buffer.extend(chunk)
+                    self.split_lines(buffer, received_at)
+                self.update_stats(received_at)
+            except Exception as e:
+                if not self.running:
+                    break
+                errors += 1
+                if errors == 1:
+                    self.log(f"❌ Ошибка порта {self.name}: {e}")
+                if errors >= self.max_errors:
+                    self.lose(e)
+                    return
+                buffer.clear()
+                time.sleep(0.5)
+        self.fail_writes(IOError(f"порт {self.name} закрыт"))
+    def lose(self, error):
+        """Порт перестал отвечать: останавливает поток, завершает ожидающие команды и записи и сообщает подписчикам"""
+        self.log(f"❌ Порт {self.name} не отвечает ({self.max_errors} ошибок подряд), соединение закрыто")
+        self.running = False
+        self.channel.close()
+        self.fail_writes(IOError(f"порт {self.name} недоступен: {error}"))
+        for callback in self.lost_subscribers:
+            try:
+                callback(error)
+            except Exception as e:
+                self.log(f"❌ Ошибка подписчика порта {self.name}: {e}")
+    def split_lines(self, buffer, received_at):
+        while True:
+            end = buffer.find(b"\n")
+            if end < 0:
+                return
+            raw = bytes(buffer[:end])
+            del buffer[:end + 1]
+            self.dispatch(raw.decode('utf-8', errors='replace').strip(), received_at)
+    def flush_writes(self):
+        while True:
+            try:
+                data, future = self.writes.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                future.set_result(self.serial_port.write(data))
+            except Exception as e:
+                future.set_exception(e)
+    def fail_writes(self, error):
+        while True:
+            try:
+                data, future = self.writes.get_nowait()
+            except queue.Empty:
+                return
+            future.set_exception(error)
+    def dispatch(self, line, received_at):
+        if not line:
+            return
+        self.window_lines += 1
+        LINES.inc()
+        started = time.perf_counter()
+        try:
+            record = parse_line(line)
+        except LineParseError as e:
+            self.parse_errors += 1
+            PARSE_ERRORS.inc()
+            self.log(f"Не удалось разобрать строку {self.name}: {e}", "DEBUG")
+            record = None
+        PARSE_TIME.observe(time.perf_counter() - started)
+        if type(record) is SensorReading:
+            self.readings += 1
+        for callback in self.subscribers:
+            try:
+                callback(line, record, received_at)
+            except Exception as e:
+                self.log(f"❌ Ошибка подписчика порта {self.name}: {e}")
+    def update_stats(self, now):
+        """Раз в секунду публикует скорость чтения: байт/с, строк/с, число показаний и ошибок разбора"""
+        elapsed = now - self.window_start
+        if elapsed < 1.0:
+            return
+        stats = {
+            'bytes_per_sec': self.window_bytes / elapsed,
+            'lines_per_sec': self.window_lines / elapsed,
+            'parse_errors': self.parse_errors,
+            'readings': self.readings
+        }
+        self.window_bytes = 0
+        self.window_lines = 0
+        self.window_start = now
+        for callback in self.stats_subscribers:
+            callback(stats)
+    def close(self):
+        """Останавливает канал команд и поток порта; сам порт закрывает владелец объекта Serial"""
+        self.channel.close()
+        self.running = False
+        self.wake()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()
+        self.fail_writes(IOError(f"порт {self.name} закрыт"))
@@ -0,0 +1,123 @@
+"""Разбор строк, которые скетч temp_humidity_light_2.ino печатает в последовательный порт"""
+from math import isfinite
+from collections import namedtuple
+from datetime import datetime
+SensorReading = namedtuple('SensorReading', 'temperature humidity soil')
+SensorFault = namedtuple('SensorFault', 'sensor message')
+DeviceState = namedtuple('DeviceState', 'device on reason')
+DeviceStatesHeader = namedtuple('DeviceStatesHeader', '')
+ControllerTime = namedtuple('ControllerTime', 'time')
+TimeSet = namedtuple('TimeSet', 'time')
+CommandAck = namedtuple('CommandAck', 'token')
+StatusMessage = namedtuple('StatusMessage', 'text')
+class LineParseError(ValueError):
+    """Строка известного типа, которую не удалось разобрать"""
+    def __init__(self, line):
+        super().__init__(f"не удалось разобрать строку: {line!r}")
+        self.line = line
+ACK_TOKENS = (
+    'TIME_OK', 'TEMP_OK', 'TEMP_TOL_OK', 'SOIL_OK', 'SOIL_TOL_OK',
+    'CURT_OPEN_OK', 'CURT_CLOSE_OK', 'LAMP_ON_OK', 'LAMP_OFF_OK', 'ALL_OK', 'ALL_ERR', 'PONG'
+)
+DEVICE_NAMES = {'Lamp': 'lamp', 'Curtains': 'curtains', 'Pump': 'pump', 'Fan': 'fan'}
+DEVICE_WORDS = {'ON': True, 'OFF': False, 'OPEN': True, 'CLOSED': False}
+STATUS_LINES = (
+    'Waiting for time synchronization...',
+    'Send command TIME:YYYY-MM-DD HH:MM:SS',
+    'Long button press - switching to time display'
+)
+# Причины включения насоса и вентилятора, которые печатает прошивка; строки с другой причиной
+# разбираются через _DISPATCH
+DEVICE_EVENTS = (
+    ('pump', True, 'low soil moisture'), ('pump', False, 'target soil moisture reached'),
+    ('fan', True, 'high temperature'), ('fan', False, 'target temperature reached')
+)
+def _constant_lines():
+    """Строки без изменяемых значений разбираются один раз при импорте"""
+    lines = {
+        'Device states:': DeviceStatesHeader(),
+        'Failed to read from DHT sensor!': SensorFault('dht', 'Failed to read from DHT sensor!')
+    }
+    for title, device in DEVICE_NAMES.items():
+        for word, on in DEVICE_WORDS.items():
+            lines[f"{title}: {word}"] = DeviceState(device, on, None)
+            lines[f"{title} {word}"] = DeviceState(device, on, None)
+    for device, on, reason in DEVICE_EVENTS:
+        lines[f"{device.capitalize()} turned {'ON' if on else 'OFF'}: {reason}"] = DeviceState(device, on, reason)
+    for token in ACK_TOKENS:
+        lines[token] = CommandAck(token)
+    for text in STATUS_LINES:
+        lines[text] = StatusMessage(text)
+    return lines
+# Записи с переменными полями создаются через tuple.__new__: конструктор namedtuple - лишний вызов Python на строку
+_new = tuple.__new__
+def _humidity(line, rest):
+    """Показания DHT; nan или inf прошивка печатает, когда датчик не ответил, - это отказ датчика"""
+    humidity, sep, temperature = rest.partition('Temperature:')
+    humidity = float(humidity.rstrip('% '))
+    temperature = float(temperature.rstrip('°C ')) if sep else None
+    if not isfinite(humidity) or (sep and not isfinite(temperature)):
+        return _new(SensorFault, ('dht', line))
+    return _new(SensorReading, (temperature, humidity, None))
+def _temperature(line, rest):
+    temperature = float(rest.rstrip('°C '))
+    if not isfinite(temperature):
+        return _new(SensorFault, ('dht', line))
+    return _new(SensorReading, (temperature, None, None))
+def _soil(line, rest):
+    soil = float(rest.rstrip('% '))
+    if not isfinite(soil):
+        raise ValueError(f"не число: {rest.strip()}")
+    return _new(SensorReading, (None, None, soil))
+def _device_turned(device, on):
+    return lambda line, rest: DeviceState(device, on, rest.strip() or None)
+_CONSTANT_LINES = _constant_lines()
+_DISPATCH = {
+    'Humidity': _humidity,
+    'Temperature': _temperature,
+    'Soil moisture': _soil,
+    'Current time': lambda line, rest: _new(ControllerTime, (datetime.fromisoformat(rest.strip()),)),
+    'Time set to': lambda line, rest: _new(TimeSet, (datetime.fromisoformat(rest.strip()),)),
+}
+for _title, _device in (('Pump', 'pump'), ('Fan', 'fan')):
+    _DISPATCH[f"{_title} turned ON"] = _device_turned(_device, True)
+    _DISPATCH[f"{_title} turned OFF"] = _device_turned(_device, False)
+# Прошивка печатает показания каждые несколько секунд, и пока условия в теплице не меняются, строки
+# повторяются слово в слово. Разобранные строки показаний запоминаются рядом с постоянными строками
+# (записи неизменяемы, одну запись можно отдавать много раз); когда запомнено больше RECENT_READINGS строк,
+# словарь заменяется новым целиком, поэтому потоки разных портов никогда не видят его наполовину очищенным.
+RECENT_READINGS = 1024
+_known_lines = dict(_CONSTANT_LINES)
+def parse_line(line):
+    """Возвращает типизированную запись для строки или None, если тип строки неизвестен.
+    Для строки известного типа с испорченным содержимым выбрасывает LineParseError."""
+    global _known_lines
+    record = _known_lines.get(line)
+    if record is not None:
+        return record
+    head, sep, rest = line.partition(':')
+    if not sep:
+        return None
+    handler = _DISPATCH.get(head)
+    if handler is None:
+        return None
+    try:
+        record = handler(line, rest)
+    except ValueError:
+        raise LineParseError(line) from None
+    if type(record) is SensorReading:
+        known = _known_lines
+        if len(known) >= len(_CONSTANT_LINES) + RECENT_READINGS:
+            known = _known_lines = dict(_CONSTANT_LINES)
+        known[line] = record
+    return record
+def reading_to_dict(record):
+    """Преобразует SensorReading в словарь показаний, как его ждет интерфейс"""
+    data = {}
+    if record.temperature is not None:
+        data['temperature'] = record.temperature
+    if record.humidity is not None:
+        data['humidity'] = record.humidity
+    if record.soil is not None:
+        data['soil'] = record.soil
+    return data
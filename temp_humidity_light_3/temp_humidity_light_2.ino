@@ -212,7 +212,9 @@ void processSerialCommands() {
     String command = Serial.readStringUntil('\n');
     command.trim();
     command.toUpperCase();
-    if (command.startsWith("TIME:")) {
+    if (command == "PING") {
+      Serial.println("PONG");
+    } else if (command.startsWith("TIME:")) {
       setTimeFromString(command.substring(5));
       isTimeSet = true;
       Serial.println("TIME_OK");
@@ -256,10 +258,47 @@ void processSerialCommands() {
       lampOffHour = h; lampOffMinute = m;
       Serial.println("LAMP_OFF_OK");
       paramsSetFromPC = true;
+    } else if (command.startsWith("SET:ALL:")) {
+      if (setAllFromString(command.substring(8))) {
+        Serial.println("ALL_OK");
+        paramsSetFromPC = true;
+      } else {
+        Serial.println("ALL_ERR");
+      }
     }
     delay(100);
   }
 }
+bool setAllFromString(String data) {
+  String fields[8];
+  int count = 0;
+  int start = 0;
+  while (count < 8) {
+    int comma = data.indexOf(',', start);
+    if (comma < 0) {
+      fields[count++] = data.substring(start);
+      break;
+    }
+    fields[count++] = data.substring(start, comma);
+    start = comma + 1;
+  }
+  if (count != 8) {
+    return false;
+  }
+  targetTemperature = fields[0].toInt();
+  tempTolerance = fields[1].toInt();
+  targetSoilMoisture = fields[2].toInt();
+  soilTolerance = fields[3].toInt();
+  setHourMinuteFromString(fields[4], &curtainsOpenHour, &curtainsOpenMinute);
+  setHourMinuteFromString(fields[5], &curtainsCloseHour, &curtainsCloseMinute);
+  setHourMinuteFromString(fields[6], &lampOnHour, &lampOnMinute);
+  setHourMinuteFromString(fields[7], &lampOffHour, &lampOffMinute);
+  return true;
+}
+void setHourMinuteFromString(String value, int *hour, int *minute) {
+  *hour = value.substring(0, 2).toInt();
+  *minute = value.substring(3, 5).toInt();
+}
 void setTimeFromString(String timeData) {
   int yearVal = timeData.substring(0, 4).toInt();
   int monthVal = timeData.substring(5, 7).toInt();
@@ -288,10 +327,14 @@ void waitForTimeSync() {
   while (!isTimeSet) {
     if (Serial.available() > 0) {
       String command = Serial.readStringUntil('\n');
+      command.trim();
       if (command.startsWith("TIME:")) {
         String timeData = command.substring(5);
         setTimeFromString(timeData);
+        Serial.println("TIME_OK");
         break;
+      } else if (command == "PING") {
+        Serial.println("PONG");
       }
     }
     delay(100);
@@ -0,0 +1,85 @@
+import json
+import pytest
+from app_settings import DEFAULT_PROFILE, DEFAULTS, Settings, check_value
+def read(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "config.json")
+    settings = Settings(path, log=print, save_delay=60)
+    settings.load()
+    settings.set("camera_index", 2)
+    settings.update({"analysis_tolerance": 3, "controllers": {"COM3": {"temp_min": 20.0}}})
+    settings.close()
+    assert not (tmp_path / "config.json.tmp").exists()
+    loaded = Settings(path)
+    loaded.load()
+    assert loaded.camera_index == 2
+    assert loaded.analysis_tolerance == 3.0 and isinstance(loaded.analysis_tolerance, float)
+    assert loaded.controllers == {"COM3": {"temp_min": 20.0}}
+    assert loaded.photo_mode == DEFAULTS["photo_mode"]
+def test_legacy_flat_file(tmp_path):
+    """Файл без профилей читается как профиль DEFAULT_PROFILE и при записи переходит в новый формат"""
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"camera_index": 1, "port": "COM5", "unknown": 7}), encoding='utf-8')
+    settings = Settings(str(path))
+    settings.load()
+    assert settings.profile == DEFAULT_PROFILE
+    assert (settings.camera_index, settings.port) == (1, "COM5")
+    settings.set("interval_minutes", 5)
+    settings.close()
+    document = read(path)
+    assert document["profile"] == DEFAULT_PROFILE
+    assert document["profiles"][DEFAULT_PROFILE]["port"] == "COM5"
+    assert "unknown" not in document["profiles"][DEFAULT_PROFILE]
+def test_invalid_values_fall_back_to_defaults(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"camera_index": True, "photo_mode": "never", "fast_analysis": 1}), encoding='utf-8')
+    messages = []
+    settings = Settings(str(path), log=messages.append)
+    settings.load()
+    assert settings.camera_index == DEFAULTS["camera_index"]
+    assert settings.photo_mode == DEFAULTS["photo_mode"]
+    assert settings.fast_analysis == DEFAULTS["fast_analysis"]
+    assert len(messages) == 3
+def test_check_value():
+    assert check_value("analysis_tolerance", 2) == 2.0
+    for key, value in (("camera_index", "0"), ("camera_index", False), ("photo_codec", "gif"), ("nope", 1)):
+        with pytest.raises(ValueError):
+            check_value(key, value)
+def test_subscribers_get_only_changes(tmp_path):
+    settings = Settings(str(tmp_path / "config.json"), save_delay=60)
+    changes = []
+    settings.subscribe(changes.append)
+    settings.update({"camera_index": 0, "port": "COM7"})
+    settings.set("port", "COM7")
+    settings.close()
+    assert changes == [{"port": "COM7"}]
+def test_many_changes_one_write(tmp_path, monkeypatch):
+    settings = Settings(str(tmp_path / "config.json"), save_delay=60)
+    writes = []
+    monkeypatch.setattr("app_settings.os.replace", lambda src, dst: writes.append(dst))
+    for index in range(100):
+        settings.set("interval_minutes", index + 1)
+    assert writes == []
+    settings.close()
+    assert len(writes) == 1
+def test_profiles(tmp_path):
+    path = str(tmp_path / "config.json")
+    settings = Settings(path, save_delay=60)
+    settings.set("camera_index", 1)
+    settings.create_profile("Зима")
+    assert settings.profile == "Зима" and settings.camera_index == 1
+    changed = settings.update({"camera_index": 3})
+    assert changed == {"camera_index": 3}
+    assert settings.switch_profile(DEFAULT_PROFILE) == {"camera_index": 1}
+    with pytest.raises(ValueError):
+        settings.create_profile("Зима")
+    settings.close()
+    loaded = Settings(path)
+    loaded.load(profile="Зима")
+    assert loaded.profile_names() == [DEFAULT_PROFILE, "Зима"] and loaded.camera_index == 3
+    loaded.delete_profile("Зима")
+    assert loaded.profile == DEFAULT_PROFILE
+    with pytest.raises(ValueError):
+        loaded.delete_profile(DEFAULT_PROFILE)
@@ -0,0 +1,76 @@
+import threading
+from capture_queue import CaptureQueue
+class Camera:
+    """run для CaptureQueue: снимок ждет gate, результат - индекс камеры"""
+    def __init__(self):
+        self.gate = threading.Event()
+        self.started = threading.Event()
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+    def __call__(self, job):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        self.started.set()
+        self.gate.wait(5)
+        with self.lock:
+            self.active -= 1
+        return job.camera_index
+def test_requests_before_start_are_coalesced():
+    camera = Camera()
+    queue = CaptureQueue(camera, log=lambda message: None)
+    running = queue.submit(0, "кнопка")
+    assert camera.started.wait(5)
+    calls = []
+    first = queue.submit(0, "кнопка", callback=calls.append)
+    second = queue.submit(0, "расписание", callback=calls.append)
+    assert first is second and first is not running
+    assert first.sources == ["кнопка", "расписание"]
+    assert queue.depth(0) == 2
+    camera.gate.set()
+    assert first.wait(5) == 0
+    assert calls == [first]
+    stats = queue.stats()
+    assert (stats["submitted"], stats["coalesced"], stats["completed"]) == (3, 1, 2)
+    queue.close()
+def test_callback_error_keeps_worker():
+    camera = Camera()
+    camera.gate.set()
+    messages = []
+    queue = CaptureQueue(camera, log=messages.append)
+    def broken(job):
+        raise RuntimeError("обработчик упал")
+    assert queue.submit(0, callback=broken).wait(5) == 0
+    assert queue.submit(0).wait(5) == 0
+    assert any("обработчик упал" in message for message in messages)
+    queue.close()
+def test_run_error_is_recorded():
+    def run(job):
+        raise OSError("камера недоступна")
+    queue = CaptureQueue(run, log=lambda message: None)
+    job = queue.submit(0)
+    assert job.wait(5) is None
+    assert isinstance(job.error, OSError)
+    assert queue.stats()["failed"] == 1
+    queue.close()
+def test_cameras_of_one_device_never_overlap():
+    camera = Camera()
+    queue = CaptureQueue(camera, log=lambda message: None, device=lambda camera_index: "service")
+    first = queue.submit(0)
+    assert camera.started.wait(5)
+    second = queue.submit(1)
+    camera.gate.set()
+    assert (first.wait(5), second.wait(5)) == (0, 1)
+    assert camera.max_active == 1
+    queue.close()
+def test_close_cancels_pending_and_rejects_new():
+    camera = Camera()
+    queue = CaptureQueue(camera, log=lambda message: None)
+    queue.submit(0)
+    assert camera.started.wait(5)
+    pending = queue.submit(0)
+    camera.gate.set()
+    queue.close()
+    assert pending.done.is_set()
+    assert queue.submit(0) is None
@@ -0,0 +1,68 @@
+import threading
+import pytest
+from command_channel import CommandChannel, CommandError, CommandTimeout
+class Port:
+    """Запись канала команд: запоминает отправленные строки"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sent = []
+        self.written = threading.Semaphore(0)
+    def __call__(self, data):
+        with self.lock:
+            self.sent.append(data.decode().strip())
+        self.written.release()
+        return len(data)
+    def wait(self, count):
+        for _ in range(count):
+            assert self.written.acquire(timeout=5)
+def test_commands_are_pipelined_up_to_limit():
+    port = Port()
+    channel = CommandChannel(port, max_in_flight=2, max_bytes=60)
+    futures = [channel.send(f"CMD{index}", f"OK{index}") for index in range(3)]
+    port.wait(2)
+    assert port.sent == ["CMD0", "CMD1"]
+    assert channel.feed_line("OK1 done")
+    port.wait(1)
+    assert port.sent == ["CMD0", "CMD1", "CMD2"]
+    assert futures[1].result(1) == "OK1 done"
+    assert not futures[0].done()
+    channel.feed_line("OK0")
+    channel.feed_line("OK2")
+    assert [future.result(1) for future in futures] == ["OK0", "OK1 done", "OK2"]
+    channel.close()
+def test_byte_limit():
+    port = Port()
+    channel = CommandChannel(port, max_in_flight=4, max_bytes=12)
+    channel.send("AAAAA", "A")
+    channel.send("BBBBB", "B")
+    channel.send("CCCCC", "C")
+    port.wait(2)
+    assert port.sent == ["AAAAA", "BBBBB"]
+    channel.feed_line("A")
+    port.wait(1)
+    assert port.sent[-1] == "CCCCC"
+    channel.close()
+def test_unrelated_lines_are_ignored():
+    channel = CommandChannel(Port())
+    assert not channel.feed_line("Humidity: 40%")
+    channel.close()
+def test_error_reply_and_timeout():
+    port = Port()
+    channel = CommandChannel(port)
+    failed = channel.send("ALL", "ALL_OK", error_reply="ALL_ERR")
+    late = channel.send("PING", "PONG", timeout=0.05)
+    port.wait(2)
+    channel.feed_line("ALL_ERR")
+    with pytest.raises(CommandError):
+        failed.result(1)
+    with pytest.raises(CommandTimeout):
+        late.result(2)
+    channel.close()
+def test_close_fails_pending_and_new_commands():
+    channel = CommandChannel(Port())
+    pending = channel.send("PING", "PONG")
+    channel.close()
+    with pytest.raises(CommandError):
+        pending.result(1)
+    with pytest.raises(CommandError):
+        channel.send("PING", "PONG").result(1)
@@ -0,0 +1,64 @@
+import threading
+from event_log import EventLog
+class InjectingLock:
+    """Блокировка журнала, которая перед первым захватом в since дает другому потоку добавить запись"""
+    def __init__(self, events):
+        self.events = events
+        self.lock = events.lock
+        self.armed = False
+    def __enter__(self):
+        if self.armed:
+            self.armed = False
+            self.events.lock = self.lock
+            producer = threading.Thread(target=self.events.add, args=("запись из потока порта",), kwargs={"component": "COM3"})
+            producer.start()
+            producer.join()
+            self.events.lock = self
+        return self.lock.__enter__()
+    def __exit__(self, *exc):
+        return self.lock.__exit__(*exc)
+def test_record_added_during_since_is_shown_once():
+    events = EventLog()
+    for index in range(3):
+        events.add(f"запись {index}")
+    lock = InjectingLock(events)
+    events.lock = lock
+    shown = []
+    seq = 0
+    lock.armed = True
+    records, seq = events.since(seq)
+    shown.extend(record.message for record in records)
+    records, seq = events.since(seq)
+    shown.extend(record.message for record in records)
+    assert shown == ["запись 0", "запись 1", "запись 2", "запись из потока порта"]
+    assert seq == events.last_seq
+def test_concurrent_producers_no_duplicates_or_gaps():
+    events = EventLog(capacity=100000)
+    count = 5000
+    def produce(name):
+        for index in range(count):
+            events.add(f"{name} {index}", component=name)
+    producers = [threading.Thread(target=produce, args=(f"COM{port}",)) for port in range(3)]
+    for producer in producers:
+        producer.start()
+    seen = []
+    seq = 0
+    while any(producer.is_alive() for producer in producers):
+        records, seq = events.since(seq)
+        seen.extend(record.seq for record in records)
+    for producer in producers:
+        producer.join()
+    records, seq = events.since(seq)
+    seen.extend(record.seq for record in records)
+    assert seen == list(range(1, 3 * count + 1))
+def test_since_filters_but_advances_past_filtered():
+    events = EventLog()
+    events.add("обычное сообщение")
+    events.add("❌ ошибка", component="камера")
+    events.add("отладка", level="DEBUG")
+    records, seq = events.since(0, "ERROR")
+    assert [record.message for record in records] == ["❌ ошибка"]
+    assert seq == 3
+    assert events.since(seq) == ([], 3)
+    records, _ = events.since(0, component="камера")
+    assert [record.component for record in records] == ["камера"]
@@ -0,0 +1,43 @@
+from datetime import datetime
+import pytest
+from photo_scheduler import CronRule, parse_cron_field, parse_rules
+def times(rule, after, count):
+    found = []
+    for _ in range(count):
+        after = rule.next_time(after)
+        found.append(after)
+    return found
+def test_daily_time():
+    rule = CronRule("13:00")
+    assert rule.next_time(datetime(2026, 10, 18, 12, 59)) == datetime(2026, 10, 18, 13, 0)
+    assert rule.next_time(datetime(2026, 10, 18, 13, 0)) == datetime(2026, 10, 19, 13, 0)
+def test_step_and_range():
+    rule = CronRule("*/30 9-10 * * *")
+    assert times(rule, datetime(2026, 10, 18, 8, 0), 5) == [
+        datetime(2026, 10, 18, 9, 0), datetime(2026, 10, 18, 9, 30), datetime(2026, 10, 18, 10, 0),
+        datetime(2026, 10, 18, 10, 30), datetime(2026, 10, 19, 9, 0)]
+def test_weekdays_sunday_is_0_and_7():
+    assert CronRule("0 8 * * 0").weekdays == CronRule("0 8 * * 7").weekdays == {6}
+    # 2026-10-18 - воскресенье
+    assert CronRule("0 8 * * 1-5").next_time(datetime(2026, 10, 17, 9, 0)) == datetime(2026, 10, 19, 8, 0)
+def test_day_and_weekday_restricted_is_or():
+    rule = CronRule("0 8 1 * 1")
+    assert times(rule, datetime(2026, 10, 18), 3) == [
+        datetime(2026, 10, 19, 8, 0), datetime(2026, 10, 26, 8, 0), datetime(2026, 11, 1, 8, 0)]
+def test_stepped_wildcard_is_and():
+    """*/2 в поле дня cron не считает ограничением: нужен нечетный день, который еще и понедельник"""
+    rule = CronRule("0 8 */2 * 1")
+    found = times(rule, datetime(2026, 10, 18), 4)
+    assert all(moment.weekday() == 0 and moment.day % 2 == 1 for moment in found)
+    assert found[:2] == [datetime(2026, 10, 19, 8, 0), datetime(2026, 11, 9, 8, 0)]
+def test_leap_day():
+    assert CronRule("0 12 29 2 *").next_time(datetime(2026, 10, 18)) == datetime(2028, 2, 29, 12, 0)
+def test_field_from_value_with_step():
+    assert parse_cron_field("5/15", "минута", 0, 59) == {5, 20, 35, 50}
+@pytest.mark.parametrize("text", ["60 * * * *", "* * *", "25:00", "x * * * *", "0 0 31 2 *", "*/0 * * * *"])
+def test_invalid_rules(text):
+    with pytest.raises(ValueError):
+        CronRule(text)
+def test_parse_rules_splits_entries():
+    assert [str(rule) for rule in parse_rules("07:00; 19:00\n*/30 9-17 * * 1-5")] == [
+        "07:00", "19:00", "*/30 9-17 * * 1-5"]
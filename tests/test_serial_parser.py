@@ -0,0 +1,48 @@
+from datetime import datetime
+import pytest
+from serial_parser import (CommandAck, ControllerTime, DeviceState, LineParseError, SensorFault, SensorReading,
+                           StatusMessage, parse_line, reading_to_dict)
+@pytest.mark.parametrize("line, record", [
+    ("Humidity: 41.30% Temperature: 24.60°C", SensorReading(24.6, 41.3, None)),
+    ("Humidity: 40%", SensorReading(None, 40.0, None)),
+    ("Temperature: 22.5°C", SensorReading(22.5, None, None)),
+    ("Soil moisture: 43%", SensorReading(None, None, 43.0)),
+    ("Pump turned ON: soil dry", DeviceState("pump", True, "soil dry")),
+    ("Fan turned OFF: target temperature reached", DeviceState("fan", False, "target temperature reached")),
+    ("Lamp: ON", DeviceState("lamp", True, None)),
+    ("Curtains CLOSED", DeviceState("curtains", False, None)),
+    ("TIME_OK", CommandAck("TIME_OK")),
+    ("Current time: 2026-10-18 09:30:00", ControllerTime(datetime(2026, 10, 18, 9, 30))),
+    ("Waiting for time synchronization...", StatusMessage("Waiting for time synchronization...")),
+    ("Failed to read from DHT sensor!", SensorFault("dht", "Failed to read from DHT sensor!")),
+])
+def test_known_lines(line, record):
+    assert parse_line(line) == record
+@pytest.mark.parametrize("line", ["", "hello", "Unknown: 12"])
+def test_unknown_lines(line):
+    assert parse_line(line) is None
+@pytest.mark.parametrize("line", [
+    "Humidity: nan% Temperature: nan°C",
+    "Humidity: 40% Temperature: nan°C",
+    "Humidity: nan%",
+    "Temperature: inf°C",
+])
+def test_non_finite_dht_is_fault(line):
+    """Прошивка печатает nan, когда DHT не ответил: это отказ датчика, а не показание"""
+    assert parse_line(line) == SensorFault("dht", line)
+@pytest.mark.parametrize("line", ["Soil moisture: nan%", "Soil moisture: -inf%", "Humidity: abc%",
+                                  "Current time: вчера"])
+def test_broken_lines(line):
+    with pytest.raises(LineParseError):
+        parse_line(line)
+def test_reading_to_dict_skips_missing():
+    assert reading_to_dict(SensorReading(24.6, None, 43.0)) == {"temperature": 24.6, "soil": 43.0}
+def test_repeated_readings_survive_cache_reset(monkeypatch):
+    """Словарь недавних строк заменяется целиком: постоянные строки и новые показания разбираются и после сброса"""
+    monkeypatch.setattr("serial_parser.RECENT_READINGS", 3)
+    for value in range(10):
+        assert parse_line(f"Soil moisture: {value}%") == SensorReading(None, None, float(value))
+        assert parse_line(f"Soil moisture: {value}%") == SensorReading(None, None, float(value))
+        assert parse_line("Lamp: ON") == DeviceState("lamp", True, None)
+    assert parse_line("Humidity: nan%") == SensorFault("dht", "Humidity: nan%")
+    assert parse_line("Humidity: nan%") == SensorFault("dht", "Humidity: nan%")
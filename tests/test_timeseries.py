@@ -0,0 +1,51 @@
+import numpy as np
+from timeseries import RingBuffer, minmax_downsample
+def test_append_keeps_last_capacity_points():
+    buffer = RingBuffer(4)
+    assert buffer.last() is None
+    for ts in range(6):
+        buffer.append(ts, ts * 10)
+    assert len(buffer) == 4
+    assert buffer.last() == (5, 50)
+    times, values = buffer.since(0)
+    assert times.tolist() == [2, 3, 4, 5]
+    assert values.tolist() == [20, 30, 40, 50]
+def test_since_across_wrap():
+    buffer = RingBuffer(5)
+    buffer.extend(range(8), range(100, 108))
+    for start, expected in ((0, [3, 4, 5, 6, 7]), (4, [4, 5, 6, 7]), (6, [6, 7]), (7.5, [])):
+        times, values = buffer.since(start)
+        assert times.tolist() == expected
+        assert values.tolist() == [ts + 100 for ts in expected]
+def test_extend_matches_append():
+    appended, extended = RingBuffer(7), RingBuffer(7)
+    appended.extend([0, 1, 2], [0, 1, 2])
+    extended.extend([0, 1, 2], [0, 1, 2])
+    for ts in range(3, 12):
+        appended.append(ts, -ts)
+    extended.extend(range(3, 8), [-ts for ts in range(3, 8)])
+    extended.extend(range(8, 12), [-ts for ts in range(8, 12)])
+    for buffer in (appended, extended):
+        assert buffer.since(0)[0].tolist() == list(range(5, 12))
+    assert appended.since(0)[1].tolist() == extended.since(0)[1].tolist()
+def test_extend_longer_than_capacity():
+    buffer = RingBuffer(3)
+    buffer.extend(range(10), range(10))
+    assert buffer.since(0)[0].tolist() == [7, 8, 9]
+def test_clear():
+    buffer = RingBuffer(3)
+    buffer.extend([1, 2], [1, 2])
+    buffer.clear()
+    assert len(buffer) == 0 and len(buffer.since(0)[0]) == 0
+def test_minmax_downsample_keeps_extremes_in_order():
+    times = np.arange(1000, dtype=np.float64)
+    values = np.sin(times / 50)
+    values[500] = 5.0
+    values[700] = -5.0
+    small_times, small_values = minmax_downsample(times, values, 50)
+    assert len(small_times) <= 100
+    assert np.all(np.diff(small_times) >= 0)
+    assert 5.0 in small_values and -5.0 in small_values
+def test_minmax_downsample_short_input_unchanged():
+    times = np.arange(10.0)
+    assert minmax_downsample(times, times, 50)[0] is times
@@ -0,0 +1,84 @@
+"""Кольцевой буфер показаний на NumPy и прореживание точек под ширину графика"""
+import numpy as np
+class RingBuffer:
+    """Буфер фиксированной емкости для пар (время, значение); время должно не убывать"""
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.times = np.empty(capacity, dtype=np.float64)
+        self.values = np.empty(capacity, dtype=np.float64)
+        self.start = 0
+        self.size = 0
+    def __len__(self):
+        return self.size
+    def clear(self):
+        self.start = 0
+        self.size = 0
+    def append(self, ts, value):
+        end = (self.start + self.size) % self.capacity
+        self.times[end] = ts
+        self.values[end] = value
+        if self.size < self.capacity:
+            self.size += 1
+        else:
+            self.start = (self.start + 1) % self.capacity
+    def extend(self, times, values):
+        """Добавляет массивы точек; если их больше емкости, остаются последние"""
+        times = np.asarray(times, dtype=np.float64)[-self.capacity:]
+        values = np.asarray(values, dtype=np.float64)[-self.capacity:]
+        for chunk_times, chunk_values in self._split_for_write(times, values):
+            end = (self.start + self.size) % self.capacity
+            count = len(chunk_times)
+            self.times[end:end + count] = chunk_times
+            self.values[end:end + count] = chunk_values
+            overflow = self.size + count - self.capacity
+            if overflow > 0:
+                self.start = (self.start + overflow) % self.capacity
+                self.size = self.capacity
+            else:
+                self.size += count
+    def _split_for_write(self, times, values):
+        end = (self.start + self.size) % self.capacity
+        first = min(len(times), self.capacity - end)
+        yield times[:first], values[:first]
+        if first < len(times):
+            yield times[first:], values[first:]
+    def last(self):
+        if not self.size:
+            return None
+        index = (self.start + self.size - 1) % self.capacity
+        return self.times[index], self.values[index]
+    def since(self, start_ts):
+        """Точки со временем не раньше start_ts в порядке поступления"""
+        if not self.size:
+            return self.times[:0], self.values[:0]
+        end = self.start + self.size
+        if end <= self.capacity:
+            times = self.times[self.start:end]
+            values = self.values[self.start:end]
+            begin = np.searchsorted(times, start_ts)
+            return times[begin:], values[begin:]
+        tail = end - self.capacity
+        head_times = self.times[self.start:]
+        begin = np.searchsorted(head_times, start_ts)
+        if begin < len(head_times):
+            return (np.concatenate((head_times[begin:], self.times[:tail])),
+                    np.concatenate((self.values[self.start + begin:], self.values[:tail])))
+        wrapped = self.times[:tail]
+        begin = np.searchsorted(wrapped, start_ts)
+        return wrapped[begin:], self.values[begin:tail]
+def minmax_downsample(times, values, buckets):
+    """Оставляет минимум и максимум в каждой из buckets корзин, сохраняя порядок по времени.
+    Результат содержит не больше 2 * buckets точек независимо от длины входа."""
+    count = len(times)
+    if buckets <= 0 or count <= 2 * buckets:
+        return times, values
+    per_bucket = count // buckets
+    used = per_bucket * buckets
+    grid = values[count - used:].reshape(buckets, per_bucket)
+    offsets = np.arange(buckets) * per_bucket + (count - used)
+    low = grid.argmin(axis=1) + offsets
+    high = grid.argmax(axis=1) + offsets
+    indices = np.empty(2 * buckets, dtype=np.intp)
+    indices[0::2] = np.minimum(low, high)
+    indices[1::2] = np.maximum(low, high)
+    return times[indices], values[indices]